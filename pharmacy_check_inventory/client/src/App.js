@@ -103,19 +103,41 @@ function App( {userId, onLogout} ) {
   }, []);
 
   useEffect(() => {
-    if (showLowStockOnly) {
-      axios.get(`${BASE_URL}/low-stock`, {
-        params: { type: medicineType, user_id: userId }
-      })
-        .then(res => {
-          setResults(res.data);
-          setCurrentPage(1);
-        })
-        .catch(err => {
-          console.error("재고 부족 데이터 불러오기 실패:", err);
-          setResults([]);
-        });
-    }
+    if (!showLowStockOnly) return;
+
+    // 재고 부족 목록은 서버 알림(SSE)으로 갱신: 처음에 전체 목록(snapshot), 이후 업로드/수정 때 바뀐 약만(diff)
+    const rowKey = (row) => `${row['약 이름']}::${row['약 코드']}`;
+    const sortKey = (value) => [value === "NaN", String(value)];
+    const compareRows = (a, b) => {
+      for (const field of ['약 이름', '약 코드']) {
+        const [aEmpty, aText] = sortKey(a[field]);
+        const [bEmpty, bText] = sortKey(b[field]);
+        if (aEmpty !== bEmpty) return aEmpty ? 1 : -1;
+        if (aText !== bText) return aText < bText ? -1 : 1;
+      }
+      return 0;
+    };
+
+    const params = new URLSearchParams({ type: medicineType, user_id: userId });
+    const source = new EventSource(`${BASE_URL}/low-stock/events?${params}`);
+
+    source.addEventListener('snapshot', (e) => {
+      setResults(JSON.parse(e.data).items);
+      setCurrentPage(1);
+    });
+    source.addEventListener('diff', (e) => {
+      const { entered, changed, left } = JSON.parse(e.data);
+      setResults(prev => {
+        const rows = new Map(prev.map(row => [rowKey(row), row]));
+        left.forEach(row => rows.delete(rowKey(row)));
+        [...changed, ...entered].forEach(row => rows.set(rowKey(row), row));
+        return [...rows.values()].sort(compareRows);
+      });
+    });
+    // 연결이 끊기면 EventSource가 다시 연결하고 서버가 전체 목록을 다시 보냄
+    source.onerror = (err) => console.error("재고 부족 알림 연결 오류:", err);
+
+    return () => source.close();
   }, [showLowStockOnly, medicineType]); 
 
   const handleSearch = async (overrideValue = null) => {
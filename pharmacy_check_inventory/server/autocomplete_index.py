@@ -0,0 +1,108 @@
+import heapq
+from collections import defaultdict
+
+from inventory_cache import SnapshotDerivedCache
+
+# 한글 초성 (유니코드 완성형 음절 순서)
+CHOSUNG = [
+    "ㄱ", "ㄲ", "ㄴ", "ㄷ", "ㄸ", "ㄹ", "ㅁ", "ㅂ", "ㅃ", "ㅅ",
+    "ㅆ", "ㅇ", "ㅈ", "ㅉ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ",
+]
+CHOSUNG_SET = set(CHOSUNG)
+HANGUL_FIRST, HANGUL_LAST = 0xAC00, 0xD7A3
+SYLLABLES_PER_CHOSUNG = 21 * 28
+
+MAX_GRAM = 3          # 1~3글자 조각으로 색인
+
+
+def to_chosung(text: str) -> str:
+    """한글 음절은 초성으로 바꾸고 나머지 글자는 그대로 둠 (예: 가스티인 → ㄱㅅㅌㅇ)"""
+    out = []
+    for ch in text:
+        code = ord(ch)
+        if HANGUL_FIRST <= code <= HANGUL_LAST:
+            out.append(CHOSUNG[(code - HANGUL_FIRST) // SYLLABLES_PER_CHOSUNG])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def _grams(text: str):
+    for n in range(1, MAX_GRAM + 1):
+        for i in range(len(text) - n + 1):
+            yield text[i:i + n]
+
+
+def _build_postings(texts):
+    postings = defaultdict(set)
+    for idx, text in enumerate(texts):
+        for gram in _grams(text):
+            postings[gram].add(idx)
+    return postings
+
+
+class NameIndex:
+    """
+    약 이름 목록에 대한 부분 문자열 색인
+    - 1~3글자 조각(n-gram) → 이름 번호 집합으로 후보를 좁힌 뒤 실제 포함 여부 확인
+    - 초성이 섞인 검색어(ㄱㅅㅌ, 가ㅅ티)는 이름의 초성 문자열로 검색
+    """
+
+    def __init__(self, names):
+        self.names = sorted(set(n for n in names if n))
+        self.lower = [n.lower() for n in self.names]
+        self.chosung = [to_chosung(n) for n in self.lower]
+        self.postings = _build_postings(self.lower)
+        self.chosung_postings = _build_postings(self.chosung)
+
+    def _candidates(self, postings, query):
+        # 검색어의 가장 긴 조각들이 모두 들어 있는 이름만 후보로
+        n = min(len(query), MAX_GRAM)
+        sets = [postings.get(query[i:i + n], set()) for i in range(len(query) - n + 1)]
+        sets.sort(key=len)
+        result = set(sets[0])
+        for s in sets[1:]:
+            result &= s
+            if not result:
+                break
+        return result
+
+    def _match_jamo(self, name: str, query: str, start: int) -> bool:
+        # 초성 문자열에서 찾은 위치에서, 검색어의 완성형 글자는 그대로 일치해야 함
+        for offset, q in enumerate(query):
+            if q not in CHOSUNG_SET and name[start + offset] != q:
+                return False
+        return True
+
+    def search(self, partial: str, limit: int):
+        query = partial.strip().lower()
+        if not query or not self.names:
+            return []
+
+        use_chosung = any(ch in CHOSUNG_SET for ch in query)
+        if use_chosung:
+            pattern = to_chosung(query)
+            texts, postings = self.chosung, self.chosung_postings
+        else:
+            pattern = query
+            texts, postings = self.lower, self.postings
+
+        ranked = []
+        for idx in self._candidates(postings, pattern):
+            pos = texts[idx].find(pattern)
+            while pos != -1 and use_chosung and not self._match_jamo(self.lower[idx], query, pos):
+                pos = texts[idx].find(pattern, pos + 1)
+            if pos != -1:
+                # 앞부분 일치 → 앞쪽에서 일치 → 이름 순
+                ranked.append((pos, idx))
+
+        return [self.names[idx] for _, idx in heapq.nsmallest(limit, ranked)]
+
+
+def build_name_index(rows) -> NameIndex:
+    """캐시된 needs 행(dict) 목록 → 약 이름 NameIndex"""
+    return NameIndex([row["drug_name"] for row in rows])
+
+
+# (user_id, type)별 NameIndex (재고 스냅샷이 바뀌면 다음 조회 때 다시 생성)
+autocomplete_indexes = SnapshotDerivedCache(build_name_index)
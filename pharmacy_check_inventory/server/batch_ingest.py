@@ -0,0 +1,176 @@
+"""
+POS 내보내기 파일 여러 개를 한 번에 재고 원장에 반영 (stock_ledger.py)
+
+주간 정산처럼 전문약/일반약의 재고현황·입고·판매 파일(최대 6개)을 같이 올릴 때
+1. 확인: 파일마다 이미 반영한 파일인지, 파싱 중에 뺄 날짜 범위 (DB 읽기)
+2. 파싱: 처음 보는 파일을 프로세스 풀에서 동시에 파싱, 결과는 열 단위 배열(pos_export.pack_parsed)로 받음
+3. 반영: 한 약종의 파일이 모두 준비되면 바로 그 약종을 한 트랜잭션으로 원장에 반영 (stock_ledger.ingest_prepared)
+단계별 소요 시간(wall clock)과 작업 프로세스 안의 파일별 읽기/파싱 시간을 함께 반환
+
+사용법 (server 폴더에서):
+    DATABASE_URL=... python batch_ingest.py <user_id> <파일...> [--period YYYYMMDD-YYYYMMDD] [--needs]
+    (약종/파일 종류는 POS 기본 파일 이름으로 판단, --period는 날짜 없는 합계 보고서의 기간)
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+
+from database import pool
+from inventory_upload import UploadParseError
+from pos_export import EXPORT_SPECS, KINDS, guess_export, parse_export_packed, parse_period, unpack_parsed
+from stock_ledger import LedgerError, check_file, duplicate_file, ingest_prepared, prepare_parsed
+
+logger = logging.getLogger(__name__)
+
+# 파싱 작업 프로세스 수 (.env, 0이면 CPU 코어 수)
+BATCH_INGEST_WORKERS = int(os.getenv("BATCH_INGEST_WORKERS", "0")) or os.cpu_count() or 1
+
+_executor = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    # 작업 프로세스는 한 번 띄워서 재사용 (forkserver: 이벤트 루프/DB 연결이 있는 프로세스를 복제하지 않고,
+    # pandas를 미리 불러온 서버 프로세스에서 띄움)
+    global _executor
+    if _executor is None:
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["pos_export"])
+        _executor = ProcessPoolExecutor(max_workers=BATCH_INGEST_WORKERS, mp_context=context)
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+async def ingest_batch(conn, user_id: str, files, sync_needs: bool = False, workers: int = None) -> dict:
+    """
+    files: [(med_type, kind, data, file_name, period), ...] (period는 날짜 없는 합계 보고서에만 필요, 없으면 None)
+    - 약종마다 재고현황 → 입고 → 판매 순서로 한 트랜잭션에서 반영 (약종끼리는 따로)
+    - sync_needs: stock_ledger.ingest_prepared와 같음 (재고현황 파일은 함께 올릴 수 없음)
+    - workers: 1이면 프로세스 풀 없이 워커 스레드에서 차례로 파싱 (파일이 하나뿐일 때도 같음)
+    - 반환: files(입력 순서대로 파일별 결과 + 작업 프로세스 안의 read/parse/pack 시간),
+            needs(약종별 needs 반영 내역, sync_needs일 때), timings(단계별 초)
+    """
+    started = time.perf_counter()
+    timings = {}
+
+    # 1. 확인
+    checked = []
+    for med_type, kind, data, file_name, period in files:
+        checked.append(await check_file(conn, user_id, med_type, kind, data))
+    timings["check"] = time.perf_counter() - started
+
+    # 2. 파싱: 처음 보는 파일만, 약종별로 묶어서 기다림
+    to_parse = [i for i, (_, duplicate, _) in enumerate(checked) if not duplicate]
+    use_pool = (workers or BATCH_INGEST_WORKERS) > 1 and len(to_parse) > 1
+    loop = asyncio.get_running_loop()
+
+    def submit(i):
+        med_type, kind, data, file_name, period = files[i]
+        job = partial(parse_export_packed, data, med_type, kind, file_name, period, checked[i][2])
+        return loop.run_in_executor(_get_executor(), job) if use_pool else run_in_threadpool(job)
+
+    jobs = {i: asyncio.ensure_future(submit(i)) for i in to_parse}
+    med_types = list(dict.fromkeys(med_type for med_type, *_ in files))
+
+    async def wait_type(med_type):
+        indexes = [i for i in jobs if files[i][0] == med_type]
+        outputs = await asyncio.gather(*(jobs[i] for i in indexes))
+        return med_type, dict(zip(indexes, outputs)), time.perf_counter() - started
+
+    # 3. 반영: 먼저 파싱이 끝난 약종부터
+    results, needs, worker_timings = [None] * len(files), {}, {}
+    waiters = [asyncio.ensure_future(wait_type(med_type)) for med_type in med_types]
+    try:
+        for ready in asyncio.as_completed(waiters):
+            med_type, outputs, ready_at = await ready
+            timings[f"parse_{med_type}"] = ready_at - timings["check"]
+
+            merge_start = time.perf_counter()
+            indexes = sorted((i for i, file in enumerate(files) if file[0] == med_type),
+                             key=lambda i: KINDS.index(files[i][1]))
+            prepared = []
+            for i in indexes:
+                _, kind, _, file_name, _ = files[i]
+                if i not in outputs:
+                    prepared.append(duplicate_file(kind, file_name))
+                    continue
+                packed, worker_timings[i] = outputs[i]
+                parsed = await run_in_threadpool(unpack_parsed, packed)
+                prepared.append(prepare_parsed(med_type, kind, checked[i][0], file_name, parsed))
+
+            merged = await ingest_prepared(conn, user_id, med_type, prepared, sync_needs)
+            for i, result in zip(indexes, merged["files"]):
+                results[i] = {"med_type": med_type, "file_name": files[i][3], **result,
+                              "timings": worker_timings.get(i)}
+            if sync_needs:
+                needs[med_type] = merged["needs"]
+            timings[f"merge_{med_type}"] = time.perf_counter() - merge_start
+    finally:
+        # 오류로 빠져나가도 남은 파싱 작업은 기다리지 않음
+        for task in [*waiters, *jobs.values()]:
+            task.cancel()
+
+    timings["parse"] = max((timings[f"parse_{med_type}"] for med_type in med_types), default=0.0)
+    timings["total"] = time.perf_counter() - started
+    logger.info("📦 일괄 반영: " + ", ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in timings.items()))
+    return {"files": results, "needs": needs if sync_needs else None, "timings": timings}
+
+
+def files_from_paths(paths, period=None) -> list:
+    """파일 경로들 → ingest_batch의 files (약종/파일 종류는 파일 이름으로 판단, period는 날짜 없는 합계 보고서에만)"""
+    files = []
+    for path in map(Path, paths):
+        spec = guess_export(path.name)
+        if spec is None:
+            raise LedgerError(f"파일 이름으로 종류를 알 수 없습니다: {path.name}")
+        report = spec[1] != "snapshot" and EXPORT_SPECS[spec].date is None
+        files.append((*spec, path.read_bytes(), path.name, period if report else None))
+    return files
+
+
+async def _main(args):
+    period = parse_period(args.period) if args.period else None
+    files = files_from_paths(args.files, period)
+    await pool.open()
+    try:
+        async with pool.connection() as conn:
+            result = await ingest_batch(conn, args.user_id, files, sync_needs=args.needs)
+    finally:
+        await pool.close()
+        shutdown_executor()
+
+    for file in result["files"]:
+        worker = file.pop("timings")
+        changes = file.pop("changes")
+        print(f"{file['med_type']}/{file['kind']} {file['file_name']}: {file['status']} "
+              f"새 줄 {file['new_lines']}/{file['lines']} (날짜로 건너뜀 {file['skipped_by_date']}), 바뀐 약 {len(changes)}"
+              + (f" [읽기 {worker['read'] * 1000:.0f}ms, 파싱 {worker['parse'] * 1000:.0f}ms]" if worker else ""))
+    for med_type, rows in (result["needs"] or {}).items():
+        print(f"{med_type} needs 갱신 {sum(row['matched'] for row in rows)}건, 없는 약 {sum(not row['matched'] for row in rows)}건")
+    print(" / ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in result["timings"].items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="POS 내보내기 파일 여러 개를 한 번에 재고 원장에 반영")
+    parser.add_argument("user_id")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--period", help="날짜 없는 합계 보고서의 기간 (YYYYMMDD-YYYYMMDD)")
+    parser.add_argument("--needs", action="store_true", help="needs 현재 재고도 갱신 (재고현황 파일 제외)")
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except (LedgerError, UploadParseError) as e:
+        sys.exit(f"❌ {e}")
@@ -0,0 +1,126 @@
+"""
+여러 POS 내보내기 파일 파싱: 차례로 vs 프로세스 풀 (batch_ingest.py의 파싱 단계)
+
+샘플 파일 6개(tests/일반약, tests/전문약의 재고현황/입고/판매)를 쓰되,
+날짜가 있는 입고/판매 내역 3개는 날짜를 하루씩 밀어 가며 이어 붙여 각각 N줄로 늘린다.
+- sequential: 한 프로세스에서 파일마다 parse_export_file
+- pool cold: 작업 프로세스를 새로 띄우는 시간까지 포함 (서버 시작 후 첫 일괄 반영)
+- pool raw: 띄워 둔 풀에서 parse_export_file (ParsedExport의 DataFrame을 그대로 pickle해서 받음)
+- pool packed: 띄워 둔 풀에서 parse_export_packed + 부모에서 unpack_parsed (batch_ingest와 같은 방식)
+파일 6개가 모두 준비될 때까지의 wall clock과, 작업 프로세스 안에서 가장 오래 걸린 파일의 읽기+파싱 시간을 비교한다.
+(CPU 코어가 하나뿐이면 프로세스 풀은 빨라질 수 없고 프로세스 간 전달 비용만 보임)
+
+사용법 (server 폴더에서, DB 불필요):
+    python benchmarks/bench_batch_ingest.py [N ...] [--workers 4]
+"""
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pos_export import EXPORT_SPECS, guess_export, parse_export_file, parse_export_packed, unpack_parsed  # noqa: E402
+
+SAMPLE_ROOT = Path(__file__).resolve().parents[3] / "tests"
+SAMPLE_FILES = [
+    "일반약/일반약 재고현황_20250415.csv",
+    "일반약/입고상세내역_20250421-20250510 일반약.csv",
+    "일반약/판매상세내역_20250421-20250510 일반약.csv",
+    "전문약/전문약 재고현황(필약국).csv",
+    "전문약/약품 매입 현황.csv",
+    "전문약/약품별조제판매현황.csv",
+]
+PERIOD = (pd.Timestamp("2025-04-21").date(), pd.Timestamp("2025-05-10").date())
+SIZES = [50_000, 200_000]
+
+
+def make_files(lines):
+    """(med_type, kind, data, file_name, period) 6개, 날짜가 있는 파일은 lines줄로 늘림"""
+    files = []
+    for relative in SAMPLE_FILES:
+        path = SAMPLE_ROOT / relative
+        med_type, kind = guess_export(path.name)
+        spec = EXPORT_SPECS[(med_type, kind)]
+        data = path.read_bytes()
+        if spec.date:
+            df = pd.read_csv(path, dtype=str, encoding="utf-8-sig")
+            dates = pd.to_datetime(df[spec.date].str.replace(r"\D", "", regex=True).str[:8], format="%Y%m%d",
+                                   errors="coerce")
+            copies = []
+            for shift in range(-(-lines // len(df))):
+                copy = df.copy()
+                shifted = (dates - pd.Timedelta(days=shift)).dt.strftime("%Y%m%d" if "-" not in df[spec.date].iloc[-1] else "%Y-%m-%d")
+                copy[spec.date] = shifted.where(dates.notna(), df[spec.date])
+                copies.append(copy)
+            data = pd.concat(copies).iloc[:lines].to_csv(index=False).encode("utf-8-sig")
+        files.append((med_type, kind, data, path.name, None if spec.date or kind == "snapshot" else PERIOD))
+    return files
+
+
+def executor(workers):
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(["pos_export"])
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
+def run_pool(pool, fn, files, unpack=None):
+    start = time.perf_counter()
+    futures = [pool.submit(partial(fn, data, med_type, kind, name, period)) for med_type, kind, data, name, period in files]
+    outputs = [future.result() for future in futures]
+    ready = time.perf_counter() - start
+    worker = max((output[1]["read"] + output[1]["parse"] for output in outputs), default=0.0) if unpack else None
+    unpack_s = 0.0
+    if unpack:
+        start = time.perf_counter()
+        outputs = [unpack(output[0]) for output in outputs]
+        unpack_s = time.perf_counter() - start
+    return outputs, ready, unpack_s, worker
+
+
+def main():
+    args = sys.argv[1:]
+    workers = os.cpu_count() or 1
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    sizes = [int(arg) for arg in args] or SIZES
+    print(f"작업 프로세스 {workers}개 (CPU {os.cpu_count()}개)")
+
+    for lines in sizes:
+        files = make_files(lines)
+        total_mb = sum(len(file[2]) for file in files) / 1e6
+        print(f"\n날짜 있는 파일 3개 × {lines:,}줄 + 나머지 3개 (전체 {total_mb:.1f}MB)")
+
+        start = time.perf_counter()
+        expected = [parse_export_file(data, med_type, kind, name, period) for med_type, kind, data, name, period in files]
+        print(f"  sequential   {(time.perf_counter() - start) * 1000:8.0f}ms")
+
+        start = time.perf_counter()
+        with executor(workers) as pool:
+            run_pool(pool, parse_export_packed, files, unpack_parsed)
+            print(f"  pool cold    {(time.perf_counter() - start) * 1000:8.0f}ms (프로세스 시작 포함)")
+
+            _, ready, _, _ = run_pool(pool, parse_export_file, files)
+            print(f"  pool raw     {ready * 1000:8.0f}ms")
+
+            outputs, ready, unpack_s, worker = run_pool(pool, parse_export_packed, files, unpack_parsed)
+            print(f"  pool packed  {(ready + unpack_s) * 1000:8.0f}ms (준비 {ready * 1000:.0f}ms + unpack {unpack_s * 1000:.0f}ms, "
+                  f"가장 긴 파일 읽기+파싱 {worker * 1000:.0f}ms)")
+
+        same = all(
+            got.lines.reset_index(drop=True).equals(want.lines.reset_index(drop=True).astype(got.lines.dtypes.to_dict()))
+            and got.period == want.period and got.skipped == want.skipped
+            for got, want in zip(outputs, expected)
+        )
+        print(f"  결과 동일: {same}")
+
+
+if __name__ == "__main__":
+    main()
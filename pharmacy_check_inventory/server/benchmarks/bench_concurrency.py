@@ -0,0 +1,63 @@
+"""
+동시 요청 부하 테스트
+
+요청마다 DB를 조회하는 /search?limit= (SQL 페이지 조회, 재고 캐시를 거치지 않음)에 동시 요청 수를 늘려 가며
+요청을 보내고 처리량/지연 시간을 잰다.
+비동기 풀에서는 처리량이 스레드 수(기본 40)가 아니라 DB_POOL_MAX_SIZE를 따라 늘어나야 한다.
+(/recent-searches는 메모리에서 응답하므로 풀 부하 측정에 쓸 수 없음)
+
+사용법 (server 폴더에서, 서버를 먼저 띄워 둔 상태로, httpx 필요: pip install -r requirements-dev.txt):
+    DB_POOL_MAX_SIZE=10 uvicorn main:app --port 8000
+    python benchmarks/bench_concurrency.py [BASE_URL] [동시 요청 수당 요청 횟수]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+CONCURRENCY_LEVELS = [1, 5, 10, 20, 50, 100]
+BENCH_USER = "__bench_concurrency__"
+# limit을 주면 캐시된 스냅샷 대신 매번 SQL로 한 페이지를 조회
+SEARCH_PARAMS = {"name": "가", "type": "professional", "user_id": BENCH_USER, "limit": 20}
+
+
+async def worker(client, count, latencies, errors):
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get("/search", params=SEARCH_PARAMS)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+async def run_level(base_url, concurrency, total):
+    latencies, errors = [], []
+    per_worker = max(1, total // concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, per_worker, latencies, errors) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"동시 {concurrency:4d}  {len(latencies) / elapsed:8.1f} req/s  "
+          f"중앙값 {statistics.median(latencies) * 1000:7.1f}ms  p95 {p95 * 1000:7.1f}ms  "
+          f"실패 {len(errors)}")
+
+
+async def main():
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000"
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    for concurrency in CONCURRENCY_LEVELS:
+        await run_level(base_url, concurrency, total)
+
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        print((await client.get("/stats")).json()["pool"])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
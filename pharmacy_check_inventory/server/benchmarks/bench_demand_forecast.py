@@ -0,0 +1,82 @@
+"""
+수요 예측(demand_forecast.py) 벤치마크: 날마다 전체 판매 내역으로 다시 계산 vs 새 날만 이어서 계산
+
+가상 약 D개, 하루 판매 줄 L개로 60일 동안 하루씩 판매 내역이 늘어날 때
+- full: 매일 지금까지의 모든 판매 줄을 약별로 모아 약마다 Python으로 첫날부터 지수 평활
+- incremental: 매일 그날 판매 줄만 daily_matrix → smooth(약 전체 배열 연산)로 이전 평균/분산에 이어서 계산
+마지막 날의 총 시간과 두 결과(약별 평균/분산, 필요 재고)가 같은지 비교한다.
+
+사용법 (server 폴더에서, DATABASE_URL은 모듈을 불러오는 데만 필요하고 DB에 연결하지 않음):
+    DATABASE_URL=... python benchmarks/bench_demand_forecast.py [일수] [약 수] [하루 줄 수]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from demand_forecast import ALPHA, daily_matrix, reorder_points, smooth  # noqa: E402
+
+
+def make_sales(days, drugs, lines_per_day, seed=0):
+    # 약마다 인기도가 다른 판매 줄 [(날짜 번호, 약 번호, 수량), ...] (하루 단위 배열 목록)
+    rng = np.random.default_rng(seed)
+    popularity = rng.pareto(1.2, drugs) + 0.01
+    popularity /= popularity.sum()
+    return [
+        (rng.choice(drugs, lines_per_day, p=popularity), rng.integers(1, 10, lines_per_day).astype(float))
+        for _ in range(days)
+    ]
+
+
+def full_recompute(sales, drugs, through):
+    # 날마다: 0 ~ through일의 모든 줄을 약별 하루 판매량 dict로 모은 뒤 약마다 첫날부터 평활
+    per_drug = [dict() for _ in range(drugs)]
+    for day in range(through + 1):
+        drug_index, quantity = sales[day]
+        for drug, amount in zip(drug_index.tolist(), quantity.tolist()):
+            per_drug[drug][day] = per_drug[drug].get(day, 0.0) + amount
+    mean, var = np.zeros(drugs), np.zeros(drugs)
+    for drug, by_day in enumerate(per_drug):
+        m = v = 0.0
+        for day in range(through + 1):
+            diff = by_day.get(day, 0.0) - m
+            m += ALPHA * diff
+            v = (1 - ALPHA) * (v + ALPHA * diff * diff)
+        mean[drug], var[drug] = m, v
+    return mean, var
+
+
+def main():
+    days, drugs, lines_per_day = [int(arg) for arg in sys.argv[1:4]] + [60, 20_000, 5_000][len(sys.argv[1:4]):]
+    sales = make_sales(days, drugs, lines_per_day)
+    print(f"{days}일, 약 {drugs:,}개, 하루 판매 줄 {lines_per_day:,}개 (하루씩 늘어날 때마다 다시 계산)")
+
+    start = time.perf_counter()
+    for through in range(days - 1):
+        full_recompute(sales, drugs, through)
+    last = time.perf_counter()
+    expected = full_recompute(sales, drugs, days - 1)
+    full_s, last_s = time.perf_counter() - start, time.perf_counter() - last
+
+    start = time.perf_counter()
+    mean, var = np.zeros(drugs), np.zeros(drugs)
+    for day in range(days):
+        drug_index, quantity = sales[day]
+        first_day = np.datetime64("2025-01-01") + day
+        span = np.full(len(drug_index), first_day)
+        daily = daily_matrix(drug_index, span, span, quantity, first_day, 1, drugs)
+        mean, var = smooth(mean, var, daily)
+    incremental_s = time.perf_counter() - start
+
+    same = np.allclose(mean, expected[0]) and np.allclose(var, expected[1])
+    same_points = np.array_equal(reorder_points(mean, var, days), reorder_points(*expected, days))
+    print(f"  full {full_s:8.2f}s (마지막 날 {last_s * 1000:.0f}ms)  "
+          f"incremental {incremental_s * 1000:6.0f}ms (하루 {incremental_s / days * 1000:.1f}ms)  "
+          f"결과 동일: {same}, 필요 재고 동일: {same_points}")
+
+
+if __name__ == "__main__":
+    main()
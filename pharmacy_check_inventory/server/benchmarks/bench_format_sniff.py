@@ -0,0 +1,83 @@
+"""
+업로드 파일 형식 판별 벤치마크
+
+- legacy:  read_excel을 먼저 시도하고 실패하면 read_html로 폴백 (기존 방식)
+- sniffed: 앞부분 시그니처/태그/구분자/인코딩으로 형식을 판별한 뒤 해당 파서로 바로 파싱 (현재 방식)
+
+사용법 (server 폴더에서, DB 불필요):
+    python benchmarks/bench_format_sniff.py [반복 횟수]
+"""
+import io
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from file_format import SNIFF_BYTES, sniff_format  # noqa: E402
+
+TESTS_DIR = Path(__file__).resolve().parents[3] / "tests"
+SAMPLE_DIRS = [TESTS_DIR / "전문약", TESTS_DIR / "일반약"]
+
+
+def legacy_parse(content: bytes):
+    try:
+        return pd.read_excel(io.BytesIO(content), dtype=str)
+    except Exception:
+        html = content.decode("utf-8", errors="ignore")
+        return pd.read_html(io.StringIO(html))[0]
+
+
+def sniffed_parse(content: bytes):
+    fmt = sniff_format(content[:SNIFF_BYTES])
+    if fmt is None:
+        raise ValueError("형식 판별 실패")
+    if fmt.kind == "xls":
+        return pd.read_excel(io.BytesIO(content), engine="xlrd", dtype=str)
+    if fmt.kind == "xlsx":
+        return pd.read_excel(io.BytesIO(content), engine="openpyxl", dtype=str)
+    text = content.decode(fmt.encoding, errors="replace")
+    if fmt.kind == "html":
+        return pd.read_html(io.StringIO(text))[0]
+    return pd.read_csv(io.StringIO(text), sep=fmt.delimiter)
+
+
+def measure(fn, content, repeat):
+    # 실패하는 파일도 실패까지 걸린 시간을 잼
+    start = time.perf_counter()
+    result = "ok"
+    for _ in range(repeat):
+        try:
+            fn(content)
+        except Exception as e:
+            result = f"실패({type(e).__name__})"
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    for directory in SAMPLE_DIRS:
+        for path in sorted(directory.glob("*")):
+            if path.suffix.lower() not in (".xls", ".xlsx", ".csv"):
+                continue
+            content = path.read_bytes()
+
+            start = time.perf_counter()
+            for _ in range(1000):
+                fmt = sniff_format(content[:SNIFF_BYTES])
+            sniff_us = (time.perf_counter() - start) / 1000 * 1e6
+
+            legacy_s, legacy_result = measure(legacy_parse, content, repeat)
+            sniffed_s, sniffed_result = measure(sniffed_parse, content, repeat)
+
+            kind = f"{fmt.kind}/{fmt.encoding}/{fmt.delimiter!r}" if fmt else "판별 불가"
+            print(f"{directory.name}/{path.name}  [{kind}]  판별 {sniff_us:.0f}µs")
+            print(f"  legacy  {legacy_s * 1000:8.1f}ms  {legacy_result}")
+            print(f"  sniffed {sniffed_s * 1000:8.1f}ms  {sniffed_result}")
+
+
+if __name__ == "__main__":
+    main()
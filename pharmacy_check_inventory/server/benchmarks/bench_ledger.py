@@ -0,0 +1,138 @@
+"""
+재고 원장(stock_ledger) vs 매번 전체 재계산(tests/일반약/update_stock.py) 벤치마크
+
+가상 약국(BENCH_USER)의 일반약 재고현황 + 날마다 늘어나는 판매상세내역(1일차~k일차, POS 내보내기처럼 기간이 겹침)을
+하루씩 원장에 반영하면서, 몇몇 날짜에서
+- 전체 재계산: 재고현황 + k일치 판매 내역 전체로 update_general_stock 실행
+- 원장: 같은 파일을 ingest_export (파일 파싱, 이미 반영한 날짜는 건너뛰고 새 줄만 DB 반영)
+시간을 비교하고, 마지막 날 두 방식의 최종 재고가 같은지 확인한 뒤 데이터를 지운다.
+(원장의 DB 작업은 새로 나온 줄 수에만 비례, 파싱은 올린 파일 크기에 비례)
+
+사용법 (server 폴더에서, 006 마이그레이션 적용된 DB 필요):
+    DATABASE_URL=postgresql://... python benchmarks/bench_ledger.py [일수] [하루 판매 줄 수]
+"""
+import asyncio
+import datetime
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "tests" / "일반약"))
+
+from database import pool  # noqa: E402
+from pos_export import parse_export_file  # noqa: E402
+from stock_ledger import get_balances, ingest_export  # noqa: E402
+from update_stock import update_general_stock  # noqa: E402
+
+BENCH_USER = "__bench_ledger__"
+DRUGS = 2000
+SALES_COLUMNS = ["no", "판매일자", "시간", "대표바코드", "바코드", "상품명", "단위", "포장수량", "구입단가", "판매단가",
+                 "수량", "할인", "판매금액", "거래구분", "고객명"]
+
+
+def make_history(days, per_day, seed=0):
+    rng = random.Random(seed)
+    names = [f"일반약{i:05d} {rng.choice(['10정', '30정', '100mL', '1통'])}" for i in range(DRUGS)]
+    snapshot = pd.DataFrame({
+        "no": range(1, DRUGS + 1),
+        "상품명": names,
+        "제조사": "미등록제조사",
+        "구입단가": "1,000",
+        "재고수량": [rng.randrange(0, 300) for _ in names],
+        "재고금액": "0",
+        "상품위치": "",
+    })
+    sales = []
+    for day in range(days):
+        date = (pd.Timestamp("2025-01-01") + pd.Timedelta(days=day)).strftime("%Y-%m-%d")
+        for i in range(per_day):
+            seconds = 9 * 3600 + i * 12 * 3600 // per_day
+            sales.append(["", date, f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}", "", "",
+                          rng.choice(names), "개", "1", "0", "3,000", str(rng.randrange(1, 4)), "0", "3,000",
+                          rng.choice(["KB국민카드", "현금수납", "신한카드"]), ""])
+    return snapshot, pd.DataFrame(sales, columns=SALES_COLUMNS)
+
+
+def window_csv(sales, days_included, per_day):
+    # 1일차 ~ days_included일차, 최근 날짜가 위로 (POS 판매상세내역과 같은 순서, no는 매번 새로 매김)
+    window = sales.iloc[:days_included * per_day].iloc[::-1].copy()
+    window["no"] = range(1, len(window) + 1)
+    return window.to_csv(index=False).encode("utf-8-sig")
+
+
+async def run(days, per_day):
+    snapshot, sales = make_history(days, per_day)
+    checkpoints = sorted({1, days // 4, days // 2, days * 3 // 4, days} - {0})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = Path(tmp) / "재고현황_20241231.csv"
+        snapshot.to_csv(snapshot_path, index=False, encoding="utf-8-sig")
+        empty_purchase = Path(tmp) / "입고.csv"
+        pd.DataFrame(columns=["no", "입고일자", "상품명", "수량"]).to_csv(empty_purchase, index=False)
+
+        await pool.open()
+        try:
+            async with pool.connection() as conn:
+                await conn.execute("DELETE FROM stock_ledger_lines WHERE user_id = %s", (BENCH_USER,))
+                await conn.execute("DELETE FROM stock_balances WHERE user_id = %s", (BENCH_USER,))
+                await conn.execute("DELETE FROM stock_ledger_files WHERE user_id = %s", (BENCH_USER,))
+                await conn.commit()
+                await ingest_export(conn, BENCH_USER, "general", "snapshot", snapshot_path.read_bytes(),
+                                    snapshot_path.name)
+
+                print(f"일반약 {DRUGS}종, 하루 판매 {per_day}줄, {days}일")
+                for day in range(1, days + 1):
+                    data = window_csv(sales, day, per_day)
+                    start = time.perf_counter()
+                    result = await ingest_export(conn, BENCH_USER, "general", "sales", data, f"판매_{day}.csv")
+                    ledger_s = time.perf_counter() - start
+                    if day not in checkpoints:
+                        continue
+
+                    # 원장과 같은 조건(전날 파일까지 반영된 날짜는 빼고)으로 파싱만 따로 측정
+                    first = datetime.date(2025, 1, 1)
+                    ranges = [(first, first + datetime.timedelta(days=day - 2))] if day > 2 else []
+                    start = time.perf_counter()
+                    parse_export_file(data, "general", "sales", complete_ranges=ranges)
+                    parse_s = time.perf_counter() - start
+
+                    sales_path = Path(tmp) / "판매.csv"
+                    sales_path.write_bytes(data)
+                    start = time.perf_counter()
+                    legacy = update_general_stock(snapshot_path, empty_purchase, sales_path, Path(tmp) / "out.csv")
+                    legacy_s = time.perf_counter() - start
+
+                    print(f"  {day:3d}일차 파일 {result['lines']:7d}줄 (날짜로 건너뜀 {result['skipped_by_date']:6d}, "
+                          f"새 줄 {result['new_lines']:5d})  "
+                          f"전체 재계산 {legacy_s * 1000:7.1f}ms  원장 {ledger_s * 1000:7.1f}ms "
+                          f"(파싱 {parse_s * 1000:6.1f}ms + DB {(ledger_s - parse_s) * 1000:6.1f}ms)")
+
+                start = time.perf_counter()
+                balances = await get_balances(conn, BENCH_USER, "general")
+                read_s = time.perf_counter() - start
+                expected = dict(zip(legacy["상품명"], legacy["최종재고"]))
+                same = all(expected.get(row["drug_name"]) == row["balance"] for row in balances) \
+                    and len(balances) == len(expected)
+                print(f"  오늘 재고 조회 {read_s * 1000:.1f}ms ({len(balances)}종, 전체 재계산과 동일: {same})")
+
+                await conn.execute("DELETE FROM stock_ledger_lines WHERE user_id = %s", (BENCH_USER,))
+                await conn.execute("DELETE FROM stock_balances WHERE user_id = %s", (BENCH_USER,))
+                await conn.execute("DELETE FROM stock_ledger_files WHERE user_id = %s", (BENCH_USER,))
+                await conn.commit()
+        finally:
+            await pool.close()
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    asyncio.run(run(days, per_day))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+재고 부족 목록(GET /low-stock) 벤치마크: 요청마다 전체 약 분류 vs 스냅샷마다 만든 투영에서 꺼내기
+
+가상 needs 행 N개(부족한 약 약 1%)로
+- classify: 요청마다 전체 행의 현재/필요 재고 배열 → 심각/주의/충분 분류 → 부족한 약 응답 행 (이전 방식)
+- build: 재고 스냅샷 → 여유분 순으로 정렬한 투영 (build_projection, 스냅샷이 바뀐 뒤 첫 요청에서 한 번)
+- projection: low_stock_rows (searchsorted로 경계만 찾고 부족한 약만 응답 행으로, 요청마다)
+시간과 두 결과가 같은지 비교한다.
+
+사용법 (server 폴더에서, DATABASE_URL은 모듈을 불러오는 데만 필요하고 DB에 연결하지 않음):
+    DATABASE_URL=... python benchmarks/bench_low_stock.py [N ...]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from inventory_rows import sort_output_rows, to_output_rows  # noqa: E402
+from low_stock import build_projection, low_stock_rows  # noqa: E402
+
+SIZES = [10_000, 100_000, 500_000]
+MARGIN = 3.0
+REPEAT = 20
+
+
+def make_rows(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        need = float(rng.randint(1, 50))
+        present = need - rng.randint(-5, 4) if rng.random() < 0.01 else need + rng.randint(3, 200)
+        rows.append({
+            "id": i, "user_id": "bench", "type": "general", "drug_name": f"약{i:07d}", "drug_code": str(600000000 + i),
+            "present_count": present if rng.random() > 0.001 else None, "need_count": need, "location": None,
+            "unit_count": rng.choice([1.0, 10.0, 30.0, None]),
+        })
+    return rows
+
+
+def classify(rows, margin):
+    present = np.array([row["present_count"] for row in rows], dtype=float)
+    need = np.array([row["need_count"] for row in rows], dtype=float)
+    status = np.select([present < need, present < need + margin], ["심각", "주의"], default="충분")
+    short = np.flatnonzero(status != "충분")
+    return sort_output_rows(to_output_rows([rows[i] for i in short], statuses=status[short].tolist()))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = fn(*args)
+    return result, (time.perf_counter() - start) / REPEAT
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    for n in sizes:
+        rows = make_rows(n)
+        expected, classify_s = timed(classify, rows, MARGIN)
+
+        start = time.perf_counter()
+        projection = build_projection(rows)
+        build_s = time.perf_counter() - start
+
+        items, projection_s = timed(low_stock_rows, projection, MARGIN)
+        print(f"  {n:8,d}행 (부족 {len(items):,}건)  classify {classify_s * 1000:7.1f}ms  build {build_s * 1000:6.0f}ms  "
+              f"projection {projection_s * 1000:6.2f}ms  결과 동일: {items == expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+주문 계획(order_plan.py) 벤치마크: 약마다 Python으로 계산 vs 배열 연산 한 번
+
+가상 needs 행 N개(거래처 20곳, 절반 정도가 부족)로
+- loop: 행마다 부족 통 수 올림 → 주문 배수 올림 → 거래처별 dict에 추가 → 거래처/약 이름 순 정렬
+- build: 재고 스냅샷 → 열 단위 배열 + 정렬 순위 (build_columns, 스냅샷이 바뀐 뒤 첫 요청에서 한 번)
+- plan: plan_orders(배열 연산) + group_orders(주문할 약의 응답 행) (GET /order-plan의 요청마다)
+시간과 두 결과(거래처별 약/주문 통 수)가 같은지 비교한다.
+
+사용법 (server 폴더에서, DATABASE_URL은 모듈을 불러오는 데만 필요하고 DB에 연결하지 않음):
+    DATABASE_URL=... python benchmarks/bench_order_plan.py [N ...]
+"""
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from order_plan import CEIL_EPSILON, NO_SUPPLIER, build_columns, group_orders, plan_orders  # noqa: E402
+
+SIZES = [10_000, 100_000, 500_000]
+
+
+def make_rows(n, seed=0):
+    rng = random.Random(seed)
+    suppliers = [f"도매{i:02d}" for i in range(20)] + [None]
+    return [
+        {
+            "drug_name": f"약{i:07d}", "drug_code": str(600000000 + i), "location": None,
+            "present_count": float(rng.randint(0, 300)), "need_count": float(rng.randint(0, 400)),
+            "unit_count": rng.choice([1.0, 10.0, 28.0, 30.0, 100.0, None]),
+            "order_multiple": rng.choice([None, None, None, 5.0, 10.0]),
+            "supplier": rng.choice(suppliers),
+        }
+        for i in range(n)
+    ]
+
+
+def loop_plan(rows):
+    groups = {}
+    for row in rows:
+        present, need = row["present_count"], row["need_count"]
+        if present is None or need is None:
+            continue
+        unit = row["unit_count"] if row["unit_count"] and row["unit_count"] > 0 else 1.0
+        multiple = row["order_multiple"] if row["order_multiple"] and row["order_multiple"] > 0 else 1.0
+        packs = math.ceil((need - present) / unit - CEIL_EPSILON)
+        packs = math.ceil(packs / multiple - CEIL_EPSILON) * multiple
+        if packs <= 0:
+            continue
+        supplier = (row["supplier"] or "").strip() or NO_SUPPLIER
+        groups.setdefault(supplier, []).append({
+            "약 이름": row["drug_name"], "약 코드": row["drug_code"], "주문 통 수": int(packs),
+            "주문 수량": packs * unit,
+        })
+    names = sorted(groups, key=lambda name: (name == NO_SUPPLIER, name))
+    return [
+        {"거래처": name, "items": sorted(groups[name], key=lambda item: (item["약 이름"], item["약 코드"]))}
+        for name in names
+    ]
+
+
+def summary(grouped):
+    return [(group["거래처"], [(item["약 이름"], item["주문 통 수"]) for item in group["items"]]) for group in grouped]
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    for n in sizes:
+        rows = make_rows(n)
+
+        start = time.perf_counter()
+        expected = loop_plan(rows)
+        loop_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        columns = build_columns(rows)
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        plan = plan_orders(columns)
+        plan_s = time.perf_counter() - start
+        grouped = group_orders(plan)
+        total_s = time.perf_counter() - start
+
+        print(f"  {n:8,d}행 (주문 {len(plan['주문 통 수']):,}건)  loop {loop_s * 1000:6.0f}ms  build {build_s * 1000:6.0f}ms  "
+              f"plan {total_s * 1000:6.0f}ms (계산 {plan_s * 1000:.1f}ms + 응답 행 {(total_s - plan_s) * 1000:.0f}ms)  "
+              f"결과 동일: {summary(expected) == summary(grouped)}")
+
+
+if __name__ == "__main__":
+    main()
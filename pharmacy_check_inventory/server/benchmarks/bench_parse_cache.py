@@ -0,0 +1,85 @@
+"""
+파싱 결과 캐시(parse_cache.py) 벤치마크: HTML 표로 된 가짜 .xls 내보내기를 매번 read_html vs 캐시에서 읽기
+
+샘플 판매상세내역(tests/일반약)을 이어 붙여 n행짜리 HTML 표(POS의 .xls 내보내기와 같은 형식)를 만들고
+- parse: 캐시 없이 pos_export.read_export (형식 판별 + read_html)
+- cached: 같은 파일을 다시 읽을 때 (내용 해시 + Arrow IPC memory map → DataFrame)
+시간과 두 결과가 같은지, 캐시 파일 크기를 비교한다.
+마지막으로 상한(PARSE_CACHE_MAX_MB)보다 많은 파일을 넣어 오래된 항목부터 지워지는지 확인한다.
+
+사용법 (server 폴더에서, DB 불필요, pyarrow 필요):
+    python benchmarks/bench_parse_cache.py [행 수 ...]
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+CACHE_DIR = tempfile.mkdtemp(prefix="bench_parse_cache_")
+os.environ["PARSE_CACHE_DIR"] = CACHE_DIR
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parse_cache import ParseCache, parse_cache  # noqa: E402
+from pos_export import read_export  # noqa: E402
+
+SAMPLE = Path(__file__).resolve().parents[3] / "tests" / "일반약" / "판매상세내역_20250421-20250510 일반약.csv"
+SIZES = [1_000, 10_000, 50_000]
+
+
+def make_html(rows, seed=0):
+    sample = pd.read_csv(SAMPLE, dtype=str)
+    df = pd.concat([sample] * (-(-rows // len(sample))), ignore_index=True).iloc[:rows]
+    df["no"] = [str(i + seed) for i in range(1, len(df) + 1)]  # seed마다 다른 파일 내용
+    table = df.to_html(index=False, na_rep="")
+    return f'<html><head><meta charset="utf-8"></head><body>{table}</body></html>'.encode("utf-8")
+
+
+def timed(data):
+    start = time.perf_counter()
+    df = read_export(io.BytesIO(data))
+    return df, time.perf_counter() - start
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    if not parse_cache.enabled:
+        sys.exit("pyarrow가 없어서 캐시를 쓸 수 없습니다 (pip install pyarrow)")
+    print(f"캐시 폴더 {CACHE_DIR}")
+
+    for rows in sizes:
+        data = make_html(rows)
+        parsed, parse_s = timed(data)   # 처음: 파싱 후 저장
+        cached, cached_s = timed(data)  # 다시: 캐시
+        entry = max(Path(CACHE_DIR).glob("*.arrow"), key=lambda path: path.stat().st_mtime)
+        print(f"  {rows:7,d}행 HTML {len(data) / 1e6:6.1f}MB  parse {parse_s * 1000:8.1f}ms  "
+              f"cached {cached_s * 1000:6.1f}ms ({parse_s / cached_s:5.0f}배)  "
+              f"캐시 파일 {entry.stat().st_size / 1e6:5.1f}MB  결과 동일: {parsed.equals(cached)}")
+
+    # 크기 상한: 항목 하나가 약 1MB일 때 상한 3MB면 최근 3개만 남아야 함
+    small = ParseCache(tempfile.mkdtemp(prefix="bench_parse_cache_evict_"), 3 * 1024 * 1024)
+    try:
+        check_eviction(small)
+    finally:
+        shutil.rmtree(small.directory, ignore_errors=True)
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+
+def check_eviction(small):
+    frames = [read_export(io.BytesIO(make_html(5_000, seed=i * 100_000))) for i in range(6)]
+    keys = []
+    for i, df in enumerate(frames):
+        keys.append(small.key(bytes([i]), "html"))
+        small.put(keys[-1], df)
+        time.sleep(0.01)  # 수정 시각 순서 보장
+    kept = [i for i, key in enumerate(keys) if small.get(key) is not None]
+    stats = small.stats()
+    print(f"  상한 3MB에 6개 저장 → 남은 항목 {kept} ({stats['bytes'] / 1e6:.1f}MB), 지운 항목 {stats['evictions']}개")
+
+
+if __name__ == "__main__":
+    main()
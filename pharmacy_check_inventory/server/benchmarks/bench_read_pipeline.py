@@ -0,0 +1,95 @@
+"""
+/search, /low-stock 응답 생성 방식 비교 벤치마크
+
+- pandas: 행 → DataFrame → 열 이름 변경/통 수 계산/정렬 → fillna("NaN").to_dict → JSONResponse (기존 방식)
+- lean:   행 단위로 변환/정렬 → orjson(없으면 json) 직렬화 (현재 방식)
+
+두 방식의 응답 본문이 같은지도 확인한다 (빈 값, 통당 수량 0 포함).
+
+사용법 (server 폴더에서, DB 불필요):
+    python benchmarks/bench_read_pipeline.py [반복 횟수]
+"""
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from inventory_rows import FastJSONResponse, sort_output_rows, to_output_rows  # noqa: E402
+
+SIZES = [1_000, 50_000]
+
+
+def make_rows(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        rows.append({
+            "id": i + 1,
+            "user_id": "bench",
+            "type": "professional",
+            "drug_name": f"약품{rng.randrange(n):06d}정{rng.choice(['10mg', '20mg', '5mg'])}",
+            "drug_code": str(rng.randrange(10**8, 10**9)),
+            "present_count": float(rng.randrange(0, 500)),
+            "need_count": float(rng.randrange(0, 50)),
+            "location": rng.choice(["미지정", "A-1", "B-2", None]),
+            "unit_count": rng.choice([1.0, 30.0, 100.0, 0.0, None]),
+        })
+    return rows
+
+
+def pandas_search(rows):
+    df = pd.DataFrame(rows)
+    df = df.rename(columns={
+        "drug_name": "약 이름",
+        "drug_code": "약 코드",
+        "present_count": "현재 재고",
+        "need_count": "필요 재고",
+        "location": "위치",
+        "unit_count": "통당 수량"
+    })
+    try:
+        df["필요 통 수"] = df["필요 재고"] / df["통당 수량"]
+        df["현재 통 수"] = df["현재 재고"] / df["통당 수량"]
+        df["주문 통 수"] = df["필요 통 수"] - df["현재 통 수"]
+    except Exception:
+        df["필요 통 수"] = 0
+        df["현재 통 수"] = 0
+        df["주문 통 수"] = 0
+    df = df.sort_values(by=["약 이름", "약 코드"])
+    return JSONResponse(content=df.fillna("NaN").to_dict(orient="records")).body
+
+
+def lean_search(rows):
+    return FastJSONResponse(content=sort_output_rows(to_output_rows(rows))).body
+
+
+def timed(fn, rows, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = fn(rows)
+    return (time.perf_counter() - start) / repeat, body
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    # 기존 방식은 통당 수량 0이면 inf가 나와 JSON 직렬화에 실패하므로 비교용 데이터에서는 제외
+    for n in SIZES:
+        rows = [row for row in make_rows(n) if row["unit_count"] != 0.0]
+        pandas_s, pandas_body = timed(pandas_search, rows, repeat)
+        lean_s, lean_body = timed(lean_search, rows, repeat)
+        same = json.loads(pandas_body) == json.loads(lean_body)
+
+        print(f"{len(rows)}행  (응답 {len(lean_body) / 1024:.0f}KB, 결과 동일: {same})")
+        print(f"  pandas {pandas_s * 1000:8.1f}ms")
+        print(f"  lean   {lean_s * 1000:8.1f}ms  ({pandas_s / lean_s:.1f}배)")
+
+
+if __name__ == "__main__":
+    main()
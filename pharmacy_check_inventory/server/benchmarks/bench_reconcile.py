@@ -0,0 +1,172 @@
+"""
+전문약 재고 계산(tests/전문약/update_stock.py) 기존 방식 vs 벡터화 방식 비교 벤치마크
+
+- legacy: 칸마다 parse_number/normalize_code를 apply, merge 세 번 (기존 update_stock)
+- vector: stock_reconcile (고유값만 str.replace + to_numeric, categorical 키, 집계 후 merge 한 번)
+
+샘플 파일(tests/전문약)과, 여러 달 치를 이어 붙인 가상 조제판매 내역(1만 ~ 100만 줄)으로
+CSV 읽기부터 최종 재고 표까지의 시간을 재고 두 결과가 같은지 확인한다.
+가상 데이터에는 숫자로 읽을 수 없는 수량도 일부 섞어 둔다 (기존 방식의 칸별 출력은 버림).
+
+사용법 (server 폴더에서, DB 불필요):
+    python benchmarks/bench_reconcile.py [줄 수 ...]
+"""
+import contextlib
+import io
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from stock_reconcile import read_professional_files, reconcile_professional  # noqa: E402
+
+SAMPLE_DIR = Path(__file__).resolve().parents[3] / "tests" / "전문약"
+SAMPLE_FILES = ("약품 매입 현황.csv", "약품별조제판매현황.csv", "전문약 재고현황(필약국).csv")
+SIZES = [10_000, 100_000, 1_000_000]
+DRUGS = 3000
+
+
+def parse_number(x, column_name):
+    try:
+        if pd.isna(x) or str(x).strip() == '':
+            return 0.0
+        s = str(x).replace(',', '').strip()
+        return float(s)
+    except Exception as e:
+        print(f"Error parsing '{x}' in column '{column_name}': {e}")
+        return 0.0
+
+
+def legacy_update_stock(purchase_path, sales_path, stock_path):
+    # 기존 tests/전문약/update_stock.py 그대로 (CSV 저장만 제외)
+    purchase_df = pd.read_csv(purchase_path)
+    sales_df = pd.read_csv(sales_path)
+    stock_df = pd.read_csv(stock_path)
+
+    purchase_df['약 품 명'] = purchase_df['약 품 명'].fillna('').astype(str).str.strip()
+    sales_df['약품명'] = sales_df['약품명'].fillna('').astype(str).str.strip()
+    stock_df['약품명'] = stock_df['약품명'].fillna('').astype(str).str.strip()
+
+    purchase_df = purchase_df[~purchase_df['약 품 명'].str.isdigit()]
+    sales_df = sales_df[~sales_df['약품명'].str.isdigit()]
+    stock_df = stock_df[~stock_df['약품명'].str.isdigit()]
+
+    def normalize_code(x):
+        try:
+            if pd.isna(x) or str(x).strip() == '':
+                return ''
+            return str(int(float(str(x).replace(',', '').strip())))
+        except:  # noqa: E722
+            return str(x).strip()
+
+    sales_df['약품코드'] = sales_df['약품코드'].apply(normalize_code)
+    stock_df['약품코드'] = stock_df['약품코드'].apply(normalize_code)
+
+    stock_df = stock_df[['약품명', '약품코드', '개수']].copy()
+    stock_df['개수'] = stock_df['개수'].apply(lambda x: parse_number(x, '개수'))
+
+    purchase_df = purchase_df.rename(columns={'약 품 명': '약품명'})
+    purchase_df['수량'] = purchase_df['수량'].apply(lambda x: parse_number(x, '수량'))
+    purchase_summary = (
+        purchase_df.groupby('약품명')['수량'].sum().reset_index().rename(columns={'수량': '구매수량'})
+    )
+
+    sales_df['조제수량'] = sales_df['조제수량'].apply(lambda x: parse_number(x, '조제수량'))
+    sales_summary = (
+        sales_df.groupby(['약품명', '약품코드'])['조제수량'].sum().reset_index().rename(columns={'조제수량': '판매수량'})
+    )
+
+    stock_keys = stock_df[['약품명', '약품코드']].drop_duplicates()
+    sales_keys = sales_summary[['약품명', '약품코드']].drop_duplicates()
+    new_keys = sales_keys.merge(stock_keys, on=['약품명', '약품코드'], how='left', indicator=True)
+    new_keys = new_keys[new_keys['_merge'] == 'left_only'][['약품명', '약품코드']]
+    all_keys = pd.concat([stock_keys, new_keys], ignore_index=True)
+    all_keys = all_keys[all_keys['약품명'] != '']
+
+    merged = pd.merge(all_keys, stock_df, on=['약품명', '약품코드'], how='left')
+    merged['개수'] = merged['개수'].fillna(0)
+    merged = pd.merge(merged, purchase_summary, on='약품명', how='left')
+    merged['구매수량'] = merged['구매수량'].fillna(0)
+    merged = pd.merge(merged, sales_summary, on=['약품명', '약품코드'], how='left')
+    merged['판매수량'] = merged['판매수량'].fillna(0)
+    merged['최종재고'] = merged['개수'] + merged['구매수량'] - merged['판매수량']
+    return merged[['약품명', '약품코드', '개수', '구매수량', '판매수량', '최종재고']]
+
+
+def write_synthetic(directory, lines, seed=0):
+    # 재고현황 DRUGS개 중 일부 + 재고현황에 없는 약, 같은 약이 여러 날짜에 반복되는 조제/매입 내역
+    rng = random.Random(seed)
+    drugs = [(f"약품{i:05d}정{rng.choice(['5mg', '10mg', '20mg'])}(성분{i % 300:03d})_(1정)",
+              str(640000000 + i * 7)) for i in range(int(DRUGS * 1.1))]
+    stock_drugs = drugs[:DRUGS]
+
+    def amount(value):
+        return f"{value:,}"
+
+    stock_path = directory / "stock.csv"
+    pd.DataFrame({
+        "약품명": [name for name, _ in stock_drugs],
+        "약품코드": [code for _, code in stock_drugs],
+        "개수": [amount(rng.randrange(0, 3000)) for _ in stock_drugs],
+        "단가": "100",
+        "재고금액": "0",
+    }).to_csv(stock_path, index=False, encoding="utf-8-sig")
+
+    sales_rows = []
+    for i in range(lines):
+        name, code = drugs[rng.randrange(len(drugs))]
+        quantity = "확인필요" if i % 50_000 == 49_999 else amount(rng.randrange(1, 1500))
+        sales_rows.append((name, code, "백제약품(주)", "제약(주)", "0", "0", quantity))
+    sales_path = directory / "sales.csv"
+    pd.DataFrame(sales_rows, columns=["약품명", "약품코드", "거래처", "제약회사", "재고수량", "조제금액", "조제수량"]) \
+        .to_csv(sales_path, index=False, encoding="utf-8-sig")
+
+    purchase_rows = []
+    for i in range(max(lines // 10, 100)):
+        name, _ = stock_drugs[rng.randrange(len(stock_drugs))]
+        purchase_rows.append((20250101 + i % 28, name, "제약(주)", "지오영네트웍스(주)", "154", amount(rng.randrange(1, 1200)), "0"))
+    purchase_path = directory / "purchase.csv"
+    pd.DataFrame(purchase_rows, columns=["일 자", "약 품 명", "제조업체", "거래처명", "단 가", "수량", "금액"]) \
+        .to_csv(purchase_path, index=False, encoding="utf-8-sig")
+    return purchase_path, sales_path, stock_path
+
+
+def compare(label, purchase_path, sales_path, stock_path):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy = legacy_update_stock(purchase_path, sales_path, stock_path)
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frames = read_professional_files(purchase_path, sales_path, stock_path)
+    read_s = time.perf_counter() - start
+    result = reconcile_professional(*frames)
+    vector_s = time.perf_counter() - start
+
+    expected = legacy.reset_index(drop=True).astype({"약품명": object, "약품코드": object})
+    actual = result.table.astype({"약품명": object, "약품코드": object})
+    same = expected.equals(actual)
+
+    print(f"{label}  (약 {len(result.table)}종, 잘못된 값 {len(result.invalid)}칸, 결과 동일: {same})")
+    print(f"  legacy {legacy_s * 1000:9.1f}ms")
+    print(f"  vector {vector_s * 1000:9.1f}ms  ({legacy_s / vector_s:.1f}배, CSV 읽기 {read_s * 1000:.1f}ms 포함)")
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+
+    if all((SAMPLE_DIR / name).exists() for name in SAMPLE_FILES):
+        compare("샘플 파일", *(SAMPLE_DIR / name for name in SAMPLE_FILES))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for lines in sizes:
+            compare(f"조제판매 {lines}줄", *write_synthetic(Path(tmp), lines))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+/search SQL 검색 인덱스 벤치마크 (EXPLAIN ANALYZE로 확인)
+
+임시 스키마(bench_search)에 needs와 같은 구조의 테이블을 만들고 여러 약국의 가상 약 10만 행을 넣은 뒤,
+인덱스 없이 / migrations(001~003) 적용 후 각각 앱이 실제로 보내는 검색 SQL의 실행 계획과 시간을 비교한다.
+
+- 부분 일치:   /search?name=덱시부프로펜&limit=50        (ILIKE '%..%')
+- 유사도 검색: /search?name=덱시부프로팬&match=fuzzy     (오타, pg_trgm <%)
+- 코드 앞자리: /search?code=6586&match=fuzzy             (LIKE '6586%')
+
+사용법 (server 폴더에서, pg_trgm 확장을 쓸 수 있는 Postgres 필요):
+    DATABASE_URL=postgresql://... python benchmarks/bench_search_index.py [행 수] [약국 수]
+
+끝나면 bench_search 스키마를 지운다.
+"""
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import psycopg
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from inventory_query import (  # noqa: E402
+    DEFAULT_FIELDS,
+    SIMILARITY_THRESHOLD,
+    build_fuzzy_search_query,
+    build_search_query,
+)
+
+SCHEMA = "bench_search"
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+MIGRATIONS = ["001_needs_upsert_key.sql", "002_needs_search_order.sql", "003_needs_trgm_search.sql"]
+
+BRAND_SYLLABLES = "가나다라마바사아자차카타파하글로덱시모티스틴레진프솔론리온큐펜텍"
+FORMS = ["정", "캡슐", "서방정", "시럽", "연질캡슐", "주"]
+INGREDIENTS = [
+    "덱시부프로펜", "이부프로펜", "아세트아미노펜", "모사프리드시트르산염수화물", "레바미피드",
+    "메틸프레드니솔론", "수마트립탄숙신산염", "가바펜틴", "시메티딘", "히드로코르티손",
+    "암로디핀베실산염", "로수바스타틴칼슘", "메트포르민염산염", "세티리진염산염", "판토프라졸나트륨",
+    "에스오메프라졸마그네슘", "클로피도그렐황산수소염", "아토르바스타틴칼슘", "발사르탄", "텔미사르탄",
+]
+STRENGTHS = ["5mg", "10mg", "20mg", "50mg", "100mg", "200mg", "300mg", "500mg"]
+
+
+def make_name(rng):
+    brand = "".join(rng.choice(BRAND_SYLLABLES) for _ in range(rng.randint(2, 4)))
+    strength = rng.choice(STRENGTHS)
+    return f"{brand}{rng.choice(FORMS)}{strength}({rng.choice(INGREDIENTS)})_({strength}/1정)"
+
+
+def seed(conn, rows, tenants):
+    rng = random.Random(0)
+    conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    conn.execute(f"CREATE SCHEMA {SCHEMA}")
+    conn.execute(f"""
+        CREATE TABLE {SCHEMA}.needs (
+            id bigserial PRIMARY KEY,
+            user_id text NOT NULL,
+            type text NOT NULL,
+            drug_name text,
+            drug_code text,
+            present_count double precision,
+            need_count double precision,
+            location text,
+            unit_count double precision
+        )
+    """)
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY {SCHEMA}.needs (user_id, type, drug_name, drug_code, present_count, "
+                      f"need_count, location, unit_count) FROM STDIN") as copy:
+            for i in range(rows):
+                copy.write_row((
+                    f"pharmacy{i % tenants:03d}",
+                    "professional" if i % 3 else "general",
+                    make_name(rng),
+                    str(rng.randrange(640000000, 680000000)),
+                    float(rng.randrange(0, 500)),
+                    10.0,
+                    "미지정",
+                    1.0,
+                ))
+    conn.execute(f"ANALYZE {SCHEMA}.needs")
+
+
+def apply_migrations(conn):
+    # 마이그레이션 파일을 그대로 bench_search.needs에 적용 (search_path가 bench_search 우선)
+    for name in MIGRATIONS:
+        sql = (MIGRATIONS_DIR / name).read_text(encoding="utf-8")
+        for statement in sql.split(";"):
+            lines = [line for line in statement.splitlines() if not line.strip().startswith("--")]
+            statement = "\n".join(lines).strip()
+            if statement and statement.upper() not in ("BEGIN", "COMMIT"):
+                conn.execute(statement)
+    conn.execute(f"ANALYZE {SCHEMA}.needs")
+
+
+def plan_nodes(plan):
+    node = plan["Node Type"]
+    if "Index Name" in plan:
+        node += f" on {plan['Index Name']}"
+    nodes = [node]
+    for child in plan.get("Plans", []):
+        nodes += plan_nodes(child)
+    return nodes
+
+
+def explain(conn, sql, params):
+    with conn.transaction():
+        conn.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", (str(SIMILARITY_THRESHOLD),))
+        row = conn.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params).fetchone()
+        start = time.perf_counter()
+        result = conn.execute(sql, params).fetchall()
+        elapsed = time.perf_counter() - start
+    plan = row[0] if isinstance(row[0], list) else json.loads(row[0])
+    return plan[0], len(result), elapsed
+
+
+def queries(tenant):
+    fields = list(DEFAULT_FIELDS)
+    return [
+        ("부분 일치 '덱시부프로펜'",
+         build_search_query(tenant, "professional", "덱시부프로펜", "", fields, limit=51)),
+        ("유사도 '덱시부프로팬'(오타)",
+         build_fuzzy_search_query(tenant, "professional", "덱시부프로팬", "", fields, 50)),
+        ("유사도 '모사프리드'",
+         build_fuzzy_search_query(tenant, "professional", "모사프리드", "", fields, 50)),
+        ("코드 앞자리 '6586'",
+         build_fuzzy_search_query(tenant, "professional", "", "6586", fields, 50)),
+    ]
+
+
+def run(conn, label, tenant):
+    print(f"[{label}]")
+    for title, (sql, params) in queries(tenant):
+        plan, count, elapsed = explain(conn, sql, params)
+        nodes = plan_nodes(plan["Plan"])
+        uses_index = any(" on " in node and "pkey" not in node for node in nodes)
+        print(f"  {title}: {count}건, 실행 {plan['Execution Time']:.2f}ms (왕복 {elapsed * 1000:.2f}ms), "
+              f"인덱스 사용: {'예' if uses_index else '아니오'}")
+        print(f"    {' → '.join(nodes)}")
+
+
+def main():
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        sys.exit("DATABASE_URL이 설정되지 않았습니다.")
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    tenants = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with psycopg.connect(database_url, autocommit=True, prepare_threshold=None) as conn:
+        available = conn.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'").fetchone()
+        if not available:
+            sys.exit("이 Postgres에는 pg_trgm 확장이 없습니다. (contrib 패키지 필요)")
+
+        conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        search_path = conn.execute("SHOW search_path").fetchone()[0]
+        conn.execute(f"SET search_path = {SCHEMA}, {search_path}")
+        try:
+            seed(conn, rows, tenants)
+            print(f"{rows}행, 약국 {tenants}곳 (약국당 약 {rows // tenants}행)")
+            run(conn, "인덱스 없음", "pharmacy007")
+            apply_migrations(conn)
+            run(conn, "migrations 001~003 적용 후", "pharmacy007")
+        finally:
+            conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+
+
+if __name__ == "__main__":
+    main()
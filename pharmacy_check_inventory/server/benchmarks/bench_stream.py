@@ -0,0 +1,79 @@
+"""
+전체 목록 응답: 일반 JSON vs 스트리밍(JSON 배열 / NDJSON) 비교 벤치마크
+
+가상 약국(BENCH_USER)에 N행을 넣고 /search?name=all 을 세 방식으로 받아
+첫 바이트까지 걸린 시간(TTFB)과 전체 시간을 잰 뒤 데이터를 지운다.
+
+사용법 (server 폴더에서, 서버를 먼저 띄워 둔 상태로, httpx 필요: pip install -r requirements-dev.txt):
+    uvicorn main:app --port 8000
+    DATABASE_URL=postgresql://... python benchmarks/bench_stream.py [BASE_URL] [행 수]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+import psycopg
+
+BENCH_USER = "__bench_stream__"
+
+
+def seed(database_url, n):
+    with psycopg.connect(database_url, prepare_threshold=None) as conn:
+        conn.execute("DELETE FROM needs WHERE user_id = %s", (BENCH_USER,))
+        conn.execute("""
+            INSERT INTO needs (user_id, type, drug_name, drug_code, present_count, need_count, location, unit_count)
+            SELECT %s, 'professional', '약품' || lpad(i::text, 7, '0'), (100000000 + i)::text,
+                   (i %% 500)::float8, (i %% 50)::float8, '미지정', 1
+            FROM generate_series(1, %s) AS i
+        """, (BENCH_USER, n))
+
+
+def cleanup(database_url):
+    with psycopg.connect(database_url, prepare_threshold=None) as conn:
+        conn.execute("DELETE FROM needs WHERE user_id = %s", (BENCH_USER,))
+
+
+async def measure(client, params):
+    start = time.perf_counter()
+    ttfb = None
+    size = 0
+    async with client.stream("GET", "/search", params=params) as response:
+        async for chunk in response.aiter_bytes():
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            size += len(chunk)
+    return ttfb, time.perf_counter() - start, size
+
+
+async def run(base_url):
+    base = {"name": "all", "type": "professional", "user_id": BENCH_USER}
+    modes = [
+        ("buffered", base),
+        ("stream=json", {**base, "stream": "json"}),
+        ("stream=ndjson", {**base, "stream": "ndjson"}),
+    ]
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        for label, params in modes:
+            ttfb, total, size = await measure(client, params)
+            print(f"  {label:14s} TTFB {ttfb * 1000:8.1f}ms  전체 {total * 1000:8.1f}ms  {size / 1024 / 1024:.1f}MB")
+
+
+def main():
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        sys.exit("DATABASE_URL이 설정되지 않았습니다.")
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000"
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    seed(database_url, n)
+    try:
+        print(f"{n}행")
+        asyncio.run(run(base_url))
+    finally:
+        cleanup(database_url)
+
+
+if __name__ == "__main__":
+    main()
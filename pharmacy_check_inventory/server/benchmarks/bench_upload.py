@@ -0,0 +1,115 @@
+"""
+/upload-inventory 적재 방식 비교 벤치마크
+
+- legacy: 행마다 SELECT 후 UPDATE/INSERT (기존 방식)
+- bulk:   임시 테이블에 COPY로 적재 후 INSERT ... ON CONFLICT 한 번 (현재 방식)
+
+사용법 (server 폴더에서):
+    DATABASE_URL=postgresql://... python benchmarks/bench_upload.py
+
+모든 작업은 트랜잭션 안에서 실행한 뒤 ROLLBACK 하므로 DB에 데이터가 남지 않는다.
+needs 테이블과 migrations/001_needs_upsert_key.sql 이 적용되어 있어야 한다.
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import psycopg
+from psycopg.rows import dict_row
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from inventory_upload import (  # noqa: E402
+    DEFAULT_LOCATION,
+    DEFAULT_NEED_COUNT,
+    DEFAULT_UNIT_COUNT,
+    create_staging_table,
+    merge_staged,
+    prepare_upload_rows,
+    stage_rows,
+)
+
+TESTS_DIR = Path(__file__).resolve().parents[3] / "tests"
+BENCH_USER = "__bench_upload__"
+
+SAMPLES = [
+    ("general", TESTS_DIR / "일반약" / "일반약 재고현황_20250415.csv",
+     {"상품명": "약 이름", "바코드": "약 코드", "재고수량": "현재 재고"}, [1]),
+    ("professional", TESTS_DIR / "전문약" / "전문약 재고현황(필약국).csv",
+     {"약품명": "약 이름", "약품코드": "약 코드", "개수": "현재 재고"}, None),
+]
+
+
+def load_sample(path, columns, skiprows):
+    df = pd.read_csv(path, skiprows=skiprows).rename(columns=columns)
+    if "약 코드" not in df.columns:
+        df["약 코드"] = ""
+    df["현재 재고"] = pd.to_numeric(
+        df["현재 재고"].astype(str).str.replace(",", "", regex=False), errors="coerce"
+    )
+    return df
+
+
+async def legacy_upload(cur, med_type, rows):
+    for row in rows.itertuples(index=False):
+        await cur.execute("""
+            SELECT need_count, location, unit_count FROM needs
+            WHERE user_id = %s AND type = %s AND drug_name = %s AND drug_code = %s
+        """, (BENCH_USER, med_type, row.drug_name, row.drug_code))
+        if await cur.fetchone():
+            await cur.execute("""
+                UPDATE needs SET present_count = %s
+                WHERE user_id = %s AND type = %s AND drug_name = %s AND drug_code = %s
+            """, (row.present_count, BENCH_USER, med_type, row.drug_name, row.drug_code))
+        else:
+            await cur.execute("""
+                INSERT INTO needs (
+                    user_id, type, drug_name, drug_code,
+                    present_count, need_count, location, unit_count
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, (BENCH_USER, med_type, row.drug_name, row.drug_code, row.present_count,
+                  DEFAULT_NEED_COUNT, DEFAULT_LOCATION, DEFAULT_UNIT_COUNT))
+
+
+async def bulk_upload(cur, med_type, rows):
+    await create_staging_table(cur)
+    await stage_rows(cur, rows)
+    return await merge_staged(cur, BENCH_USER, med_type)
+
+
+async def timed(conn, fn, med_type, rows):
+    # 첫 업로드(전부 INSERT)와 재업로드(전부 UPDATE 대상)를 같은 트랜잭션에서 측정
+    timings = []
+    async with conn.cursor() as cur:
+        for _ in range(2):
+            start = time.perf_counter()
+            await fn(cur, med_type, rows)
+            timings.append(time.perf_counter() - start)
+    await conn.rollback()
+    return timings
+
+
+async def main():
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        sys.exit("DATABASE_URL이 설정되지 않았습니다.")
+
+    conn = await psycopg.AsyncConnection.connect(database_url, row_factory=dict_row, prepare_threshold=None)
+    try:
+        for med_type, path, columns, skiprows in SAMPLES:
+            rows = prepare_upload_rows(load_sample(path, columns, skiprows))
+            legacy = await timed(conn, legacy_upload, med_type, rows)
+            bulk = await timed(conn, bulk_upload, med_type, rows)
+
+            print(f"[{med_type}] {path.name}: {len(rows)}행")
+            print(f"  legacy  최초 {legacy[0]:.3f}s / 재업로드 {legacy[1]:.3f}s")
+            print(f"  bulk    최초 {bulk[0]:.3f}s / 재업로드 {bulk[1]:.3f}s")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
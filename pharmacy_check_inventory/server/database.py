@@ -1,7 +1,9 @@
 import os
+import time
+import weakref
 from dotenv import load_dotenv
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
 
 load_dotenv()  # .env 파일 로딩
 
@@ -10,4 +12,66 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL이 설정되지 않았습니다.")
 
-conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+# 커넥션 풀 설정 (환경 변수로 조정 가능)
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))            # 연결을 기다리는 최대 시간(초)
+POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "60"))          # 이 시간 넘게 쉰 연결은 빌려주기 전에 SELECT 1 확인 (여분 연결은 닫음)
+POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))  # 이 시간이 지난 연결은 닫고 새로 연결
+
+__all__ = ["pool", "PoolTimeout", "pool_stats"]
+
+_last_used = weakref.WeakKeyDictionary()  # conn -> 마지막 반납 시각
+
+
+async def _mark_returned(conn):
+    _last_used[conn] = time.monotonic()
+
+
+async def _check_if_idle(conn):
+    # 매번 확인하면 요청마다 pooler 왕복이 한 번 늘어나므로 오래 쉰 연결만 SELECT 1로 확인
+    # (실패하면 풀이 연결을 버리고 다른 연결을 줌)
+    last_used = _last_used.get(conn)
+    if last_used is not None and time.monotonic() - last_used <= POOL_MAX_IDLE:
+        return
+    await AsyncConnectionPool.check_connection(conn)
+
+
+# asyncio용 psycopg 3 커넥션 풀
+# - 연결을 기다리는 동안 이벤트 루프를 막지 않으므로 동시 처리량이 스레드 수가 아니라 풀 크기를 따라감
+# - 빌려줄 때 오래 쉰 연결은 끊기지 않았는지 확인하고, 반납할 때 끝나지 않은 트랜잭션은 풀이 롤백
+# - async with pool.connection() as conn: 블록이 정상 종료되면 커밋, 예외면 롤백 후 반납
+# - prepare_threshold=None: Supabase pooler(트랜잭션 모드)는 서버 측 prepared statement를 지원하지 않음
+# - 서버 시작 시 lifespan에서 await pool.open(), 종료 시 await pool.close()
+pool = AsyncConnectionPool(
+    DATABASE_URL,
+    min_size=POOL_MIN_SIZE,
+    max_size=POOL_MAX_SIZE,
+    timeout=POOL_TIMEOUT,
+    max_idle=POOL_MAX_IDLE,
+    max_lifetime=POOL_MAX_LIFETIME,
+    kwargs={"row_factory": dict_row, "prepare_threshold": None},
+    check=_check_if_idle,
+    reset=_mark_returned,
+    open=False,
+)
+
+
+def pool_stats() -> dict:
+    """풀 사용량 지표 (/stats 응답용)"""
+    stats = pool.get_stats()
+    size = stats.get("pool_size", 0)
+    idle = stats.get("pool_available", 0)
+    checkouts = stats.get("requests_num", 0)
+    wait_ms = stats.get("requests_wait_ms", 0)
+    return {
+        "size": size,
+        "max_size": pool.max_size,
+        "idle": idle,
+        "in_use": size - idle,
+        "waiting": stats.get("requests_waiting", 0),
+        "checkouts": checkouts,
+        "checkout_ms_avg": round(wait_ms / checkouts, 3) if checkouts else 0.0,
+        "timeouts": stats.get("requests_errors", 0),
+        "recycled": stats.get("connections_lost", 0),
+    }
@@ -0,0 +1,268 @@
+"""
+판매 내역으로 약별 필요 재고(needs.need_count) 계산 (migrations/008_demand_forecast.sql)
+
+재고 원장(stock_ledger.py)에 쌓인 판매 줄을 하루 판매량으로 바꿔 약별 지수 평활 평균/분산을 갱신하고
+필요 재고 = ceil(평균 × (배송 일수 + 주문 주기) + 안전 계수 × 표준편차 × √(배송 일수 + 주문 주기))
+- 증분 계산: 약국/약종마다 반영한 마지막 날(through_date)을 저장해 두고 그 다음 날부터만 더함
+  (지수 평활은 약마다 평균/분산 두 값만 있으면 이어서 계산할 수 있으므로 이전 판매 줄을 다시 읽지 않음)
+- 판매상세내역(날짜별 줄): 마지막 내보내기의 종료일 전날까지만 (종료일 당일은 내보낸 뒤 판매가 더 있을 수 있음)
+- 약품별조제판매현황(기간 합계): 합계를 기간의 날수로 나눠 하루 판매량으로 (더 긴 기간으로 교체되면 새 날만 더함)
+- 판매가 없는 날은 0으로 평활하므로 안 팔리는 약은 점점 줄어듦
+- 계산은 (약 × 날짜) 배열 연산으로 약 전체를 한 번에, 필요 재고는 UPDATE 한 번으로 needs에 반영
+
+사용법 (server 폴더에서):
+    DATABASE_URL=... python demand_forecast.py <user_id> <general|professional> [--apply]
+    (--apply 없이 실행하면 계산한 필요 재고만 저장하고 needs는 바꾸지 않음)
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from database import pool
+from pos_export import EXPORT_SPECS
+
+logger = logging.getLogger(__name__)
+
+# 수요 예측 설정 (환경 변수로 조정 가능)
+DEMAND_SMOOTHING_DAYS = float(os.getenv("DEMAND_SMOOTHING_DAYS", "28"))  # 지수 평활 기간 (α = 2 / (기간 + 1))
+DEMAND_LEAD_DAYS = float(os.getenv("DEMAND_LEAD_DAYS", "1"))            # 주문 후 입고까지 일수
+DEMAND_REVIEW_DAYS = float(os.getenv("DEMAND_REVIEW_DAYS", "7"))        # 주문 주기 (다음 주문까지 버틸 일수)
+DEMAND_SAFETY_Z = float(os.getenv("DEMAND_SAFETY_Z", "1.65"))           # 안전 재고 계수 (1.65 ≈ 품절 없이 95%)
+
+ALPHA = 2 / (DEMAND_SMOOTHING_DAYS + 1)
+
+# 판매 내역 형식이 있는 약 종류 (API는 그 밖의 type을 400으로 거절)
+FORECAST_TYPES = sorted(med_type for med_type, kind in EXPORT_SPECS if kind == "sales")
+
+
+class ForecastError(ValueError):
+    """계산할 판매 내역이 아직 없음 (HTTP 409로 응답)"""
+
+
+# 마지막으로 반영한 날 이후에 걸친 판매 줄을 약/기간별로 합산
+# - 날짜별 내역은 [판매일, 판매일], 기간 합계 보고서는 파일의 [시작일, 종료일]
+SALES_SQL = """
+    SELECT l.drug_name, l.drug_code, sum(l.quantity) AS quantity,
+           CASE WHEN %(report)s THEN f.period_start ELSE l.line_date END AS span_start,
+           CASE WHEN %(report)s THEN f.period_end ELSE l.line_date END AS span_end
+    FROM stock_ledger_lines l
+    JOIN stock_ledger_files f ON f.id = l.file_id
+    WHERE l.user_id = %(user_id)s AND l.type = %(type)s AND l.kind = 'sales'
+      AND (%(through)s::date IS NULL OR l.line_date > %(through)s::date)
+    GROUP BY 1, 2, 4, 5
+"""
+
+# 평활 결과 저장 (약 전체를 한 문장으로)
+UPSERT_SQL = """
+    INSERT INTO demand_forecasts AS d (user_id, type, drug_name, drug_code, daily_mean, daily_var, reorder_point)
+    SELECT %(user_id)s, %(type)s, u.drug_name, u.drug_code, u.daily_mean, u.daily_var, u.reorder_point
+    FROM unnest(%(names)s::text[], %(codes)s::text[], %(means)s::float8[], %(vars)s::float8[], %(points)s::float8[])
+        AS u(drug_name, drug_code, daily_mean, daily_var, reorder_point)
+    ON CONFLICT (user_id, type, drug_name, drug_code) DO UPDATE SET
+        daily_mean = EXCLUDED.daily_mean,
+        daily_var = EXCLUDED.daily_var,
+        reorder_point = EXCLUDED.reorder_point,
+        updated_at = now()
+"""
+
+# 계산한 필요 재고 → needs.need_count (UPDATE 한 번)
+# - 코드가 있는 예측은 이름과 코드가 같은 행, 코드 없는 예측(일반약 판매 내역)은 이름이 같은 행
+# - 반환: 바뀐 약과 이전/새 필요 재고
+APPLY_SQL = """
+    WITH matched AS (
+        SELECT DISTINCT ON (n.id) n.id, n.need_count AS before, f.reorder_point, f.daily_mean
+        FROM demand_forecasts f
+        JOIN needs n ON n.user_id = f.user_id AND n.type = f.type AND n.drug_name = f.drug_name
+                    AND (f.drug_code = '' OR n.drug_code = f.drug_code)
+        WHERE f.user_id = %(user_id)s AND f.type = %(type)s
+        ORDER BY n.id, f.drug_code DESC
+    )
+    UPDATE needs n SET need_count = m.reorder_point
+    FROM matched m
+    WHERE n.id = m.id AND n.need_count IS DISTINCT FROM m.reorder_point
+    RETURNING n.drug_name, n.drug_code, m.before, m.reorder_point AS after, m.daily_mean
+"""
+
+
+def daily_matrix(drug_index, span_start, span_end, quantity, first_day, days: int, drugs: int) -> np.ndarray:
+    """
+    판매 줄 → (약 × 날짜) 하루 판매량 배열 (날짜 0 = first_day)
+    - 줄의 수량을 [span_start, span_end]의 날수로 고르게 나누고, first_day ~ first_day + days - 1 밖의 날은 버림
+    - 날짜 구간을 차분 배열에 더한 뒤 누적합 (줄마다 반복하지 않음)
+    """
+    start = (span_start - first_day).astype(np.int64)
+    end = (span_end - first_day).astype(np.int64) + 1
+    per_day = quantity / (end - start)
+    start, end = np.clip(start, 0, days), np.clip(end, 0, days)
+    keep = end > start
+
+    diff = np.zeros((drugs, days + 1))
+    np.add.at(diff, (drug_index[keep], start[keep]), per_day[keep])
+    np.add.at(diff, (drug_index[keep], end[keep]), -per_day[keep])
+    return np.cumsum(diff[:, :-1], axis=1)
+
+
+def smooth(mean: np.ndarray, var: np.ndarray, daily: np.ndarray, alpha: float = ALPHA):
+    """
+    지수 평활 평균/분산을 날짜 순서로 갱신 (날짜마다 약 전체를 배열 연산 한 번으로)
+    - mean/var: 약별 이전 값 (처음이면 0), daily: (약 × 새 날짜) 하루 판매량
+    """
+    for quantity in daily.T:
+        diff = quantity - mean
+        mean = mean + alpha * diff
+        var = (1 - alpha) * (var + alpha * diff * diff)
+    return mean, var
+
+
+def reorder_points(mean: np.ndarray, var: np.ndarray, days: int, alpha: float = ALPHA) -> np.ndarray:
+    """
+    평활 평균/분산 → 필요 재고 (개수, 올림)
+    - 0에서 시작한 평활값은 반영한 날이 적을수록 작으므로 1 - (1 - α)^days로 나눠 보정
+    """
+    weight = 1 - (1 - alpha) ** days if days else 1.0
+    horizon = DEMAND_LEAD_DAYS + DEMAND_REVIEW_DAYS
+    demand = mean / weight * horizon
+    safety = DEMAND_SAFETY_Z * np.sqrt(np.maximum(var / weight, 0) * horizon)
+    return np.maximum(np.ceil(demand + safety - 1e-9), 0)
+
+
+async def _last_complete_day(cur, user_id: str, med_type: str, report: bool):
+    # 반영할 수 있는 마지막 날: 합계 보고서는 종료일, 날짜별 내역은 종료일 전날
+    await cur.execute("""
+        SELECT max(period_end) AS period_end FROM stock_ledger_files
+        WHERE user_id = %s AND type = %s AND kind = 'sales' AND superseded_by IS NULL
+    """, (user_id, med_type))
+    period_end = (await cur.fetchone())["period_end"]
+    if period_end is None:
+        return None
+    return period_end if report else period_end - datetime.timedelta(days=1)
+
+
+async def update_forecast(conn, user_id: str, med_type: str, apply: bool = False) -> dict:
+    """
+    마지막으로 반영한 날 이후의 판매 내역만 더해 약별 예측과 필요 재고를 갱신 (한 트랜잭션)
+    - apply=True면 계산한 필요 재고를 needs.need_count에 반영하고 바뀐 약을 changes로 반환
+    - 새로 반영할 날이 없으면 status "up_to_date" (apply=True면 저장된 예측으로 needs만 다시 맞춤)
+    """
+    if med_type not in FORECAST_TYPES:
+        raise ValueError(f"지원하지 않는 약 종류입니다: {med_type}")
+    report = EXPORT_SPECS[(med_type, "sales")].date is None
+    params = {"user_id": user_id, "type": med_type, "report": report}
+
+    try:
+        async with conn.cursor() as cur:
+            # 같은 약국/약종의 예측 갱신은 한 번에 하나씩
+            await cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"demand_forecast:{user_id}:{med_type}",))
+            await cur.execute("""
+                SELECT through_date, days FROM demand_forecast_state WHERE user_id = %s AND type = %s
+            """, (user_id, med_type))
+            state = await cur.fetchone()
+            through, days = (state["through_date"], state["days"]) if state else (None, 0)
+
+            last_day = await _last_complete_day(cur, user_id, med_type, report)
+            if last_day is None:
+                raise ForecastError("반영한 판매 내역이 없습니다. 판매 파일을 먼저 /reconcile-stock 으로 올려주세요.")
+
+            folded = 0
+            if through is None or last_day > through:
+                await cur.execute(SALES_SQL, {**params, "through": through})
+                sales = pd.DataFrame(await cur.fetchall(),
+                                     columns=["drug_name", "drug_code", "quantity", "span_start", "span_end"])
+                if through is None:
+                    through = sales["span_start"].min() - datetime.timedelta(days=1) if len(sales) else last_day
+                folded = max((last_day - through).days, 0)
+
+            if folded:
+                await cur.execute("""
+                    SELECT drug_name, drug_code, daily_mean, daily_var FROM demand_forecasts
+                    WHERE user_id = %s AND type = %s
+                """, (user_id, med_type))
+                known = pd.DataFrame(await cur.fetchall(), columns=["drug_name", "drug_code", "daily_mean", "daily_var"])
+
+                # 이미 예측이 있는 약 + 새로 팔린 약을 한 배열로
+                keys = pd.concat([known[["drug_name", "drug_code"]], sales[["drug_name", "drug_code"]]])
+                codes, uniques = pd.factorize(pd.MultiIndex.from_frame(keys))
+                drugs = len(uniques)
+                mean, var = np.zeros(drugs), np.zeros(drugs)
+                mean[codes[:len(known)]] = known["daily_mean"].to_numpy(dtype=float)
+                var[codes[:len(known)]] = known["daily_var"].to_numpy(dtype=float)
+
+                first_day = np.datetime64(through + datetime.timedelta(days=1), "D")
+                daily = daily_matrix(
+                    codes[len(known):],
+                    sales["span_start"].to_numpy(dtype="datetime64[D]"),
+                    sales["span_end"].to_numpy(dtype="datetime64[D]"),
+                    sales["quantity"].to_numpy(dtype=float),
+                    first_day, folded, drugs,
+                )
+                mean, var = smooth(mean, var, daily)
+                days += folded
+                points = reorder_points(mean, var, days)
+
+                await cur.execute(UPSERT_SQL, {**params, "names": uniques.get_level_values(0).tolist(),
+                                               "codes": uniques.get_level_values(1).tolist(), "means": mean.tolist(),
+                                               "vars": var.tolist(), "points": points.tolist()})
+                await cur.execute("""
+                    INSERT INTO demand_forecast_state (user_id, type, through_date, days) VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (user_id, type) DO UPDATE SET
+                        through_date = EXCLUDED.through_date, days = EXCLUDED.days, updated_at = now()
+                """, (user_id, med_type, last_day, days))
+                through = last_day
+
+            changes = []
+            if apply:
+                await cur.execute(APPLY_SQL, params)
+                changes = await cur.fetchall()
+            await cur.execute("SELECT count(*) AS drugs FROM demand_forecasts WHERE user_id = %s AND type = %s",
+                              (user_id, med_type))
+            drug_count = (await cur.fetchone())["drugs"]
+        await conn.commit()
+    except Exception:
+        await conn.rollback()
+        raise
+
+    logger.info(f"📈 수요 예측: {user_id}/{med_type} {folded}일 반영 (~{through}), 약 {drug_count}개, "
+                f"필요 재고 변경 {len(changes)}건")
+    return {
+        "status": "updated" if folded else "up_to_date",
+        "through": through.isoformat() if through else None,
+        "folded_days": folded,
+        "days": days,
+        "drugs": drug_count,
+        "changes": changes,
+    }
+
+
+async def _main(args):
+    await pool.open()
+    try:
+        async with pool.connection() as conn:
+            result = await update_forecast(conn, args.user_id, args.type, apply=args.apply)
+    finally:
+        await pool.close()
+
+    changes = result.pop("changes")
+    print(result)
+    for row in changes[:20]:
+        before = "없음" if row["before"] is None or math.isnan(row["before"]) else f"{row['before']:g}"
+        print(f"  {row['drug_name']} ({row['drug_code']}): {before} → {row['after']:g} (하루 {row['daily_mean']:.2f})")
+    if len(changes) > 20:
+        print(f"  ... 외 {len(changes) - 20}개")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="판매 내역으로 약별 필요 재고 계산")
+    parser.add_argument("user_id")
+    parser.add_argument("type", choices=FORECAST_TYPES)
+    parser.add_argument("--apply", action="store_true", help="계산한 필요 재고를 needs에 반영")
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except ForecastError as e:
+        sys.exit(f"❌ {e}")
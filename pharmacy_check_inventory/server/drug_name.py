@@ -0,0 +1,87 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# 약 이름 분해 결과
+# - brand: 제품명 (함량/괄호 앞부분, 예: 인데놀정)
+# - ingredient: 성분명 (첫 번째 괄호, 복합제는 "-"로 연결, 공백 제거)
+# - strength/strength_unit: 함량 (mg 기준으로 환산, 농도는 %, 용량은 mL)
+DrugNameParts = namedtuple("DrugNameParts", ["brand", "ingredient", "strength", "strength_unit"])
+
+# 함량 단위 → (정규화 단위, 배수)
+UNITS = {
+    "mg": ("mg", 1.0), "㎎": ("mg", 1.0), "밀리그램": ("mg", 1.0), "밀리그람": ("mg", 1.0),
+    "g": ("mg", 1000.0), "그램": ("mg", 1000.0), "그람": ("mg", 1000.0),
+    "mcg": ("mg", 0.001), "μg": ("mg", 0.001), "µg": ("mg", 0.001), "㎍": ("mg", 0.001), "마이크로그램": ("mg", 0.001),
+    "ml": ("mL", 1.0), "mL": ("mL", 1.0), "㎖": ("mL", 1.0), "밀리리터": ("mL", 1.0),
+    "%": ("%", 1.0),
+    "iu": ("IU", 1.0), "IU": ("IU", 1.0), "단위": ("IU", 1.0),
+}
+_UNIT_PATTERN = "|".join(sorted((re.escape(u) for u in UNITS), key=len, reverse=True))
+STRENGTH_RE = re.compile(rf"(\d+(?:\.\d+)?)\s*({_UNIT_PATTERN})", re.IGNORECASE)
+
+# 제품명 끝의 규격 "_(0.1g/1정)", "_(20mL)"
+SPEC_RE = re.compile(r"_\(([^()]*)\)\s*$")
+# 1정/1캡슐/1포 등 한 단위당 함량인 규격
+PER_UNIT_RE = re.compile(r"^\s*1\s*[가-힣]+\s*$")
+# 성분이 아닌 괄호 (수출명, 1회용 등)
+NOT_INGREDIENT_RE = re.compile(r"^(수출명|\d+회용)")
+
+
+def parse_strength(text: str):
+    """'15mg', '0.1g', '5%' 같은 함량 문자열 → (값, 단위), 해석할 수 없으면 (None, None)"""
+    match = STRENGTH_RE.search(text or "")
+    if not match:
+        return None, None
+    value, unit = match.groups()
+    unit, factor = UNITS.get(unit, UNITS.get(unit.lower(), (None, None)))
+    if unit is None:
+        return None, None
+    return round(float(value) * factor, 6), unit
+
+
+def normalize_ingredient(text: str) -> str:
+    # 성분 검색용: 공백 제거, 소문자 (영문 성분명)
+    return re.sub(r"\s+", "", text or "").lower()
+
+
+@lru_cache(maxsize=65536)
+def parse_drug_name(name: str) -> DrugNameParts:
+    """
+    POS 약품명을 제품명/성분/함량으로 분해 (업로드 시 한 번만)
+    예) 인데놀정10mg(프로프라놀롤염산염)_(10mg/1정) → 인데놀정, 프로프라놀롤염산염, 10.0, mg
+        레바진정(레바미피드)_(0.1g/1정)           → 레바진정, 레바미피드, 100.0, mg (규격에서)
+        겐트리손크림_(20g)                        → 겐트리손크림, None, None, None
+    """
+    if not isinstance(name, str) or not name.strip():
+        return DrugNameParts(None, None, None, None)
+
+    text = name.strip()
+    spec = None
+    spec_match = SPEC_RE.search(text)
+    if spec_match:
+        spec = spec_match.group(1)
+        text = text[:spec_match.start()]
+
+    # 첫 괄호 앞 = 제품명(+함량), 괄호들 중 성분으로 보이는 첫 번째 = 성분
+    head, _, rest = text.partition("(")
+    ingredient = None
+    for group in re.findall(r"\(([^()]*)\)", "(" + rest if rest else ""):
+        if group and not NOT_INGREDIENT_RE.match(group):
+            ingredient = normalize_ingredient(group)
+            break
+
+    # 제품명 안의 함량(마지막 것)을 우선, 없으면 한 단위당 규격(0.1g/1정)에서
+    strength, unit = None, None
+    brand = head.strip()
+    matches = list(STRENGTH_RE.finditer(head))
+    if matches:
+        last = matches[-1]
+        strength, unit = parse_strength(last.group(0))
+        brand = (head[:last.start()] + head[last.end():]).strip() or brand
+    elif spec and "/" in spec:
+        amount, per = spec.split("/", 1)
+        if PER_UNIT_RE.match(per):
+            strength, unit = parse_strength(amount)
+
+    return DrugNameParts(brand or None, ingredient or None, strength, unit)
@@ -0,0 +1,79 @@
+import codecs
+import csv
+from collections import namedtuple
+
+# 파일 앞부분 시그니처
+OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"   # 진짜 .xls (BIFF, Composite Document)
+ZIP_MAGIC = b"PK\x03\x04"                          # .xlsx (Office Open XML)
+
+# 형식 판별에 사용할 앞부분 크기
+SNIFF_BYTES = 64 * 1024
+
+CSV_DELIMITERS = ",\t;|"
+
+# kind: "xls" | "xlsx" | "html" | "csv"
+# encoding/delimiter: 텍스트 형식(html, csv)일 때만 사용
+FileFormat = namedtuple("FileFormat", ["kind", "encoding", "delimiter"])
+
+
+def detect_encoding(head: bytes) -> str:
+    """BOM → UTF-8 → CP949 순서로 텍스트 인코딩 판별 (POS 내보내기는 대부분 CP949 또는 UTF-8 BOM)"""
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith(codecs.BOM_UTF16_LE) or head.startswith(codecs.BOM_UTF16_BE):
+        return "utf-16"
+
+    for encoding in ("utf-8", "cp949"):
+        # 앞부분만 잘라 왔으므로 마지막 글자가 잘려 있어도 오류로 보지 않음 (final=False)
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            decoder.decode(head, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "utf-8"
+
+
+def _sniff_delimiter(text: str):
+    lines = [line for line in text.splitlines() if line.strip()][:20]
+    if not lines:
+        return None
+    try:
+        return csv.Sniffer().sniff("\n".join(lines), delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        # 요약 행 때문에 열 개수가 들쭉날쭉하면 Sniffer가 실패하므로 헤더 줄 기준으로 판단
+        counts = {d: lines[0].count(d) for d in CSV_DELIMITERS}
+        delimiter = max(counts, key=counts.get)
+        return delimiter if counts[delimiter] > 0 else None
+
+
+def sniff_format(head: bytes):
+    """
+    파일 앞부분(head)만 보고 형식을 판별 (확장자는 믿지 않음)
+    - POS의 .xls는 실제로 OLE2 엑셀, HTML 표, CSV 중 하나일 수 있음
+    - 판별할 수 없으면 None
+    """
+    if head.startswith(OLE2_MAGIC):
+        return FileFormat("xls", None, None)
+    if head.startswith(ZIP_MAGIC):
+        return FileFormat("xlsx", None, None)
+
+    encoding = detect_encoding(head)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+    text = decoder.decode(head, final=False)
+
+    # 태그로 시작하면 HTML 표 (<html>, <table>, <meta> 등 POS마다 시작 태그가 다름)
+    if text.lstrip().startswith("<"):
+        return FileFormat("html", encoding, None)
+
+    delimiter = _sniff_delimiter(text)
+    if delimiter is None:
+        return None
+    return FileFormat("csv", encoding, delimiter)
+
+
+def sniff_file(fileobj):
+    """파일 객체의 앞부분을 읽어 형식을 판별하고 읽기 위치를 처음으로 되돌림"""
+    head = fileobj.read(SNIFF_BYTES)
+    fileobj.seek(0)
+    return sniff_format(head)
@@ -0,0 +1,182 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi.concurrency import run_in_threadpool
+
+from database import pool
+
+# 캐시 설정 (환경 변수로 조정 가능)
+CACHE_MAX_MB = float(os.getenv("INVENTORY_CACHE_MAX_MB", "64"))  # 전체 캐시 메모리 상한
+CACHE_TTL = float(os.getenv("INVENTORY_CACHE_TTL", "300"))        # 스냅샷 유효 시간(초)
+DERIVED_MAX_TENANTS = 128  # 스냅샷에서 만든 파생 구조(자동완성 색인 등)를 종류별로 유지할 약국 수
+
+
+def _estimate_size(rows) -> int:
+    # 대략적인 메모리 사용량 (컬럼 이름 문자열은 행끼리 공유되므로 제외)
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        for value in row.values():
+            size += sys.getsizeof(value)
+    return size
+
+
+class InventoryCache:
+    """
+    (user_id, type)별 needs 스냅샷을 프로세스 메모리에 보관하는 LRU 캐시
+    - 전체 크기가 max_bytes를 넘으면 가장 오래 안 쓴 스냅샷부터 제거
+    - ttl초가 지난 스냅샷은 다시 DB에서 읽음 (다른 워커 프로세스의 수정 반영)
+    - 쓰기 API는 커밋 후 invalidate()를 호출해야 함
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (rows, size, loaded_at)
+        self._generations = {}         # key -> 무효화 횟수 (읽는 중에 무효화되면 저장하지 않기 위함)
+        self._bytes = 0
+        self._listeners = []           # 무효화될 때 함께 호출할 함수들 (파생 색인 정리용)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[2] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def generation(self, key) -> int:
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def put(self, key, rows, generation: int):
+        size = _estimate_size(rows)
+        with self._lock:
+            # 읽는 동안 쓰기가 있었으면 오래된 스냅샷이므로 버림
+            if self._generations.get(key, 0) != generation or size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (rows, size, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def on_invalidate(self, callback):
+        """invalidate(user_id, med_type)가 호출될 때 callback(user_id, med_type)도 호출"""
+        self._listeners.append(callback)
+
+    def invalidate(self, user_id: str, med_type: str):
+        key = (user_id, med_type)
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if key in self._entries:
+                self._remove(key)
+            self.invalidations += 1
+        for callback in self._listeners:
+            callback(user_id, med_type)
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+inventory_cache = InventoryCache(max_bytes=int(CACHE_MAX_MB * 1024 * 1024), ttl=CACHE_TTL)
+
+
+async def fetch_inventory(user_id: str, med_type: str) -> list:
+    """
+    (user_id, type)의 needs 전체 행을 반환 (캐시에 없을 때만 DB 조회)
+    - 반환된 리스트/딕셔너리는 캐시와 공유되므로 수정하지 말 것
+    """
+    key = (user_id, med_type)
+    rows = inventory_cache.get(key)
+    if rows is not None:
+        return rows
+
+    generation = inventory_cache.generation(key)
+    async with pool.connection() as conn:
+        cur = await conn.execute("""
+            SELECT * FROM needs
+            WHERE user_id = %s AND type = %s
+        """, (user_id, med_type))
+        rows = await cur.fetchall()
+
+    inventory_cache.put(key, rows, generation)
+    return rows
+
+
+class SnapshotDerivedCache:
+    """
+    (user_id, type)별로 재고 스냅샷에서 만든 파생 구조 보관 (자동완성 색인, 주문 계획 열 배열, 재고 부족 투영)
+    - 처음 조회할 때 캐시된 재고 스냅샷으로 build(rows)를 실행해 생성
+    - 스냅샷이 바뀌면(업로드/수정으로 무효화, TTL 만료) 다음 조회 때 다시 생성
+    - inventory_cache가 무효화되면 함께 정리 (on_invalidate)
+    """
+
+    def __init__(self, build, max_tenants: int = DERIVED_MAX_TENANTS):
+        self.build = build
+        self.max_tenants = max_tenants
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (스냅샷 rows, 파생 구조)
+        self.builds = 0
+        inventory_cache.on_invalidate(self.invalidate)
+
+    async def get(self, user_id: str, med_type: str):
+        key = (user_id, med_type)
+        rows = await fetch_inventory(user_id, med_type)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is rows:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        # 행 수에 비례하는 CPU 작업이므로 이벤트 루프를 막지 않도록 워커 스레드에서
+        derived = await run_in_threadpool(self.build, rows)
+
+        with self._lock:
+            self._entries[key] = (rows, derived)
+            self._entries.move_to_end(key)
+            self.builds += 1
+            while len(self._entries) > self.max_tenants:
+                self._entries.popitem(last=False)
+        return derived
+
+    def invalidate(self, user_id: str, med_type: str):
+        with self._lock:
+            self._entries.pop((user_id, med_type), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "builds": self.builds}
@@ -0,0 +1,204 @@
+import base64
+import json
+import math
+import os
+
+from drug_name import normalize_ingredient, parse_strength
+
+# /search 응답 열 → SQL 식 (순서가 기본 응답 열 순서)
+# 통 수는 통당 수량이 0이면 계산하지 않음 (NULL → "NaN")
+# 재고 열이 integer인 DB에서도 정수 나눗셈이 되지 않도록 float8로 (캐시 경로 inventory_rows와 같은 값)
+SEARCH_FIELDS = {
+    "id": "id",
+    "user_id": "user_id",
+    "type": "type",
+    "약 이름": "drug_name",
+    "약 코드": "drug_code",
+    "현재 재고": "present_count",
+    "필요 재고": "need_count",
+    "위치": "location",
+    "통당 수량": "unit_count",
+    "필요 통 수": "need_count::float8 / NULLIF(unit_count, 0)",
+    "현재 통 수": "present_count::float8 / NULLIF(unit_count, 0)",
+    "주문 통 수": "need_count::float8 / NULLIF(unit_count, 0) - present_count::float8 / NULLIF(unit_count, 0)",
+    "제품명": "drug_brand",
+    "성분": "drug_ingredient",
+    "함량": "drug_strength",
+    "함량 단위": "drug_strength_unit",
+    "거래처": "supplier",
+    "주문 배수": "order_multiple",
+}
+
+# fields를 주지 않았을 때의 응답 열 (약 이름에서 분해한 열, 주문 계획 열은 요청할 때만)
+DEFAULT_FIELDS = list(SEARCH_FIELDS)[:12]
+PARSED_FIELDS = list(SEARCH_FIELDS)[12:16]
+ORDER_FIELDS = list(SEARCH_FIELDS)[16:]
+
+# 페이지 크기 상한
+MAX_PAGE_SIZE = 1000
+
+# 유사도 검색(match=fuzzy) 설정: 검색어가 약 이름 일부와 이 값 이상 비슷하면 결과에 포함 (0~1, pg_trgm word_similarity)
+SIMILARITY_THRESHOLD = float(os.getenv("SEARCH_SIMILARITY_THRESHOLD", "0.4"))
+FUZZY_DEFAULT_LIMIT = 50
+
+
+class QueryError(ValueError):
+    """잘못된 fields/cursor 값 (HTTP 400으로 응답)"""
+
+
+def parse_fields(fields) -> list:
+    """쉼표로 구분된 응답 열 목록을 검사해서 리스트로 (없으면 기본 열)"""
+    if not fields:
+        return list(DEFAULT_FIELDS)
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in SEARCH_FIELDS]
+    if unknown:
+        raise QueryError(f"알 수 없는 열: {', '.join(unknown)} (가능한 열: {', '.join(SEARCH_FIELDS)})")
+    return list(dict.fromkeys(selected))
+
+
+def encode_cursor(name: str, code: str) -> str:
+    raw = json.dumps([name, code], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """encode_cursor의 반대, 변조되었거나 [약 이름, 약 코드] 모양이 아니면 QueryError (SQL 비교 전에 걸러냄)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value = json.loads(raw.decode("utf-8"))
+    except Exception:
+        raise QueryError("잘못된 cursor 값입니다.")
+    if not (isinstance(value, list) and len(value) == 2
+            and all(part is None or isinstance(part, str) for part in value)):
+        raise QueryError("잘못된 cursor 값입니다.")
+    name, code = value
+    return name, code
+
+
+def _escape_like(keyword: str) -> str:
+    return keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def parse_strength_query(strength: str):
+    """?strength= 값 → (값, 단위), 단위가 없으면 mg로 봄 ("15", "15mg", "0.015g" → (15.0, "mg"))"""
+    value, unit = parse_strength(strength)
+    if value is None:
+        try:
+            value, unit = float(strength), "mg"
+        except ValueError:
+            raise QueryError(f"함량을 해석할 수 없습니다: {strength} (예: 15mg, 0.1g, 5%)")
+    return value, unit
+
+
+def build_search_query(user_id: str, med_type: str, name: str, code: str,
+                       fields: list, descending: bool = False, after=None, limit=None,
+                       ingredient: str = None, strength=None):
+    """
+    /search 조회 SQL과 파라미터를 만듦
+    - name/code: 대소문자 무시 부분 일치 ("all"이면 전체)
+    - ingredient: 성분 부분 일치, strength=(값, 단위): 함량 일치 (업로드 때 분해해 둔 열, 인덱스 검색)
+    - 정렬은 (약 이름, 약 코드)를 바이트 순서(COLLATE "C")로 → 파이썬 문자열 정렬과 같은 순서
+    - after=(약 이름, 약 코드): 그 다음 행부터 (키셋 페이지네이션)
+    - 키셋 비교를 위해 약 이름/약 코드는 fields에 없어도 항상 조회 (_name, _code)
+    """
+    select = [f'{SEARCH_FIELDS[f]} AS "{f}"' for f in fields]
+    select += ['drug_name AS "_name"', 'drug_code AS "_code"']
+
+    where = ["user_id = %s", "type = %s"]
+    params = [user_id, med_type]
+    if name == "all" or code == "all":
+        pass
+    elif name:
+        where.append("drug_name ILIKE %s")
+        params.append(f"%{_escape_like(name)}%")
+    elif code:
+        where.append("drug_code ILIKE %s")
+        params.append(f"%{_escape_like(code)}%")
+
+    if ingredient:
+        where.append("drug_ingredient ILIKE %s")
+        params.append(f"%{_escape_like(normalize_ingredient(ingredient))}%")
+    if strength is not None:
+        where.append("drug_strength_unit = %s AND drug_strength = %s")
+        params.extend([strength[1], strength[0]])
+
+    if after is not None:
+        op = "<" if descending else ">"
+        where.append(f'(drug_name COLLATE "C", drug_code COLLATE "C") {op} (%s, %s)')
+        params.extend(after)
+
+    direction = "DESC" if descending else "ASC"
+    sql = f"""
+        SELECT {", ".join(select)}
+        FROM needs
+        WHERE {" AND ".join(where)}
+        ORDER BY drug_name COLLATE "C" {direction}, drug_code COLLATE "C" {direction}
+    """
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+
+def build_fuzzy_search_query(user_id: str, med_type: str, name: str, code: str,
+                             fields: list, limit: int):
+    """
+    /search?match=fuzzy 조회 SQL과 파라미터 (migrations/003_needs_trgm_search.sql 필요)
+    - name: 부분 일치하는 약을 먼저, 그 다음 오타/일부 성분명이 비슷한 약을 유사도 순으로
+      (pg_trgm 트라이그램 GIN 인덱스로 ILIKE와 <% 모두 인덱스 검색)
+    - code: 앞부분 일치 (바코드/보험코드 앞자리 입력, text_pattern_ops 인덱스)
+    - 실행 전에 set_config로 유사도 기준(SIMILARITY_THRESHOLD)을 트랜잭션 안에서만 설정해야 함
+    """
+    select = [f'{SEARCH_FIELDS[f]} AS "{f}"' for f in fields]
+
+    if name:
+        sql = f"""
+            SELECT {", ".join(select)}
+            FROM needs
+            WHERE user_id = %s AND type = %s
+              AND (drug_name ILIKE %s OR %s::text <%% drug_name)
+            ORDER BY drug_name ILIKE %s DESC, word_similarity(%s::text, drug_name) DESC,
+                     drug_name COLLATE "C", drug_code COLLATE "C"
+            LIMIT %s
+        """
+        pattern = f"%{_escape_like(name)}%"
+        params = [user_id, med_type, pattern, name, pattern, name, limit]
+    else:
+        sql = f"""
+            SELECT {", ".join(select)}
+            FROM needs
+            WHERE user_id = %s AND type = %s AND drug_code LIKE %s
+            ORDER BY drug_code, drug_name COLLATE "C"
+            LIMIT %s
+        """
+        params = [user_id, med_type, f"{_escape_like(code)}%", limit]
+    return sql, params
+
+
+def build_low_stock_query(user_id: str, med_type: str, margin: float):
+    """
+    /low-stock 조회 SQL과 파라미터 (부족상태 분류를 SQL에서)
+    - 심각: 현재 재고 < 필요 재고, 주의: 현재 재고 < 필요 재고 + margin (값이 없으면 제외)
+    - 조건을 여유분(현재 재고 - 필요 재고) 식으로 써서 migrations/009 인덱스로 부족한 약만 읽음
+    """
+    select = [f'{SEARCH_FIELDS[f]} AS "{f}"' for f in DEFAULT_FIELDS]
+    select.append("CASE WHEN present_count - need_count < 0 THEN '심각' ELSE '주의' END AS \"부족상태\"")
+    sql = f"""
+        SELECT {", ".join(select)}
+        FROM needs
+        WHERE user_id = %s AND type = %s AND present_count - need_count < %s
+        ORDER BY drug_name COLLATE "C", drug_code COLLATE "C"
+    """
+    return sql, [user_id, med_type, margin]
+
+
+def to_output_row(row: dict, fields: list) -> dict:
+    """DB 행을 응답 행으로 (빈 값/NaN은 기존 응답과 같이 "NaN")"""
+    out = {}
+    for f in fields:
+        value = row[f]
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            value = "NaN"
+        out[f] = value
+    return out
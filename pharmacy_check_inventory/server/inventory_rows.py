@@ -0,0 +1,114 @@
+import json
+import math
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json으로 (결과는 같고 느림)
+    orjson = None
+
+# needs 컬럼 → 응답 열 이름 (나머지 컬럼은 이름 그대로)
+OUTPUT_NAMES = {
+    "drug_name": "약 이름",
+    "drug_code": "약 코드",
+    "present_count": "현재 재고",
+    "need_count": "필요 재고",
+    "location": "위치",
+    "unit_count": "통당 수량",
+}
+
+# 약 이름에서 분해한 열: fields로 요청할 때만 응답에 포함 (기본 응답 모양 유지)
+PARSED_NAMES = {
+    "drug_brand": "제품명",
+    "drug_ingredient": "성분",
+    "drug_strength": "함량",
+    "drug_strength_unit": "함량 단위",
+}
+
+# 주문 계획 열 (migrations/007): fields로 요청할 때만 응답에 포함
+ORDER_NAMES = {
+    "supplier": "거래처",
+    "order_multiple": "주문 배수",
+}
+
+
+def _fill(value):
+    # 기존 응답의 fillna("NaN")과 같게: 빈 값/NaN → "NaN"
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    return value
+
+
+def _ratio(a, b):
+    # 통 수 계산: 값이 없거나 통당 수량이 0이면 "NaN"
+    if a is None or b is None:
+        return None
+    try:
+        result = a / b
+    except (ZeroDivisionError, TypeError):
+        return None
+    if math.isnan(result) or math.isinf(result):
+        return None
+    return result
+
+
+def to_output_rows(rows, statuses=None, parsed: bool = False, order: bool = False) -> list:
+    """
+    캐시된 needs 행(dict)을 응답 행으로 변환 (DataFrame 없이 한 번 순회)
+    - 열 이름 변경, 필요 통 수/현재 통 수/주문 통 수 계산, 빈 값은 "NaN"
+    - statuses가 있으면 같은 순서로 "부족상태" 열 추가
+    - parsed=True면 제품명/성분/함량 열도 포함, order=True면 거래처/주문 배수 열도 포함
+    """
+    names = {**OUTPUT_NAMES, **(PARSED_NAMES if parsed else {}), **(ORDER_NAMES if order else {})}
+    hidden = {**({} if parsed else PARSED_NAMES), **({} if order else ORDER_NAMES)}
+    out = []
+    for i, row in enumerate(rows):
+        item = {
+            names.get(key, key): _fill(value)
+            for key, value in row.items()
+            if key not in hidden
+        }
+
+        unit = row.get("unit_count")
+        need_units = _ratio(row.get("need_count"), unit)
+        present_units = _ratio(row.get("present_count"), unit)
+        item["필요 통 수"] = _fill(need_units)
+        item["현재 통 수"] = _fill(present_units)
+        item["주문 통 수"] = _fill(None if need_units is None or present_units is None else need_units - present_units)
+
+        if statuses is not None:
+            item["부족상태"] = statuses[i]
+        out.append(item)
+    return out
+
+
+def _sort_key(item):
+    # 약 이름 → 약 코드 순, 빈 값("NaN")은 뒤로 (DataFrame.sort_values와 같은 순서)
+    name, code = item.get("약 이름"), item.get("약 코드")
+    return (name == "NaN", str(name), code == "NaN", str(code))
+
+
+def sort_output_rows(items: list, descending: bool = False) -> list:
+    if not descending:
+        items.sort(key=_sort_key)
+        return items
+    # 역순이어도 빈 값은 뒤로: 뒤쪽 기준부터 안정 정렬을 반복
+    items.sort(key=lambda item: str(item.get("약 코드")), reverse=True)
+    items.sort(key=lambda item: item.get("약 코드") == "NaN")
+    items.sort(key=lambda item: str(item.get("약 이름")), reverse=True)
+    items.sort(key=lambda item: item.get("약 이름") == "NaN")
+    return items
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson으로 직렬화하는 JSONResponse (설치되어 있지 않으면 표준 json)"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,47 @@
+import os
+
+from fastapi.responses import StreamingResponse
+
+from database import pool
+from inventory_query import to_output_row
+from inventory_rows import dumps
+
+# 서버 측 커서에서 한 번에 가져올 행 수
+STREAM_BATCH_ROWS = int(os.getenv("STREAM_BATCH_ROWS", "1000"))
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+
+async def _stream_rows(sql: str, params, fields: list, fmt: str):
+    # 응답을 보내는 동안만 연결을 빌림 (클라이언트가 끊으면 커서/트랜잭션도 정리됨)
+    async with pool.connection() as conn:
+        async with conn.cursor(name="inventory_stream") as cur:
+            await cur.execute(sql, params)
+            if fmt == "json":
+                yield b"["
+            first = True
+            while True:
+                rows = await cur.fetchmany(STREAM_BATCH_ROWS)
+                if not rows:
+                    break
+                lines = [dumps(to_output_row(row, fields)) for row in rows]
+                if fmt == "ndjson":
+                    yield b"\n".join(lines) + b"\n"
+                else:
+                    yield (b"" if first else b",") + b",".join(lines)
+                first = False
+            if fmt == "json":
+                yield b"]"
+
+
+def stream_query(sql: str, params, fields: list, fmt: str) -> StreamingResponse:
+    """
+    조회 결과를 서버 측(named) 커서에서 STREAM_BATCH_ROWS행씩 읽어 바로 내보내는 응답
+    - fmt="json": 하나의 JSON 배열을 조각으로 나눠 전송 (일반 응답과 같은 모양)
+    - fmt="ndjson": 한 줄에 한 행
+    - 전체 목록을 메모리에 모으지 않으므로 약 수가 많아도 메모리 사용량이 일정
+    """
+    return StreamingResponse(_stream_rows(sql, params, fields, fmt), media_type=MEDIA_TYPES[fmt])
@@ -0,0 +1,362 @@
+import io
+import logging
+import os
+import re
+
+import pandas as pd
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from drug_name import parse_drug_name
+from file_format import sniff_file
+from parse_cache import file_digest, parse_cache
+
+logger = logging.getLogger(__name__)
+
+# 신규 약 기본값 (업로드 시 처음 들어오는 약에만 적용)
+DEFAULT_NEED_COUNT = 10
+DEFAULT_LOCATION = "미지정"
+DEFAULT_UNIT_COUNT = 1
+
+# CSV를 한 번에 읽어 들일 행 수 (이 단위로 파싱 → 적재를 반복)
+UPLOAD_CHUNK_ROWS = int(os.getenv("UPLOAD_CHUNK_ROWS", "5000"))
+
+# POS 내보내기 파일의 열 이름 → 공통 열 이름
+COLUMN_MAPS = {
+    "general": {
+        "상품명": "약 이름",
+        "바코드": "약 코드",
+        "재고수량": "현재 재고"
+    },
+    "professional": {
+        "약품명": "약 이름",
+        "약품코드": "약 코드",
+        "재고합계": "현재 재고"
+    },
+}
+
+# 정수로 읽히는 약 코드 ("8806123456789", "8806123456789.0", "644,309,090")
+NUMERIC_CODE_RE = re.compile(r"[0-9][0-9,]*(?:\.0*)?")
+
+
+class UploadParseError(ValueError):
+    """업로드 파일을 읽을 수 없을 때 (HTTP 400으로 응답)"""
+
+
+def read_whole(fileobj, fmt) -> pd.DataFrame:
+    """
+    엑셀/HTML은 점진적 파싱이 안 되므로 한 번에 읽음
+    같은 파일을 다시 읽을 때는 파싱 결과 캐시(parse_cache)에서 바로 가져옴 (read_html이 가장 느린 단계)
+    """
+    if not parse_cache.enabled:
+        return _parse_whole(fileobj, fmt)
+
+    key = parse_cache.key(file_digest(fileobj), f"{fmt.kind}:{fmt.encoding}")
+    df = parse_cache.get(key)
+    if df is None:
+        df = _parse_whole(fileobj, fmt)
+        parse_cache.put(key, df)
+    return df
+
+
+def _parse_whole(fileobj, fmt) -> pd.DataFrame:
+    try:
+        if fmt.kind == "xls":
+            return pd.read_excel(fileobj, engine="xlrd", dtype=str)
+        if fmt.kind == "xlsx":
+            return pd.read_excel(fileobj, engine="openpyxl", dtype=str)
+        html = fileobj.read().decode(fmt.encoding, errors="ignore")
+        return pd.read_html(io.StringIO(html))[0]
+    except Exception as e:
+        raise UploadParseError(f"{fmt.kind} 파일 파싱 실패: {e}") from e
+
+
+def _read_csv_chunks(fileobj, fmt, med_type: str):
+    # 업로드 파일을 통째로 메모리에 올리지 않고 UPLOAD_CHUNK_ROWS행씩 읽음
+    # 약 코드는 묶음마다 int/float로 다르게 추론되지 않도록 원문 문자열 그대로 읽음 (엑셀 경로와 동일)
+    text_stream = io.TextIOWrapper(fileobj, encoding=fmt.encoding, errors="replace", newline="")
+    skiprows = [1] if med_type == "general" else None  # 일반약은 두 번째 줄이 합계 행
+    code_column = "바코드" if med_type == "general" else "약품코드"
+    try:
+        yield from pd.read_csv(
+            text_stream,
+            sep=fmt.delimiter,
+            skiprows=skiprows,
+            dtype={code_column: str},
+            chunksize=UPLOAD_CHUNK_ROWS
+        )
+    finally:
+        # 래퍼가 닫히거나 GC될 때 업로드 파일까지 닫지 않도록 분리 (pos_export.read_export와 같음)
+        text_stream.detach()
+
+
+def _normalize_chunk(df: pd.DataFrame, med_type: str) -> pd.DataFrame:
+    df = df.rename(columns=COLUMN_MAPS["general" if med_type == "general" else "professional"])
+
+    missing = [col for col in ("약 이름", "약 코드") if col not in df.columns]
+    if missing:
+        raise UploadParseError(f"필수 열이 없습니다: {', '.join(missing)}")
+
+    # 현재 재고 숫자화
+    try:
+        df["현재 재고"] = df["현재 재고"].astype(str).str.replace(",", "", regex=False).astype(float)
+    except:
+        df["현재 재고"] = 0.0
+    return df
+
+
+def read_upload_chunks(fileobj, extension: str, med_type: str):
+    """
+    업로드 파일을 DataFrame 묶음 단위로 읽음 ("약 이름", "약 코드", "현재 재고" 열로 정리됨)
+    - 확장자가 아니라 파일 앞부분(시그니처, 태그, 구분자, 인코딩)으로 형식을 판별해서 바로 해당 파서로 보냄
+    - csv: chunksize로 나눠서 점진적으로 파싱
+    - xls/xlsx/html: 한 번에 파싱한 뒤 같은 크기로 나눠서 반환
+    """
+    if extension not in ["csv", "xls", "xlsx"]:
+        logger.warning(f"❌ 지원되지 않는 파일 형식: {extension}")
+        raise UploadParseError("지원하지 않는 파일 형식입니다. csv, xls, xlsx만 가능합니다.")
+
+    fmt = sniff_file(fileobj)
+    if fmt is None:
+        raise UploadParseError("파일 형식을 판별할 수 없습니다. (엑셀, HTML 표, CSV가 아님)")
+    logger.info(f"🔎 파일 형식 판별: {fmt.kind} (인코딩: {fmt.encoding}, 구분자: {fmt.delimiter!r})")
+
+    if fmt.kind == "csv":
+        chunks = _read_csv_chunks(fileobj, fmt, med_type)
+    else:
+        df = read_whole(fileobj, fmt)
+        chunks = (df.iloc[i:i + UPLOAD_CHUNK_ROWS] for i in range(0, len(df), UPLOAD_CHUNK_ROWS))
+
+    try:
+        for chunk in chunks:
+            yield _normalize_chunk(chunk, med_type)
+    except UploadParseError:
+        raise
+    except Exception as e:
+        raise UploadParseError(str(e)) from e
+
+
+def normalize_upload_codes(codes: pd.Series) -> pd.Series:
+    """
+    업로드 약 코드 → needs.drug_code 저장 형식
+    - 정수로 읽히는 코드는 정수 문자열 ("8806123456789.0", "0644309090" → 정수 부분, 앞의 0 제거)
+      예전 업로드는 열 타입을 추론해서 str()로 저장했으므로(빈 칸이 있는 열은 float → ".0") 그 결과와 맞춤,
+      이미 저장된 ".0" 코드는 migrations/010에서 같은 형식으로 바꿈
+    - 빈 코드는 기존과 같은 "nan", 나머지는 앞뒤 공백만 제거
+    """
+    text = codes.map(str).str.strip()
+    numeric = text.str.fullmatch(NUMERIC_CODE_RE.pattern)
+    digits = text[numeric].str.replace(r",|\.0*$", "", regex=True).str.lstrip("0")
+    text[numeric] = digits.where(digits != "", "0")
+    return text
+
+
+def prepare_upload_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    파싱된 업로드 DataFrame("약 이름", "약 코드", "현재 재고")을 needs 컬럼 이름으로 정리
+    - 약 이름이 비어 있는 행(합계/요약 행)은 제외
+    - 약 코드는 파일 형식(CSV 문자열, 엑셀/HTML 숫자)과 상관없이 같은 형식으로 (normalize_upload_codes)
+    """
+    names = df["약 이름"]
+    keep = names.notna() & (names.astype(str).str.strip() != "")
+
+    rows = pd.DataFrame({
+        "drug_name": names[keep].astype(str),
+        "drug_code": normalize_upload_codes(df.loc[keep, "약 코드"]),
+        "present_count": df.loc[keep, "현재 재고"].astype(float),
+    })
+    return rows.reset_index(drop=True)
+
+
+async def create_staging_table(cur):
+    # 트랜잭션이 끝나면 자동으로 사라지는 임시 테이블 (pooler 트랜잭션 모드에서도 안전)
+    await cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS needs_upload (
+            ord integer,
+            drug_name text,
+            drug_code text,
+            present_count double precision,
+            drug_brand text,
+            drug_ingredient text,
+            drug_strength double precision,
+            drug_strength_unit text
+        ) ON COMMIT DROP
+    """)
+
+
+async def stage_rows(cur, rows: pd.DataFrame, start: int = 0) -> int:
+    """
+    정리된 행들을 임시 테이블에 COPY로 적재
+    - ord: 파일 내 순서 (같은 약이 여러 번 나오면 마지막 행을 사용하기 위함)
+    - 약 이름은 여기서 한 번 제품명/성분/함량으로 분해 (신규 약 삽입 시 함께 저장)
+    - 적재한 행 수를 반환
+    """
+    if rows.empty:
+        return 0
+
+    values = [
+        (ord_, name, code, count, *parse_drug_name(name))
+        for ord_, name, code, count in zip(
+            range(start, start + len(rows)),
+            rows["drug_name"],
+            rows["drug_code"],
+            rows["present_count"],
+        )
+    ]
+    async with cur.copy("""
+        COPY needs_upload (
+            ord, drug_name, drug_code, present_count,
+            drug_brand, drug_ingredient, drug_strength, drug_strength_unit
+        ) FROM STDIN
+    """) as copy:
+        for value in values:
+            await copy.write_row(value)
+    return len(values)
+
+
+async def merge_staged(cur, user_id: str, med_type: str) -> dict:
+    """
+    임시 테이블의 내용을 needs에 한 번에 병합
+    - 기존 약: present_count만 갱신 (값이 같으면 건드리지 않음)
+    - 신규 약: 기본 필요 재고/위치/통당 수량과 분해된 제품명/성분/함량으로 삽입
+    - 삽입/갱신/변경 없음 건수를 반환
+    """
+    await cur.execute("""
+        WITH src AS (
+            SELECT DISTINCT ON (drug_name, drug_code)
+                drug_name, drug_code, present_count,
+                drug_brand, drug_ingredient, drug_strength, drug_strength_unit
+            FROM needs_upload
+            ORDER BY drug_name, drug_code, ord DESC
+        ), merged AS (
+            INSERT INTO needs (
+                user_id, type, drug_name, drug_code,
+                present_count, need_count, location, unit_count,
+                drug_brand, drug_ingredient, drug_strength, drug_strength_unit
+            )
+            SELECT %s, %s, drug_name, drug_code, present_count, %s, %s, %s,
+                drug_brand, drug_ingredient, drug_strength, drug_strength_unit
+            FROM src
+            ON CONFLICT (user_id, type, drug_name, drug_code)
+            DO UPDATE SET present_count = EXCLUDED.present_count
+            WHERE needs.present_count IS DISTINCT FROM EXCLUDED.present_count
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT
+            (SELECT count(*) FROM src) AS total,
+            count(*) FILTER (WHERE inserted) AS inserted,
+            count(*) FILTER (WHERE NOT inserted) AS updated
+        FROM merged
+    """, (user_id, med_type, DEFAULT_NEED_COUNT, DEFAULT_LOCATION, DEFAULT_UNIT_COUNT))
+    result = await cur.fetchone()
+
+    total, inserted, updated = result["total"], result["inserted"], result["updated"]
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": total - inserted - updated,
+    }
+
+
+def row_fingerprints(names, codes, counts):
+    """(약 이름, 약 코드, 현재 재고) 행마다 64비트 지문 (업로드 행과 저장된 행을 같은 방식으로 계산)"""
+    frame = pd.DataFrame({
+        "drug_name": pd.Series(names, dtype=object),
+        "drug_code": pd.Series(codes, dtype=object),
+        "present_count": pd.Series(counts, dtype=float),
+    })
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+async def load_snapshot(cur, user_id: str, med_type: str) -> dict:
+    """저장된 재고: (약 이름, 약 코드) → (행 지문, 현재 재고)"""
+    await cur.execute("""
+        SELECT drug_name, drug_code, present_count FROM needs
+        WHERE user_id = %s AND type = %s
+    """, (user_id, med_type))
+    rows = await cur.fetchall()
+    if not rows:
+        return {}
+
+    names = [row["drug_name"] for row in rows]
+    codes = [row["drug_code"] for row in rows]
+    counts = [row["present_count"] for row in rows]
+    fingerprints = row_fingerprints(names, codes, counts)
+    return {
+        key: (fp, count)
+        for key, fp, count in zip(zip(names, codes), fingerprints, counts)
+    }
+
+
+def _select_changed(chunk: pd.DataFrame, snapshot: dict, staged_keys: set, seen: set) -> pd.DataFrame:
+    # 신규 약, 지문이 바뀐 약, 그리고 파일 안에서 중복된 약(마지막 행이 이기도록)만 골라냄
+    rows = prepare_upload_rows(chunk)
+    fingerprints = row_fingerprints(rows["drug_name"], rows["drug_code"], rows["present_count"])
+
+    changed = []
+    for key, fp in zip(zip(rows["drug_name"], rows["drug_code"]), fingerprints):
+        stored = snapshot.get(key)
+        is_changed = key in staged_keys or stored is None or stored[0] != fp
+        if is_changed:
+            staged_keys.add(key)
+        changed.append(is_changed)
+        seen.add(key)
+    return rows[changed]
+
+
+async def ingest_upload(conn, user_id: str, med_type: str, fileobj, extension: str,
+                        remove_missing: bool = False) -> dict:
+    """
+    업로드 파일을 묶음 단위로 파싱하면서 저장된 재고와 비교해 바뀐 행만 임시 테이블에 적재하고, 마지막에 한 번에 병합
+    - 저장된 재고는 같은 트랜잭션에서 한 번만 읽음 (다른 워커의 캐시가 오래됐어도 정확하게 비교)
+    - 바뀐 행이 없으면 임시 테이블도 만들지 않음 → 같은 파일 재업로드는 읽기 1번, 쓰기 0번
+    - remove_missing=True면 파일에 없는 기존 약의 현재 재고를 0으로 맞춤
+    - 전체가 한 트랜잭션이므로 중간에 파싱 오류가 나면 아무것도 반영되지 않음
+    - 파싱/비교(CPU 작업)는 워커 스레드에서, DB 작업은 이벤트 루프에서 실행
+    """
+    try:
+        async with conn.cursor() as cur:
+            snapshot = await load_snapshot(cur, user_id, med_type)
+
+            seen = set()          # 파일에 나온 약
+            staged_keys = set()   # 임시 테이블에 한 번이라도 올린 약
+            staged = 0
+
+            async def stage(rows):
+                nonlocal staged
+                if rows.empty:
+                    return
+                if staged == 0:
+                    await create_staging_table(cur)
+                staged += await stage_rows(cur, rows, start=staged)
+
+            async for chunk in iterate_in_threadpool(read_upload_chunks(fileobj, extension, med_type)):
+                await stage(await run_in_threadpool(_select_changed, chunk, snapshot, staged_keys, seen))
+
+            missing = [key for key in snapshot if key not in seen]
+            zeroed = 0
+            if remove_missing:
+                to_zero = [key for key in missing if snapshot[key][1] != 0]
+                zeroed = len(to_zero)
+                await stage(pd.DataFrame({
+                    "drug_name": [name for name, _ in to_zero],
+                    "drug_code": [code for _, code in to_zero],
+                    "present_count": [0.0] * zeroed,
+                }))
+
+            if staged:
+                merged = await merge_staged(cur, user_id, med_type)
+                inserted, updated = merged["inserted"], merged["updated"] - zeroed
+            else:
+                inserted, updated = 0, 0
+        await conn.commit()
+    except Exception:
+        await conn.rollback()
+        raise
+
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": len(seen) - inserted - updated,
+        "missing": len(missing),
+        "zeroed": zeroed,
+    }
@@ -0,0 +1,41 @@
+"""
+재고 부족 목록(GET /low-stock)의 미리 계산한 투영
+
+캐시된 재고 스냅샷마다 한 번, 필요 재고와 현재 재고가 모두 있는 약을 여유분(현재 재고 - 필요 재고) 순으로 정렬해 둠
+- 심각: 여유분 < 0, 주의: 0 ≤ 여유분 < margin → margin이 얼마든 부족한 약은 정렬된 배열의 앞부분
+- 요청마다 searchsorted로 경계만 찾고 그 앞의 약만 응답 행으로 변환 (전체 약 수가 아니라 부족한 약 수에 비례)
+- /upload-inventory, /update-info 등 쓰기 API가 재고 캐시를 무효화하면 다음 조회 때 새 스냅샷으로 다시 만듦
+"""
+from collections import namedtuple
+from operator import itemgetter
+
+import numpy as np
+
+from inventory_cache import SnapshotDerivedCache
+from inventory_rows import to_output_rows, sort_output_rows
+
+# gaps: 여유분 오름차순 배열, rows: 같은 순서의 needs 행 (여유분을 계산할 수 없는 약은 제외)
+LowStockProjection = namedtuple("LowStockProjection", ["gaps", "rows"])
+
+
+def build_projection(rows) -> LowStockProjection:
+    """캐시된 needs 행(dict) 목록 → LowStockProjection (None → NaN은 비교 결과가 False라 제외)"""
+    present = np.array(list(map(itemgetter("present_count"), rows)), dtype=float)
+    need = np.array(list(map(itemgetter("need_count"), rows)), dtype=float)
+    gaps = present - need
+    index = np.flatnonzero(~np.isnan(gaps))
+    index = index[np.argsort(gaps[index], kind="stable")]
+    return LowStockProjection(gaps=gaps[index], rows=[rows[i] for i in index.tolist()])
+
+
+def low_stock_rows(projection: LowStockProjection, margin: float) -> list:
+    """부족한 약(현재 재고 < 필요 재고 + margin)만 응답 행으로, 약 이름 → 약 코드 순"""
+    count = int(np.searchsorted(projection.gaps, margin, side="left"))
+    if not count:
+        return []
+    statuses = np.where(projection.gaps[:count] < 0, "심각", "주의").tolist()
+    return sort_output_rows(to_output_rows(projection.rows[:count], statuses=statuses))
+
+
+# (user_id, type)별 LowStockProjection (재고 스냅샷이 바뀌면 다음 조회 때 다시 생성)
+low_stock_cache = SnapshotDerivedCache(build_projection)
@@ -0,0 +1,202 @@
+"""
+재고 부족 목록 실시간 알림 (GET /low-stock/events, Server-Sent Events)
+
+구독한 클라이언트에게 처음 한 번 전체 부족 목록(snapshot)을 보내고, 그 뒤로는 바뀐 약만(diff) 보냄
+- entered: 새로 심각/주의가 된 약, left: 더 이상 부족하지 않은 약(약 이름/약 코드), changed: 부족상태나 재고 등이 바뀐 약
+- 업로드/수정 API가 재고 캐시를 무효화하면(inventory_cache.on_invalidate) 해당 약국을 구독 중일 때만 다시 계산
+  (짧은 시간에 여러 번 바뀌면 LOW_STOCK_PUSH_DEBOUNCE초 동안 모아서 한 번)
+- 다른 워커 프로세스의 수정은 무효화 알림이 오지 않으므로 LOW_STOCK_PUSH_RECHECK초마다 스냅샷을 확인 (캐시 TTL이 지나면 다시 읽음)
+- 연결 유지를 위해 LOW_STOCK_PUSH_HEARTBEAT초마다 주석 줄 전송
+"""
+import asyncio
+import itertools
+import logging
+import os
+from collections import defaultdict
+
+from fastapi.responses import StreamingResponse
+
+from inventory_cache import inventory_cache
+from inventory_rows import dumps
+from low_stock import low_stock_cache, low_stock_rows
+
+logger = logging.getLogger(__name__)
+
+# 알림 설정 (환경 변수로 조정 가능)
+PUSH_DEBOUNCE = float(os.getenv("LOW_STOCK_PUSH_DEBOUNCE", "0.2"))     # 변경을 모으는 시간(초)
+PUSH_RECHECK = float(os.getenv("LOW_STOCK_PUSH_RECHECK", "30"))        # 무효화 알림이 없어도 스냅샷을 확인하는 간격(초)
+PUSH_HEARTBEAT = float(os.getenv("LOW_STOCK_PUSH_HEARTBEAT", "15"))    # 연결 유지용 주석 줄 간격(초)
+PUSH_QUEUE_SIZE = 32  # 구독자별로 쌓아 둘 이벤트 수 (넘치면 쌓인 이벤트를 버리고 전체 목록을 다시 보냄)
+
+# SSE 응답이 프록시에서 모였다가 나가지 않도록
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _row_key(item: dict):
+    return item.get("약 이름"), item.get("약 코드")
+
+
+def diff_rows(before: dict, items: list):
+    """이전에 보낸 목록({(약 이름, 약 코드): 행}) → 새 목록과의 차이 (entered, changed, left, 새 목록 dict)"""
+    after = {_row_key(item): item for item in items}
+    entered, changed = [], []
+    for key, item in after.items():
+        previous = before.get(key)
+        if previous is None:
+            entered.append(item)
+        elif previous != item:
+            changed.append(item)
+    left = [{"약 이름": name, "약 코드": code} for name, code in before.keys() - after.keys()]
+    return entered, changed, left, after
+
+
+class _Subscriber:
+    def __init__(self, margin: float):
+        self.margin = margin
+        self.queue = asyncio.Queue(PUSH_QUEUE_SIZE)
+        self.sent = {}          # 마지막으로 보낸 목록 {(약 이름, 약 코드): 행}
+        self.projection = None  # sent를 만든 투영 (같은 투영이면 다시 비교하지 않음)
+
+    def push(self, event: str, payload: dict):
+        try:
+            self.queue.put_nowait((event, payload))
+        except asyncio.QueueFull:
+            # 클라이언트가 받지 못하고 밀려 있으면 쌓인 diff 대신 전체 목록을 다시 보냄
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(("snapshot", {"items": list(self.sent.values())}))
+
+
+class LowStockHub:
+    """
+    (user_id, type)별 구독자와 변경 감시 작업
+    - 구독자가 있는 약국마다 작업 하나가 변경 알림을 기다렸다가 새 투영(low_stock.LowStockProjection)과 비교
+    - 구독자마다 마지막으로 본 투영과 같으면(같은 스냅샷) 아무것도 보내지 않음
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)   # key -> {_Subscriber}
+        self._changed = {}                     # key -> asyncio.Event (무효화 알림)
+        self._tasks = {}                       # key -> 감시 작업
+        self._generations = defaultdict(int)   # key -> 받은 무효화 알림 수 (구독 중에 온 알림 확인용)
+        self._loop = None
+        self._ids = itertools.count(1)
+        self.events_sent = 0
+
+    def notify(self, user_id: str, med_type: str):
+        # inventory_cache.invalidate에서 호출 (구독자가 없으면 아무것도 하지 않음, 워커 스레드에서 불려도 안전하게)
+        key = (user_id, med_type)
+        if key in self._changed and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._mark_changed, key)
+
+    def _mark_changed(self, key):
+        changed = self._changed.get(key)
+        if changed is not None:
+            self._generations[key] += 1
+            changed.set()
+
+    async def subscribe(self, user_id: str, med_type: str, margin: float) -> _Subscriber:
+        """
+        처음 보낼 전체 목록을 만들고 구독자로 등록
+        - 감시 작업(무효화 알림)을 먼저 등록한 뒤 스냅샷을 읽으므로, 그 사이에 온 무효화도 놓치지 않음
+          (등록 후 알림 수가 바뀌었으면 감시 작업을 다시 깨워 새 투영과의 차이를 보냄)
+        """
+        key = (user_id, med_type)
+        self._loop = asyncio.get_running_loop()
+        if key not in self._tasks:
+            self._changed[key] = asyncio.Event()
+            self._tasks[key] = asyncio.create_task(self._watch(key))
+        generation = self._generations[key]
+
+        subscriber = _Subscriber(margin)
+        try:
+            projection = await low_stock_cache.get(user_id, med_type)
+        except BaseException:
+            self._release(key)
+            raise
+        items = low_stock_rows(projection, margin)
+        subscriber.projection = projection
+        subscriber.sent = {_row_key(item): item for item in items}
+        subscriber.push("snapshot", {"items": items})
+
+        self._subscribers[key].add(subscriber)
+        if self._generations[key] != generation:
+            self._changed[key].set()
+        return subscriber
+
+    def unsubscribe(self, user_id: str, med_type: str, subscriber: _Subscriber):
+        key = (user_id, med_type)
+        self._subscribers[key].discard(subscriber)
+        self._release(key)
+
+    def _release(self, key):
+        # 구독자가 없으면 감시 작업을 멈춤
+        if self._subscribers.get(key):
+            return
+        self._subscribers.pop(key, None)
+        self._changed.pop(key, None)
+        self._generations.pop(key, None)
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    async def _watch(self, key):
+        changed = self._changed[key]
+        while True:
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=PUSH_RECHECK)
+                await asyncio.sleep(PUSH_DEBOUNCE)
+            except asyncio.TimeoutError:
+                pass
+            changed.clear()
+
+            try:
+                projection = await low_stock_cache.get(*key)
+            except Exception as e:
+                logger.warning(f"⚠️ 재고 부족 알림 갱신 실패 {key}: {e}")
+                continue
+            self._publish(key, projection)
+
+    def _publish(self, key, projection):
+        # 같은 margin의 구독자끼리는 부족 목록을 한 번만 계산
+        by_margin = {}
+        for subscriber in list(self._subscribers.get(key, ())):
+            if subscriber.projection is projection:
+                continue
+            if subscriber.margin not in by_margin:
+                by_margin[subscriber.margin] = low_stock_rows(projection, subscriber.margin)
+            subscriber.projection = projection
+            entered, changed, left, subscriber.sent = diff_rows(subscriber.sent, by_margin[subscriber.margin])
+            if entered or changed or left:
+                subscriber.push("diff", {"entered": entered, "changed": changed, "left": left})
+                self.events_sent += 1
+
+    async def events(self, user_id: str, med_type: str, margin: float, request):
+        subscriber = await self.subscribe(user_id, med_type, margin)
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event, payload = await asyncio.wait_for(subscriber.queue.get(), timeout=PUSH_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                yield b"id: %d\nevent: %s\ndata: %s\n\n" % (next(self._ids), event.encode(), dumps(payload))
+        finally:
+            self.unsubscribe(user_id, med_type, subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "tenants": len(self._subscribers),
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "events_sent": self.events_sent,
+        }
+
+
+low_stock_hub = LowStockHub()
+inventory_cache.on_invalidate(low_stock_hub.notify)
+
+
+def low_stock_events(user_id: str, med_type: str, margin: float, request) -> StreamingResponse:
+    """재고 부족 목록 SSE 응답 (event: snapshot 한 번, 이후 event: diff)"""
+    return StreamingResponse(low_stock_hub.events(user_id, med_type, margin, request),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
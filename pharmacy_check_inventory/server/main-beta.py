@@ -6,9 +6,16 @@ import json
 import shutil
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from database import conn
+from database import pool
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await pool.open()
+    yield
+    await pool.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS 설정
 app.add_middleware(
@@ -27,10 +34,10 @@ INVENTORY_FILES = {
 
 # FastAPI에서 supabase로 테이블 연결 
 @app.get("/needs")
-def get_all_needs():
-    with conn.cursor() as cur:
-        cur.execute("SELECT * FROM needs ORDER BY id")
-        rows = cur.fetchall()
+async def get_all_needs():
+    async with pool.connection() as conn:
+        cur = await conn.execute("SELECT * FROM needs ORDER BY id")
+        rows = await cur.fetchall()
         return rows
 
 # 데이터 표준화 함수
@@ -1,17 +1,44 @@
-from fastapi import FastAPI, UploadFile, File, Query, HTTPException
+from fastapi import FastAPI, UploadFile, File, Query, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 import pandas as pd
+import psycopg
 import os
 import json
 import shutil
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
-from database import conn as _global_conn
-import io 
+from typing import List, Optional
+from database import pool, PoolTimeout, pool_stats
+from inventory_upload import ingest_upload, UploadParseError
+from inventory_cache import inventory_cache, fetch_inventory
+from autocomplete_index import autocomplete_indexes
+from inventory_rows import FastJSONResponse, to_output_rows, sort_output_rows
+from inventory_query import (
+    MAX_PAGE_SIZE, DEFAULT_FIELDS, PARSED_FIELDS, ORDER_FIELDS, SIMILARITY_THRESHOLD, FUZZY_DEFAULT_LIMIT, QueryError,
+    parse_fields, parse_strength_query, build_search_query, build_fuzzy_search_query, build_low_stock_query, decode_cursor, encode_cursor, to_output_row
+)
+from inventory_stream import stream_query
+from stock_ledger import ingest_exports, LedgerError
+from parse_cache import parse_cache
+from pos_export import MED_TYPES
+from order_plan import order_columns, plan_orders, group_orders, to_csv, parse_order_multiple
+from low_stock import low_stock_cache, low_stock_rows
+from low_stock_events import low_stock_hub, low_stock_events
+from recent_searches import recent_searches
+from demand_forecast import update_forecast, ForecastError, FORECAST_TYPES
 import logging
-import psycopg2
+import datetime
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await pool.open()
+    recent_searches.start()
+    yield
+    await recent_searches.close()   # 남은 최근 검색어를 저장한 뒤 풀 종료
+    await pool.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS 설정
 app.add_middleware(
@@ -24,18 +51,19 @@ app.add_middleware(
  
 logger = logging.getLogger(__name__)
 
-def get_conn():
-    global _global_conn
-    if _global_conn.closed:
-        # database.py 에 있던 connect 설정을 그대로 복사하세요
-        _global_conn = psycopg2.connect(
-            host="aws-0-ap-northeast-2.pooler.supabase.com",
-            dbname="postgres.chltyulqrsshopuzauqq",
-            user="YOUR_USER",
-            password="pillphar5!",
-            port=6543
-        )
-    return _global_conn
+# 재고 부족 "주의" 기준: 현재 재고 < 필요 재고 + LOW_STOCK_WARN_MARGIN
+LOW_STOCK_WARN_MARGIN = float(os.getenv("LOW_STOCK_WARN_MARGIN", "3"))
+
+# 풀의 연결이 모두 사용 중이고 대기 시간도 넘긴 경우
+@app.exception_handler(PoolTimeout)
+def pool_timeout_handler(request, exc):
+    logger.warning(f"⚠️ DB 연결 대기 시간 초과: {exc}")
+    return JSONResponse(status_code=503, content={"detail": "서버가 혼잡합니다. 잠시 후 다시 시도해주세요."})
+
+async def get_conn():
+    # 요청마다 풀에서 연결을 빌리고, 응답이 끝나면 반납 (FastAPI 의존성)
+    async with pool.connection() as conn:
+        yield conn
 
 #
 # app.add_middleware(
@@ -54,14 +82,8 @@ def get_conn():
 #         rows = cur.fetchall()
 #         return rows
 
-def load_inventory(user_id: str, med_type: str) -> pd.DataFrame:
-    conn = get_conn()
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT * FROM needs
-            WHERE user_id = %s AND type = %s
-        """, (user_id, med_type))
-        rows = cur.fetchall()
+async def load_inventory(user_id: str, med_type: str) -> pd.DataFrame:
+    rows = await fetch_inventory(user_id, med_type)
 
     if not rows:
         return pd.DataFrame(columns=["약 이름", "약 코드", "현재 재고", "위치", "필요 재고", "통당 수량", "필요 통 수", "현재 통 수", "주문 통 수"])
@@ -88,325 +110,340 @@ def load_inventory(user_id: str, med_type: str) -> pd.DataFrame:
 
     return df[["약 이름", "약 코드", "현재 재고", "위치", "필요 재고", "통당 수량", "필요 통 수", "현재 통 수", "주문 통 수"]] 
 
-# xls 파일을 CSV로 파싱하는 헬퍼 함수
-def parse_fake_xls_as_csv(file_bytes, encoding="utf-8"):
-    """
-    이진 파일 내용을 문자열로 디코딩하여 CSV처럼 파싱
-    - 파일 내용은 실질적으로 CSV 포맷이어야 함
-    - 파일 확장자는 .xls일 수 있음
-    """
-    try:
-        # 1단계: 문자열로 디코딩 (일부 깨진 문자 무시)
-        text = file_bytes.decode(encoding, errors="ignore")
-
-        # 2단계: 한 줄씩 나눈 뒤, 헤더 탐색
-        lines = text.splitlines()
-        csv_lines = [line for line in lines if "," in line and len(line.split(",")) >= 3]
-
-        if not csv_lines:
-            raise ValueError("CSV 구조를 가진 줄을 찾을 수 없습니다.")
-
-        # 3단계: CSV 내용만 따로 추출해서 StringIO에 넣기
-        csv_text = "\n".join(csv_lines)
-        csv_stream = io.StringIO(csv_text)
-
-        # 4단계: 판다스로 CSV 읽기
-        df = pd.read_csv(csv_stream)
-        return df
-
-    except Exception as e:
-        raise ValueError(f"파일을 CSV로 파싱할 수 없습니다: {e}")
-
 # 업로드 API → 엑셀 파일을 파싱해서 Supabase DB에 삽입
 @app.post("/upload-inventory")
 async def upload_inventory(
     type: str = Query(...),
     user_id: str = Query("default"),
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    remove_missing: bool = Query(False),
+    conn=Depends(get_conn)
 ):
     # 1. 파일 확장자 확인
     extension = file.filename.split(".")[-1].lower()
-    content = await file.read()  # 바이트로 읽기
+    logger.warning(f"📦 업로드된 파일: {file.filename}, 확장자: {extension}, 약종: {type}")
 
-    # 2. 파일 읽기 (csv 또는 excel)
+    # 2. 파일을 묶음 단위로 파싱하면서 저장된 재고와 비교해 바뀐 약만 Supabase에 반영
+    #    (파싱은 워커 스레드에서, DB 작업은 비동기로 실행해서 이벤트 루프를 막지 않음)
     try:
-        logger.warning(f"📦 업로드된 파일: {file.filename}, 확장자: {extension}, 약종: {type}")
-
-        if extension in ["xls", "xlsx"]:
-            excel_io = io.BytesIO(content)
-            try:
-                # .xls/.xlsx 자동 감지
-                df = pd.read_excel(excel_io, dtype=str)
-                logger.info("✅ pandas.read_excel 성공")
-            except Exception as e_excel:
-                logger.warning(f"⚠️ read_excel 실패: {e_excel}. HTML 폴백 시도")
-                # 3. HTML 테이블 폴백
-                try:
-                    html = content.decode("utf-8", errors="ignore")
-                    tables = pd.read_html(html)
-                    df = tables[0]
-                    logger.info("✅ pandas.read_html 성공")
-                except Exception as e_html:
-                    logger.error(f"❌ 모든 파싱 시도 실패: Excel({e_excel}); HTML({e_html})")
-                    raise HTTPException(
-                        status_code=400,
-                        detail=(
-                            f"파일 파싱 실패:\n"
-                            f"- Excel 엔진 에러: {e_excel}\n"
-                            f"- HTML 폴백 에러: {e_html}"
-                        )
-                    )
-
-            if type == "general":
-                df = df.rename(columns={
-                    "상품명": "약 이름",
-                    "바코드": "약 코드",
-                    "재고수량": "현재 재고"
-                })
-            else:
-                df = df.rename(columns={
-                    "약품명": "약 이름",
-                    "약품코드": "약 코드",
-                    "재고합계": "현재 재고"
-                })
-
-        elif extension == "csv":
-            # logger.info("📥 .csv 파일 파싱 시도 중")
-            text_stream = io.StringIO(content.decode("utf-8"))
-
-            if type == "general":
-                df = pd.read_csv(text_stream, skiprows=[1])
-                df = df.rename(columns={
-                    "상품명": "약 이름",
-                    "바코드": "약 코드",
-                    "재고수량": "현재 재고"
-                })
-            else:
-                df = pd.read_csv(text_stream)
-                df = df.rename(columns={
-                    "약품명": "약 이름",
-                    "약품코드": "약 코드",
-                    "재고합계": "현재 재고"
-                })
-            # logger.info("✅ CSV 파일 정상 파싱 완료")
-        else:
-            logger.warning(f"❌ 지원되지 않는 파일 형식: {extension}")
-            raise HTTPException(status_code=400, detail="지원하지 않는 파일 형식입니다. csv, xls, xlsx만 가능합니다.")
-    except Exception as e:
+        counts = await ingest_upload(conn, user_id, type, file.file, extension, remove_missing)
+    except UploadParseError as e:
         logger.error(f"❌ 최종 파일 파싱 오류: {e}")
         raise HTTPException(status_code=400, detail=f"파일 파싱 오류: {e}")
 
-    # 3. 현재 재고 숫자화
+    if counts["inserted"] or counts["updated"] or counts["zeroed"]:
+        inventory_cache.invalidate(user_id, type)
+
+    return {
+        "status": "ok",
+        "message": f"{type} 재고가 성공적으로 Supabase에 저장되었습니다.",
+        **counts
+    }
+
+# 입고/판매 내역 반영 API → 재고 원장에 새 줄만 넣고 그만큼 needs 현재 재고를 바로 갱신 (CSV 다시 업로드 불필요)
+@app.post("/reconcile-stock")
+async def reconcile_stock(
+    type: str = Query(...),
+    user_id: str = Query("default"),
+    purchase: Optional[UploadFile] = File(None),
+    sales: Optional[UploadFile] = File(None),
+    start: Optional[datetime.date] = Query(None),
+    end: Optional[datetime.date] = Query(None),
+    conn=Depends(get_conn)
+):
+    """
+    purchase(입고/매입 내역), sales(판매/조제 내역) 중 올린 파일을 한 트랜잭션에서 반영
+    - 파일은 한 번만 파싱, 이미 반영한 파일/줄은 건너뛰므로 기간이 겹치는 파일을 다시 올려도 두 번 빠지지 않음
+    - 새 줄의 약별 합계를 UPDATE 한 번으로 needs.present_count에 더함 (입고 +, 판매 -)
+    - start/end: 날짜 없는 합계 보고서(전문약 약품별조제판매현황)의 기간, 생략 시 파일 이름의 _YYYYMMDD-YYYYMMDD
+    - 응답 delta: 바뀐 약마다 입고/판매 수량과 반영 전/후 재고, unmatched: 저장된 재고에 없는 약
+    - 거래처 열이 있는 파일은 약별 거래처(needs.supplier)도 갱신 (/order-plan의 거래처별 묶음)
+    - 지원하지 않는 type이나 파일 형식 오류는 400, 이미 반영한 기간과 맞지 않는 파일(원장 충돌)은 409
+    """
+    if type not in MED_TYPES:
+        raise HTTPException(status_code=400, detail=f"type은 {', '.join(MED_TYPES)} 중 하나여야 합니다.")
+    uploads = [(kind, upload) for kind, upload in (("purchase", purchase), ("sales", sales)) if upload is not None]
+    if not uploads:
+        raise HTTPException(status_code=400, detail="purchase 또는 sales 파일이 필요합니다.")
+    period = (start or end, end or start) if (start or end) else None
+
+    files = [(kind, await upload.read(), upload.filename, period) for kind, upload in uploads]
+    try:
+        result = await ingest_exports(conn, user_id, type, files, sync_needs=True)
+    except UploadParseError as e:
+        logger.error(f"❌ 입고/판매 파일 파싱 오류: {e}")
+        raise HTTPException(status_code=400, detail=f"파일 파싱 오류: {e}")
+    except LedgerError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    delta = [row for row in result["needs"] if row["matched"]]
+    unmatched = [row for row in result["needs"] if not row["matched"]]
+    if delta or any(file["suppliers"] for file in result["files"]):
+        inventory_cache.invalidate(user_id, type)
+
+    return FastJSONResponse(content={
+        "status": "ok",
+        "message": f"{type} 재고 {len(delta)}건 갱신, 저장된 재고에 없는 약 {len(unmatched)}건",
+        "files": [{key: value for key, value in file.items() if key != "changes"} for file in result["files"]],
+        "updated": len(delta),
+        "delta": [{key: value for key, value in row.items() if key != "matched"} for row in delta],
+        "unmatched": [{key: row[key] for key in ("drug_name", "drug_code", "purchased", "sold")} for row in unmatched],
+    })
+
+# 판매 내역으로 필요 재고 계산 (재고 원장의 판매 줄, 마지막 계산 이후의 날만 더함)
+@app.post("/forecast-needs")
+async def forecast_needs(
+    type: str = Query(...),
+    user_id: str = Query("default"),
+    apply: bool = Query(False),
+    conn=Depends(get_conn)
+):
+    """
+    /reconcile-stock 으로 올린 판매 내역으로 약별 하루 판매량(지수 평활)과 필요 재고를 갱신 (demand_forecast.py)
+    - apply=false(기본): 계산만 저장하고 needs는 그대로, apply=true: 필요 재고를 needs에 UPDATE 한 번으로 반영
+    - 응답 changes: 필요 재고가 바뀐 약의 이전(before)/새(after) 값과 하루 판매량(daily_mean, 보정 전)
+    - 지원하지 않는 type은 400, 반영한 판매 내역이 아직 없으면 409
+    """
+    if type not in FORECAST_TYPES:
+        raise HTTPException(status_code=400, detail=f"type은 {', '.join(FORECAST_TYPES)} 중 하나여야 합니다.")
+
     try:
-        df["현재 재고"] = df["현재 재고"].astype(str).str.replace(",", "", regex=False).astype(float)
-    except:
-        df["현재 재고"] = 0.0
-
-    # 4. Supabase에 삽입 또는 갱신
-    conn = get_conn()
-    with conn.cursor() as cur:
-        for _, row in df.iterrows():
-            drug_name = row["약 이름"]
-            drug_code = str(row["약 코드"])
-            present_count = row["현재 재고"]
-
-            # 기존 데이터 조회
-            cur.execute("""
-                SELECT need_count, location, unit_count FROM needs
-                WHERE user_id = %s AND type = %s AND drug_name = %s AND drug_code = %s
-            """, (user_id, type, drug_name, drug_code))
-            existing = cur.fetchone()
-
-            if existing:
-                # 기존 약: 현재 재고만 갱신
-                cur.execute("""
-                    UPDATE needs
-                    SET present_count = %s
-                    WHERE user_id = %s AND type = %s AND drug_name = %s AND drug_code = %s
-                """, (present_count, user_id, type, drug_name, drug_code))
-            else:
-                # 신규 약: 기본값으로 삽입
-                cur.execute("""
-                    INSERT INTO needs (
-                        user_id, type, drug_name, drug_code,
-                        present_count, need_count, location, unit_count
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    user_id,
-                    type,
-                    drug_name,
-                    drug_code,
-                    present_count,
-                    10,           # 기본 필요 재고
-                    "미지정",     # 기본 위치
-                    1             # 기본 통당 수량
-                ))
-        conn.commit()
-
-    return {"status": "ok", "message": f"{type} 재고가 성공적으로 Supabase에 저장되었습니다."}
+        result = await update_forecast(conn, user_id, type, apply=apply)
+    except ForecastError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if result["changes"]:
+        inventory_cache.invalidate(user_id, type)
+
+    return FastJSONResponse(content={
+        "status": result["status"],
+        "message": f"{type} 판매 {result['folded_days']}일 반영 ({result['through']}까지), "
+                   f"필요 재고 {len(result['changes'])}건 변경",
+        **result,
+    })
 
 # 검색 API → Supabase에서 사용자별 약 목록 조회
 @app.get("/search")
-def search_medicine(
+async def search_medicine(
     name: str = Query("", alias="name"),
     code: str = Query("", alias="code"),
     type: str = Query("professional"),
-    user_id: str = Query("default")
+    user_id: str = Query("default"),
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = Query(None),
+    fields: str = Query(None),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    stream: str = Query(None, pattern="^(json|ndjson)$"),
+    match: str = Query("substring", pattern="^(substring|fuzzy)$"),
+    ingredient: str = Query(""),
+    strength: str = Query("")
 ):
-    conn = get_conn()
-    with conn.cursor() as cur:
-        if name == "all" or code == "all":
-            cur.execute("SELECT * FROM needs WHERE user_id = %s AND type = %s", (user_id, type))
-        elif name:
-            cur.execute("SELECT * FROM needs WHERE user_id = %s AND type = %s AND drug_name ILIKE %s", (user_id, type, f"%{name}%"))
-        elif code:
-            cur.execute("SELECT * FROM needs WHERE user_id = %s AND type = %s AND drug_code ILIKE %s", (user_id, type, f"%{code}%"))
-        else:
+    try:
+        selected = parse_fields(fields)
+        strength_value = parse_strength_query(strength) if strength.strip() else None
+    except QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    ingredient = ingredient.strip()
+    filters = {"ingredient": ingredient or None, "strength": strength_value}
+
+    # match=fuzzy: 오타/일부 성분명도 찾도록 DB에서 유사도 순으로 (약 코드는 앞부분 일치)
+    if match == "fuzzy":
+        return await search_fuzzy(user_id, type, name, code, selected, limit or FUZZY_DEFAULT_LIMIT)
+
+    # stream을 주면 DB 서버 측 커서에서 읽는 대로 내보냄 (전체 목록을 메모리에 모으지 않음)
+    if stream is not None:
+        if not (name or code or ingredient or strength_value):
             return []
+        sql, params = build_search_query(user_id, type, name, code, selected, order == "desc", limit=limit, **filters)
+        return stream_query(sql, params, selected, stream)
+
+    # limit을 주면 DB에서 한 페이지만 조회 → {"items": [...], "next_cursor": ...}
+    if limit is not None:
+        return await search_page(user_id, type, name, code, selected, order == "desc", cursor, limit, filters)
+
+    # 성분/함량 검색: 업로드 때 분해해 둔 열로 DB에서 (name/code와 함께 쓰면 모두 만족하는 약만)
+    if ingredient or strength_value:
+        sql, params = build_search_query(user_id, type, name, code, selected, order == "desc", **filters)
+        async with pool.connection() as conn:
+            cur = await conn.execute(sql, params)
+            rows = await cur.fetchall()
+        return FastJSONResponse(content=[to_output_row(row, selected) for row in rows])
+
+    # 캐시된 스냅샷에서 필터링 (ILIKE '%검색어%'와 같은 대소문자 무시 부분 일치)
+    if name == "all" or code == "all":
+        rows = await fetch_inventory(user_id, type)
+    elif name:
+        keyword = name.lower()
+        rows = [row for row in await fetch_inventory(user_id, type) if keyword in (row["drug_name"] or "").lower()]
+    elif code:
+        keyword = code.lower()
+        rows = [row for row in await fetch_inventory(user_id, type) if keyword in (row["drug_code"] or "").lower()]
+    else:
+        return []
 
-        rows = cur.fetchall()
+    if not rows:
+        return []
 
-    df = pd.DataFrame(rows)
+    # DataFrame 없이 행 단위로 열 이름 변경/통 수 계산 → 정렬
+    parsed = any(f in PARSED_FIELDS for f in selected)
+    ordering = any(f in ORDER_FIELDS for f in selected)
+    items = sort_output_rows(to_output_rows(rows, parsed=parsed, order=ordering), descending=order == "desc")  # ✅ 정렬 기준 추가
 
-    if df.empty:
-        return []
+    if fields:
+        items = [{f: item.get(f, "NaN") for f in selected} for item in items]
 
-    df = df.rename(columns={
-        "drug_name": "약 이름",
-        "drug_code": "약 코드",
-        "present_count": "현재 재고",
-        "need_count": "필요 재고",
-        "location": "위치",
-        "unit_count": "통당 수량"
-    })
+    return FastJSONResponse(content=items)
+
+async def search_page(user_id, med_type, name, code, fields, descending, cursor, limit, filters):
+    """
+    /search 페이지 조회: 정렬/필터/LIMIT을 SQL에서 처리해서 보여줄 행만 가져옴
+    - cursor: 이전 응답의 next_cursor (마지막 행의 약 이름/약 코드, 키셋 방식이라 뒤 페이지도 빠름)
+    - 다음 페이지가 없으면 next_cursor는 null
+    """
+    if not (name or code or filters["ingredient"] or filters["strength"]):
+        return {"items": [], "next_cursor": None}
 
     try:
-        df["필요 통 수"] = df["필요 재고"] / df["통당 수량"]
-        df["현재 통 수"] = df["현재 재고"] / df["통당 수량"]
-        df["주문 통 수"] = df["필요 통 수"] - df["현재 통 수"]
-    except:
-        df["필요 통 수"] = 0
-        df["현재 통 수"] = 0
-        df["주문 통 수"] = 0
+        after = decode_cursor(cursor) if cursor else None
+    except QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 다음 페이지가 있는지 알기 위해 한 행 더 조회
+    sql, params = build_search_query(user_id, med_type, name, code, fields, descending, after, limit + 1, **filters)
+    async with pool.connection() as conn:
+        cur = await conn.execute(sql, params)
+        rows = await cur.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["_name"], rows[-1]["_code"])
+
+    return FastJSONResponse(content={
+        "items": [to_output_row(row, fields) for row in rows],
+        "next_cursor": next_cursor
+    })
 
-    df = df.sort_values(by=["약 이름", "약 코드"])  # ✅ 정렬 기준 추가
+async def search_fuzzy(user_id, med_type, name, code, fields, limit):
+    name, code = name.strip(), code.strip()
+    if not name and not code:
+        return []
 
-    return JSONResponse(content=df.fillna("NaN").to_dict(orient="records"))
+    sql, params = build_fuzzy_search_query(user_id, med_type, name, code, fields, limit)
+    async with pool.connection() as conn:
+        # 유사도 기준은 이 트랜잭션에서만 적용 (pooler에서 다른 연결로 새지 않도록)
+        await conn.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                           (str(SIMILARITY_THRESHOLD),))
+        try:
+            cur = await conn.execute(sql, params)
+        except psycopg.errors.UndefinedFunction:
+            logger.error("❌ pg_trgm 확장이 없습니다. migrations/003_needs_trgm_search.sql 을 실행하세요.")
+            raise HTTPException(status_code=503, detail="유사도 검색을 사용할 수 없습니다. (pg_trgm 미설치)")
+        rows = await cur.fetchall()
+
+    return FastJSONResponse(content=[to_output_row(row, fields) for row in rows])
 
 # 자동완성
 @app.get("/autocomplete")
-def autocomplete(
+async def autocomplete(
     partial: str,
     type: str = Query("professional"),
-    user_id: str = Query("default")
+    user_id: str = Query("default"),
+    limit: int = Query(20, ge=1, le=100)
 ):
-    conn = get_conn()
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT DISTINCT drug_name FROM needs
-            WHERE user_id = %s AND type = %s AND drug_name ILIKE %s
-        """, (user_id, type, f"%{partial}%"))
-
-        matches = [row["drug_name"] for row in cur.fetchall() if row["drug_name"]]
-
-    return matches
+    # 앞부분 일치 → 부분 일치 순으로 상위 limit개 (초성 검색 지원: ㄱㅅㅌ → 가스티...)
+    index = await autocomplete_indexes.get(user_id, type)
+    return index.search(partial, limit)
 
 # 최근 검색어 저장 관련
 @app.post("/add-search")
-def add_recent_search(keyword: str = Query(...), type: str = Query("professional"), user_id: str = Query("default")):
+async def add_recent_search(keyword: str = Query(...), type: str = Query("professional"), user_id: str = Query("default")):
     keyword = keyword.strip()
     if not keyword:
         return {"status": "empty"}
 
-    conn = get_conn()
-    with conn.cursor() as cur:
-        # ON CONFLICT로 삽입하거나 중복 시 created_at만 갱신
-        cur.execute("""
-            INSERT INTO recent_searches (user_id, type, keyword, created_at)
-            VALUES (%s, %s, %s, NOW())
-            ON CONFLICT (user_id, type, keyword)
-            DO UPDATE SET created_at = EXCLUDED.created_at
-        """, (user_id, type, keyword))
-        conn.commit()
+    # 메모리 목록에만 반영하고 DB 저장은 모아서 나중에 (recent_searches.py, 검색 응답이 커밋을 기다리지 않음)
+    recent_searches.add(user_id, type, keyword)
 
     return {"status": "ok"}
 
 @app.get("/recent-searches")
-def get_recent_searches(type: str = Query("professional"), user_id: str = Query("default")):
-    conn = get_conn()
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT keyword FROM recent_searches
-            WHERE user_id = %s AND type = %s
-            ORDER BY created_at DESC
-            LIMIT 10
-        """, (user_id, type))
-        keywords = [row["keyword"] for row in cur.fetchall()]
-    return keywords 
+async def get_recent_searches(type: str = Query("professional"), user_id: str = Query("default")):
+    return await recent_searches.recent(user_id, type)
 
 # 필요 재고 및 위치 수정 및 저장 
 @app.get("/low-stock")
-def get_low_stock_medicines(
+async def get_low_stock_medicines(
     type: str = Query(...),
-    user_id: str = Query("default")
+    user_id: str = Query("default"),
+    margin: float = Query(None, ge=0),
+    stream: str = Query(None, pattern="^(json|ndjson)$")
 ):
-    conn = get_conn()
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT * FROM needs
-            WHERE user_id = %s AND type = %s
-        """, (user_id, type))
-        rows = cur.fetchall()
-
-    if not rows:
-        return []
+    warn_margin = LOW_STOCK_WARN_MARGIN if margin is None else margin
 
-    import pandas as pd
-    df = pd.DataFrame(rows)
+    # stream을 주면 분류까지 SQL에서 하고 서버 측 커서에서 읽는 대로 내보냄
+    if stream is not None:
+        sql, params = build_low_stock_query(user_id, type, warn_margin)
+        return stream_query(sql, params, [*DEFAULT_FIELDS, "부족상태"], stream)
 
-    df = df.rename(columns={
-        "drug_name": "약 이름",
-        "drug_code": "약 코드",
-        "present_count": "현재 재고",
-        "need_count": "필요 재고",
-        "location": "위치",
-        "unit_count": "통당 수량"
-    })
-
-    try:
-        df["필요 통 수"] = df["필요 재고"] / df["통당 수량"]
-        df["현재 통 수"] = df["현재 재고"] / df["통당 수량"]
-        df["주문 통 수"] = df["필요 통 수"] - df["현재 통 수"]
-    except:
-        df["필요 통 수"] = 0
-        df["현재 통 수"] = 0
-        df["주문 통 수"] = 0
-
-    def get_status(row):
-        if row["현재 재고"] < row["필요 재고"]:
-            return "심각"
-        elif row["현재 재고"] < row["필요 재고"] + 3:
-            return "주의"
-        else:
-            return "충분"
-
-    df["부족상태"] = df.apply(get_status, axis=1)
+    # 스냅샷마다 여유분 순으로 정렬해 둔 투영에서 부족한 약만 꺼냄 (전체 약을 다시 분류하지 않음)
+    items = low_stock_rows(await low_stock_cache.get(user_id, type), warn_margin)
+    if not items:
+        return []
 
-    filtered = df[df["부족상태"].isin(["심각", "주의"])] 
+    return FastJSONResponse(content=items)  # ✅ 정렬 기준 추가
 
-    df = df.sort_values(by=["약 이름", "약 코드"])  # ✅ 정렬 기준 추가
+# 재고 부족 목록 실시간 알림 (SSE): 처음에 전체 목록(event: snapshot), 이후 업로드/수정이 커밋될 때마다 바뀐 약만(event: diff)
+@app.get("/low-stock/events")
+async def get_low_stock_events(
+    request: Request,
+    type: str = Query(...),
+    user_id: str = Query("default"),
+    margin: float = Query(None, ge=0)
+):
+    warn_margin = LOW_STOCK_WARN_MARGIN if margin is None else margin
+    return low_stock_events(user_id, type, warn_margin, request)
 
-    return JSONResponse(content=filtered.fillna("NaN").to_dict(orient="records"))
+# 주문 계획: 부족한 약의 주문 통 수(통 단위 올림, 최소 주문 배수)를 거래처별로 묶은 주문 목록
+@app.get("/order-plan")
+async def get_order_plan(
+    type: str = Query(...),
+    user_id: str = Query("default"),
+    supplier: str = Query(None),
+    format: str = Query("json", pattern="^(json|csv)$")
+):
+    """
+    캐시된 재고 스냅샷의 열 단위 배열로 배열 연산 한 번에 계산 (order_plan.plan_orders)
+    - supplier: 한 거래처의 주문만 ("거래처 미지정"이면 거래처 없는 약만)
+    - format=csv: 거래처/약 이름/약 코드/주문 통 수/통당 수량/주문 수량 CSV (그대로 거래처에 전송)
+    """
+    plan = plan_orders(await order_columns.get(user_id, type), supplier)
+
+    if format == "csv":
+        return Response(content=to_csv(plan), media_type="text/csv; charset=utf-8", headers={
+            "Content-Disposition": f'attachment; filename="order_plan_{type}_{datetime.date.today():%Y%m%d}.csv"'
+        })
+
+    suppliers = group_orders(plan)
+    return FastJSONResponse(content={
+        "status": "ok",
+        "message": f"{type} 주문 {len(plan['주문 통 수'])}건, 거래처 {len(suppliers)}곳",
+        "items": len(plan["주문 통 수"]),
+        "packs": int(plan["주문 통 수"].sum()),
+        "suppliers": suppliers,
+    })
 
 # 필요 재고 및 위치 수정 및 저장
 @app.patch("/update-info")
-def update_info(data: dict):
+async def update_info(data: dict, conn=Depends(get_conn)):
     name = data.get("name")
     code = data.get("code")
     med_type = data.get("type")
     new_need = data.get("need")
     new_location = data.get("location")
     new_unit_count = data.get("unitCount")
+    new_supplier = data.get("supplier")
+    new_order_multiple = data.get("orderMultiple")
     user_id = data.get("user_id", "default")  # 기본값 설정
 
     if not all([name, code, med_type]):
@@ -424,6 +461,16 @@ def update_info(data: dict):
     if new_unit_count is not None:
         updates.append("unit_count = %s")
         params.append(new_unit_count)
+    if new_supplier is not None:
+        updates.append("supplier = %s")
+        params.append(new_supplier)
+    if new_order_multiple is not None:
+        try:
+            new_order_multiple = parse_order_multiple(new_order_multiple)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        updates.append("order_multiple = %s")
+        params.append(new_order_multiple)
 
     if not updates:
         raise HTTPException(status_code=400, detail="수정할 항목이 없습니다.")
@@ -431,14 +478,129 @@ def update_info(data: dict):
     params.extend([user_id, name, code, med_type])
     set_clause = ", ".join(updates)
 
-    conn = get_conn()
-    with conn.cursor() as cur:
-        cur.execute(f"""
+    async with conn.cursor() as cur:
+        await cur.execute(f"""
             UPDATE needs SET {set_clause}
             WHERE user_id = %s AND drug_name = %s AND drug_code = %s AND type = %s
         """, params)
-        conn.commit()
+        await conn.commit()
+    inventory_cache.invalidate(user_id, med_type)
 
     return {"status": "ok", "message": f"{name}({code}) 정보가 Supabase에 저장되었습니다."}
 
-
+# 여러 약의 필요 재고/위치/통당 수량을 한 번에 수정 (선반 재배치 등)
+class InfoChange(BaseModel):
+    name: Optional[str] = None
+    code: Optional[str] = None
+    type: Optional[str] = None
+    need: Optional[float] = None
+    location: Optional[str] = None
+    unitCount: Optional[float] = None
+    supplier: Optional[str] = None
+    orderMultiple: Optional[float] = None
+
+class BulkInfoUpdate(BaseModel):
+    user_id: str = "default"
+    atomic: bool = False      # True면 하나라도 실패할 때 전체 취소
+    items: List[InfoChange]
+
+@app.patch("/update-info/bulk")
+async def update_info_bulk(data: BulkInfoUpdate, conn=Depends(get_conn)):
+    """
+    items의 변경 사항을 한 트랜잭션에서 UPDATE ... FROM unnest(...) 한 번으로 반영
+    - 결과는 items 순서대로: updated / not_found(해당 약 없음) / invalid(필수값 누락, 수정할 항목 없음, 주문 배수가 1 이상 정수가 아님)
+    - 같은 약이 여러 번 나오면 항목별로 뒤의 값이 이김
+    - atomic=False(기본): 성공한 항목만 반영하고 status "partial"로 응답
+    - atomic=True: 실패가 하나라도 있으면 롤백하고 409로 응답 (results로 실패 항목 확인)
+    """
+    results = [None] * len(data.items)
+    merged = {}  # (name, code, type) -> [항목 번호들, need, location, unitCount, supplier, orderMultiple]
+
+    for i, item in enumerate(data.items):
+        if not all([item.name, item.code, item.type]):
+            results[i] = {"status": "invalid", "detail": "name, code, type는 필수입니다."}
+            continue
+        changes = (item.need, item.location, item.unitCount, item.supplier, item.orderMultiple)
+        if all(value is None for value in changes):
+            results[i] = {"status": "invalid", "detail": "수정할 항목이 없습니다."}
+            continue
+        if item.orderMultiple is not None:
+            try:
+                changes = (*changes[:4], parse_order_multiple(item.orderMultiple))
+            except ValueError as e:
+                results[i] = {"status": "invalid", "detail": str(e)}
+                continue
+
+        entry = merged.setdefault((item.name, item.code, item.type), [[], None, None, None, None, None])
+        entry[0].append(i)
+        for field, value in enumerate(changes, start=1):
+            if value is not None:
+                entry[field] = value
+
+    matched = set()
+    if merged:
+        keys = list(merged)
+        async with conn.cursor() as cur:
+            await cur.execute("""
+                UPDATE needs AS n SET
+                    need_count = COALESCE(u.need, n.need_count),
+                    location = COALESCE(u.location, n.location),
+                    unit_count = COALESCE(u.unit_count, n.unit_count),
+                    supplier = COALESCE(u.supplier, n.supplier),
+                    order_multiple = COALESCE(u.order_multiple, n.order_multiple)
+                FROM unnest(
+                    %s::int[], %s::text[], %s::text[], %s::text[],
+                    %s::float8[], %s::text[], %s::float8[], %s::text[], %s::int[]
+                ) AS u(ord, name, code, type, need, location, unit_count, supplier, order_multiple)
+                WHERE n.user_id = %s AND n.drug_name = u.name AND n.drug_code = u.code AND n.type = u.type
+                RETURNING u.ord
+            """, (
+                list(range(len(keys))),
+                [k[0] for k in keys],
+                [k[1] for k in keys],
+                [k[2] for k in keys],
+                [merged[k][1] for k in keys],
+                [merged[k][2] for k in keys],
+                [merged[k][3] for k in keys],
+                [merged[k][4] for k in keys],
+                [merged[k][5] for k in keys],
+                data.user_id,
+            ))
+            matched = {row["ord"] for row in await cur.fetchall()}
+
+        for ord_, key in enumerate(keys):
+            for i in merged[key][0]:
+                results[i] = {"status": "updated"} if ord_ in matched else {"status": "not_found"}
+
+    for i, item in enumerate(data.items):
+        results[i] = {"name": item.name, "code": item.code, **results[i]}
+
+    failed = sum(1 for r in results if r["status"] != "updated")
+    if failed and data.atomic:
+        await conn.rollback()
+        return JSONResponse(status_code=409, content={
+            "status": "rolled_back",
+            "message": f"{failed}건 실패로 전체 수정을 취소했습니다.",
+            "updated": 0,
+            "failed": failed,
+            "results": results
+        })
+
+    await conn.commit()
+    for med_type in {keys[ord_][2] for ord_ in matched}:
+        inventory_cache.invalidate(data.user_id, med_type)
+
+    return {
+        "status": "partial" if failed else "ok",
+        "message": f"{len(results) - failed}건 저장, {failed}건 실패",
+        "updated": len(results) - failed,
+        "failed": failed,
+        "results": results
+    }
+
+# 서버 상태 지표 (커넥션 풀 사용량 등)
+@app.get("/stats")
+async def get_stats():
+    return {"pool": pool_stats(), "cache": inventory_cache.stats(), "parse_cache": parse_cache.stats(),
+            "low_stock": low_stock_cache.stats(), "low_stock_push": low_stock_hub.stats(),
+            "recent_searches": recent_searches.stats()}
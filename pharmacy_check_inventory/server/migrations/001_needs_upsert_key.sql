@@ -0,0 +1,17 @@
+-- /upload-inventory 의 INSERT ... ON CONFLICT 병합에 필요한 유니크 키
+-- 같은 약이 중복으로 들어가 있으면 가장 먼저 들어온(id가 가장 작은) 행만 남긴다
+
+BEGIN;
+
+DELETE FROM needs a
+USING needs b
+WHERE a.user_id = b.user_id
+  AND a.type = b.type
+  AND a.drug_name = b.drug_name
+  AND a.drug_code = b.drug_code
+  AND a.id > b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS needs_user_type_drug_key
+    ON needs (user_id, type, drug_name, drug_code);
+
+COMMIT;
@@ -0,0 +1,6 @@
+-- /search?limit= 페이지 조회용 인덱스
+-- (약 이름, 약 코드)를 바이트 순서(COLLATE "C")로 정렬/키셋 비교하므로 같은 정렬 규칙으로 인덱스를 만든다
+-- 트랜잭션 밖에서 실행 (CONCURRENTLY)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS needs_user_type_name_code_c_idx
+    ON needs (user_id, type, (drug_name COLLATE "C"), (drug_code COLLATE "C"));
@@ -0,0 +1,14 @@
+-- /search?match=fuzzy (유사도 검색)와 약 이름 부분 일치 검색용 인덱스
+-- 트랜잭션 밖에서 실행 (CONCURRENTLY)
+-- (user_id, type) 조회는 001의 needs_user_type_drug_key 앞부분 열로 처리되므로 별도 인덱스를 만들지 않는다
+
+-- Supabase는 pg_trgm 확장을 기본 제공 (Dashboard > Database > Extensions 에서 켜도 됨)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 약 이름 트라이그램 인덱스: drug_name ILIKE '%덱시부%' 와 '덱시부프로팬' <% drug_name (오타 허용) 모두 사용
+CREATE INDEX CONCURRENTLY IF NOT EXISTS needs_drug_name_trgm_idx
+    ON needs USING gin (drug_name gin_trgm_ops);
+
+-- 약 코드 앞부분 일치 (drug_code LIKE '6586%')
+CREATE INDEX CONCURRENTLY IF NOT EXISTS needs_user_type_code_prefix_idx
+    ON needs (user_id, type, drug_code text_pattern_ops);
@@ -0,0 +1,19 @@
+-- 약 이름을 제품명/성분/함량으로 분해해서 저장하는 열과 검색 인덱스 (/search?ingredient=, ?strength=)
+-- 업로드 시 새로 들어오는 약은 서버가 채우고, 기존 행은 이 파일 실행 후
+--   DATABASE_URL=... python migrations/005_backfill_drug_name_parts.py
+-- 로 한 번 채운다. (003의 pg_trgm 확장 필요)
+-- 트랜잭션 밖에서 실행 (CONCURRENTLY)
+
+ALTER TABLE needs
+    ADD COLUMN IF NOT EXISTS drug_brand text,
+    ADD COLUMN IF NOT EXISTS drug_ingredient text,
+    ADD COLUMN IF NOT EXISTS drug_strength double precision,
+    ADD COLUMN IF NOT EXISTS drug_strength_unit text;
+
+-- 성분 부분 일치 (drug_ingredient ILIKE '%모사프리드%')
+CREATE INDEX CONCURRENTLY IF NOT EXISTS needs_drug_ingredient_trgm_idx
+    ON needs USING gin (drug_ingredient gin_trgm_ops);
+
+-- 함량 일치 (drug_strength_unit = 'mg' AND drug_strength = 15)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS needs_user_type_strength_idx
+    ON needs (user_id, type, drug_strength_unit, drug_strength);
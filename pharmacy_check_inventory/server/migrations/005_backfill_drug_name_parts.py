@@ -0,0 +1,61 @@
+"""
+004_needs_drug_name_parts.sql 적용 후 기존 행의 제품명/성분/함량 열을 채우는 스크립트 (한 번만 실행)
+
+사용법 (server 폴더에서):
+    DATABASE_URL=postgresql://... python migrations/005_backfill_drug_name_parts.py
+
+아직 분해되지 않은(drug_brand가 비어 있는) 약 이름만 처리하므로 여러 번 실행해도 안전하다.
+"""
+import os
+import sys
+from pathlib import Path
+
+import psycopg
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from drug_name import parse_drug_name  # noqa: E402
+
+BATCH_SIZE = 1000
+
+
+def main():
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        sys.exit("DATABASE_URL이 설정되지 않았습니다.")
+
+    with psycopg.connect(database_url, prepare_threshold=None) as conn:
+        names = [row[0] for row in conn.execute(
+            "SELECT DISTINCT drug_name FROM needs WHERE drug_brand IS NULL AND drug_name IS NOT NULL"
+        )]
+        print(f"분해할 약 이름 {len(names)}개")
+
+        updated = 0
+        for start in range(0, len(names), BATCH_SIZE):
+            batch = names[start:start + BATCH_SIZE]
+            parts = [parse_drug_name(name) for name in batch]
+            cur = conn.execute("""
+                UPDATE needs AS n SET
+                    drug_brand = u.brand,
+                    drug_ingredient = u.ingredient,
+                    drug_strength = u.strength,
+                    drug_strength_unit = u.strength_unit
+                FROM unnest(%s::text[], %s::text[], %s::text[], %s::float8[], %s::text[])
+                    AS u(name, brand, ingredient, strength, strength_unit)
+                WHERE n.drug_name = u.name AND n.drug_brand IS NULL
+            """, (
+                batch,
+                [p.brand for p in parts],
+                [p.ingredient for p in parts],
+                [p.strength for p in parts],
+                [p.strength_unit for p in parts],
+            ))
+            updated += cur.rowcount
+            conn.commit()
+            print(f"  {min(start + BATCH_SIZE, len(names))}/{len(names)}")
+
+        print(f"완료: {updated}행 갱신")
+
+
+if __name__ == "__main__":
+    main()
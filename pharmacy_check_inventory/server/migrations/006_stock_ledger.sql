@@ -0,0 +1,60 @@
+-- 입고/판매 내역을 파일마다 한 번만 반영하는 재고 원장 (server/stock_ledger.py)
+-- - stock_ledger_files: 반영한 파일 (내용 해시, 기간), 같은 파일을 다시 올리면 건너뜀
+-- - stock_ledger_lines: 반영한 거래 줄, 기간이 겹치는 내보내기 파일의 같은 줄은 line_hash로 한 번만 저장
+-- - stock_balances: 약별 누적 재고 (재고현황 기준 개수 + 입고 - 판매), 새 줄이 들어올 때만 그만큼 갱신
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS stock_ledger_files (
+    id bigserial PRIMARY KEY,
+    user_id text NOT NULL,
+    type text NOT NULL,
+    kind text NOT NULL,                 -- snapshot(재고현황) / purchase(입고·매입) / sales(판매·조제)
+    file_hash bytea NOT NULL,
+    file_name text,
+    period_start date,
+    period_end date,                    -- snapshot은 재고 기준일
+    line_count integer NOT NULL DEFAULT 0,
+    new_line_count integer NOT NULL DEFAULT 0,
+    superseded_by bigint REFERENCES stock_ledger_files (id),
+    ingested_at timestamptz NOT NULL DEFAULT now(),
+    UNIQUE (user_id, type, kind, file_hash)
+);
+
+CREATE INDEX IF NOT EXISTS stock_ledger_files_period_idx
+    ON stock_ledger_files (user_id, type, kind, period_end);
+
+CREATE TABLE IF NOT EXISTS stock_ledger_lines (
+    user_id text NOT NULL,
+    type text NOT NULL,
+    line_hash bytea NOT NULL,
+    file_id bigint NOT NULL REFERENCES stock_ledger_files (id),
+    kind text NOT NULL,
+    line_date date NOT NULL,
+    drug_name text NOT NULL,
+    drug_code text NOT NULL DEFAULT '',
+    quantity double precision NOT NULL,
+    PRIMARY KEY (user_id, type, line_hash)
+);
+
+-- 재고현황 기준일 이후 줄만 다시 합산할 때
+CREATE INDEX IF NOT EXISTS stock_ledger_lines_date_idx
+    ON stock_ledger_lines (user_id, type, line_date);
+
+CREATE INDEX IF NOT EXISTS stock_ledger_lines_file_idx
+    ON stock_ledger_lines (file_id);
+
+CREATE TABLE IF NOT EXISTS stock_balances (
+    user_id text NOT NULL,
+    type text NOT NULL,
+    drug_name text NOT NULL,
+    drug_code text NOT NULL DEFAULT '',
+    base_count double precision NOT NULL DEFAULT 0,
+    purchased double precision NOT NULL DEFAULT 0,
+    sold double precision NOT NULL DEFAULT 0,
+    balance double precision GENERATED ALWAYS AS (base_count + purchased - sold) STORED,
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, type, drug_name, drug_code)
+);
+
+COMMIT;
@@ -0,0 +1,13 @@
+-- 주문 계획(GET /order-plan, server/order_plan.py)에 필요한 needs 열
+-- - supplier: 거래처 (입고/매입, 약품별조제판매현황 내보내기를 원장에 반영할 때 채움, /update-info로 직접 수정 가능)
+-- - order_multiple: 최소 주문 배수 (통 단위 정수, 예: 10통 단위로만 주문 가능하면 10, 비어 있으면 1)
+--   예전에 double precision으로 만든 DB도 정수로 바꿈 (소수 값은 올림, 1보다 작은 값은 비움)
+
+BEGIN;
+
+ALTER TABLE needs ADD COLUMN IF NOT EXISTS supplier text;
+ALTER TABLE needs ADD COLUMN IF NOT EXISTS order_multiple integer;
+ALTER TABLE needs ALTER COLUMN order_multiple TYPE integer
+    USING CASE WHEN order_multiple >= 1 THEN ceil(order_multiple)::integer END;
+
+COMMIT;
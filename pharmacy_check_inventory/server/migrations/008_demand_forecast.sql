@@ -0,0 +1,28 @@
+-- 판매 내역으로 필요 재고(need_count)를 계산하는 수요 예측 (server/demand_forecast.py, migrations/006 필요)
+-- - demand_forecast_state: 약국/약종별로 어느 날까지 판매량을 반영했는지 (다음 실행은 그 다음 날부터만)
+-- - demand_forecasts: 약별 하루 판매량의 지수 평활 평균/분산과 계산한 필요 재고
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS demand_forecast_state (
+    user_id text NOT NULL,
+    type text NOT NULL,
+    through_date date NOT NULL,         -- 이 날까지 반영
+    days integer NOT NULL DEFAULT 0,    -- 지금까지 반영한 날 수 (초기값 보정용)
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, type)
+);
+
+CREATE TABLE IF NOT EXISTS demand_forecasts (
+    user_id text NOT NULL,
+    type text NOT NULL,
+    drug_name text NOT NULL,
+    drug_code text NOT NULL DEFAULT '',
+    daily_mean double precision NOT NULL DEFAULT 0,
+    daily_var double precision NOT NULL DEFAULT 0,
+    reorder_point double precision NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, type, drug_name, drug_code)
+);
+
+COMMIT;
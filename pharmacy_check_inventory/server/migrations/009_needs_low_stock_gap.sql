@@ -0,0 +1,7 @@
+-- /low-stock?stream= 조회가 부족한 약만 읽도록 여유분(현재 재고 - 필요 재고) 식 인덱스
+-- present_count - need_count < margin 은 인덱스 앞부분만 범위 조회 (값이 없는 약은 NULL이라 제외)
+-- 쓰기마다 PostgreSQL이 인덱스를 함께 갱신하므로 따로 새로 고칠 필요 없음
+-- 트랜잭션 밖에서 실행 (CONCURRENTLY)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS needs_user_type_stock_gap_idx
+    ON needs (user_id, type, (present_count - need_count));
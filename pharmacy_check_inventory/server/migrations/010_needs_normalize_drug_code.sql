@@ -0,0 +1,27 @@
+-- needs.drug_code를 업로드(inventory_upload.normalize_upload_codes)와 같은 형식으로 맞춤
+-- 예전 업로드는 열 타입을 추론해서 str()로 저장했으므로, 빈 칸이 섞인 코드 열은 "8806123456789.0"처럼 저장되어 있음
+-- 지금은 정수로 읽히는 코드를 정수 문자열("8806123456789")로 저장하므로 바꾸지 않으면 다음 업로드에서 같은 약이 새 행으로 들어감
+-- 바꾼 뒤 같은 약이 두 줄이 되면 001과 같이 가장 먼저 들어온(id가 가장 작은) 행만 남긴다 (위치/필요 재고 등 수정한 값 유지)
+
+BEGIN;
+
+CREATE TEMP TABLE needs_code_fix ON COMMIT DROP AS
+SELECT id, drug_code, min(id) OVER (PARTITION BY user_id, type, drug_name, drug_code) AS keep_id
+FROM (
+    SELECT id, user_id, type, drug_name,
+           CASE WHEN btrim(drug_code, E' \t\r\n') ~ '^[0-9][0-9,]*(\.0*)?$'
+                THEN COALESCE(NULLIF(ltrim(regexp_replace(btrim(drug_code, E' \t\r\n'), ',|\.0*$', '', 'g'), '0'), ''), '0')
+                ELSE drug_code
+           END AS drug_code
+    FROM needs
+) normalized;
+
+DELETE FROM needs n
+USING needs_code_fix f
+WHERE n.id = f.id AND f.id <> f.keep_id;
+
+UPDATE needs n SET drug_code = f.drug_code
+FROM needs_code_fix f
+WHERE n.id = f.id AND n.drug_code IS DISTINCT FROM f.drug_code;
+
+COMMIT;
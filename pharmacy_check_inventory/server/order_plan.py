@@ -0,0 +1,158 @@
+"""
+주문 계획: 약국(user_id, type)의 needs 전체에서 통 단위 주문 수량을 한 번에 계산 (GET /order-plan)
+
+- 부족 통 수 = ceil((필요 재고 - 현재 재고) / 통당 수량), 통당 수량이 없거나 0이면 낱개(1) 단위
+- 주문 통 수 = 부족 통 수를 최소 주문 배수(needs.order_multiple, 1 이상 정수, 없으면 1)의 배수로 올림
+- 필요 재고나 현재 재고가 비어 있는 약은 주문하지 않음 (/low-stock과 같은 기준)
+- 거래처(needs.supplier, 입고/조제판매 내보내기에서 채움)별로 묶고, 거래처 안에서는 약 이름 → 약 코드 순
+캐시된 재고 스냅샷마다 열 단위 배열(OrderColumns)과 정렬 순위를 한 번 만들어 두고,
+요청마다 올림/배수/필터/정렬은 배열 연산으로만 처리 (약마다 Python으로 반복하지 않음, 주문할 약의 응답 행 변환만 예외)
+"""
+from collections import namedtuple
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+from inventory_cache import SnapshotDerivedCache
+
+# 부동소수점 오차로 2.0000000001통이 3통으로 올림되지 않도록
+CEIL_EPSILON = 1e-9
+
+NO_SUPPLIER = "거래처 미지정"
+
+# 주문 목록 열 (응답 items의 키, 거래처는 묶음 키)
+PLAN_COLUMNS = ["거래처", "약 이름", "약 코드", "위치", "현재 재고", "필요 재고", "통당 수량", "주문 배수",
+                "부족 수량", "주문 통 수", "주문 수량"]
+ITEM_COLUMNS = PLAN_COLUMNS[1:]
+
+# 거래처에 보낼 CSV 열
+CSV_COLUMNS = ["거래처", "약 이름", "약 코드", "주문 통 수", "통당 수량", "주문 수량"]
+
+# 재고 스냅샷의 열 단위 배열 (스냅샷마다 한 번 생성)
+# - unit/multiple: 비어 있거나 0 이하면 1
+# - supplier: 앞뒤 공백 제거, 없으면 NO_SUPPLIER (unassigned=True)
+# - rank: 거래처(미지정은 맨 뒤) → 약 이름 → 약 코드 순서의 순위
+OrderColumns = namedtuple("OrderColumns", [
+    "name", "code", "location", "present", "need", "unit", "multiple", "supplier", "unassigned", "rank",
+])
+
+
+def _numbers(values: list) -> np.ndarray:
+    # None → NaN, 예전 업로드의 문자열("1,000")이 섞여 있으면 pandas로 다시 읽음 (읽을 수 없으면 NaN)
+    try:
+        return np.array(values, dtype="float64")
+    except (TypeError, ValueError):
+        text = pd.Series(values, dtype=object).astype(str).str.replace(",", "", regex=False)
+        return pd.to_numeric(text, errors="coerce").to_numpy(dtype="float64")
+
+
+def _sort_keys(values: list) -> np.ndarray:
+    # 정렬용 고정 길이 유니코드 배열 (None → "", 비교는 Python 문자열과 같은 코드 포인트 순)
+    values = np.array(values, dtype=object)
+    values[values == None] = ""  # noqa: E711 (배열 원소별 비교)
+    return values.astype(str)
+
+
+def parse_order_multiple(value) -> int:
+    """/update-info의 orderMultiple → 1 이상 정수 (2, 2.0, "2"는 2, 2.5나 0 이하는 ValueError)"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"orderMultiple은 숫자여야 합니다: {value!r}") from None
+    if not number.is_integer() or number < 1:
+        raise ValueError(f"orderMultiple은 1 이상 정수여야 합니다: {value!r}")
+    return int(number)
+
+
+def build_columns(rows) -> OrderColumns:
+    """캐시된 needs 행(dict) 목록 → OrderColumns (열마다 itemgetter로 꺼냄, 행마다 Python 코드를 돌지 않음)"""
+    keys = ("drug_name", "drug_code", "location", "present_count", "need_count", "unit_count", "order_multiple",
+            "supplier")
+    name, code, location, present, need, unit, multiple, supplier = (list(map(itemgetter(key), rows)) for key in keys)
+
+    unit, multiple = _numbers(unit), _numbers(multiple)
+    supplier = np.char.strip(_sort_keys(supplier))
+    unassigned = supplier == ""
+    supplier = np.where(unassigned, NO_SUPPLIER, supplier)
+
+    # 뒤쪽 기준부터 안정 정렬: 약 코드 → 약 이름 → 거래처 → 미지정은 맨 뒤
+    order = np.argsort(_sort_keys(code), kind="stable")
+    for sort_keys in (_sort_keys(name), supplier, unassigned):
+        order = order[np.argsort(sort_keys[order], kind="stable")]
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+
+    return OrderColumns(
+        name=np.array(name, dtype=object),
+        code=np.array(code, dtype=object),
+        location=np.array(location, dtype=object),
+        present=_numbers(present),
+        need=_numbers(need),
+        unit=np.where(unit > 0, unit, 1.0),            # NaN > 0 은 False → 1
+        multiple=np.where(multiple > 0, multiple, 1.0),
+        supplier=supplier.astype(object),
+        unassigned=unassigned,
+        rank=rank,
+    )
+
+
+def plan_orders(columns: OrderColumns, supplier: str = None) -> dict:
+    """
+    OrderColumns → 주문할 약만 담은 열 단위 주문 목록 {PLAN_COLUMNS 열: 배열} (배열 연산만, 약마다 반복 없음)
+    - 정렬은 거래처(미지정은 맨 뒤) → 약 이름 → 약 코드
+    - supplier를 주면 그 거래처의 약만 (NO_SUPPLIER로 미지정 약만)
+    """
+    shortage = columns.need - columns.present       # 둘 중 하나라도 NaN이면 NaN → 주문 안 함
+    with np.errstate(invalid="ignore"):
+        packs = np.ceil(shortage / columns.unit - CEIL_EPSILON)
+        packs = np.ceil(packs / columns.multiple - CEIL_EPSILON) * columns.multiple
+        selected = packs > 0
+    if supplier is not None:
+        selected &= columns.supplier == supplier
+
+    index = np.flatnonzero(selected)
+    index = index[np.argsort(columns.rank[index])]
+    unit = columns.unit[index]
+    # 주문 통 수(정수)와 주문 수량을 같은 값으로 계산
+    count = np.ceil(packs[index] - CEIL_EPSILON).astype("int64")
+    return {
+        "거래처": columns.supplier[index],
+        "약 이름": columns.name[index],
+        "약 코드": columns.code[index],
+        "위치": columns.location[index],
+        "현재 재고": columns.present[index],
+        "필요 재고": columns.need[index],
+        "통당 수량": unit,
+        "주문 배수": columns.multiple[index],
+        "부족 수량": np.round(shortage[index], 6),
+        "주문 통 수": count,
+        "주문 수량": np.round(count * unit, 6),
+    }
+
+
+def group_orders(plan: dict) -> list:
+    """plan_orders 결과 → 거래처별 [{"거래처", "품목 수", "주문 통 수", "items": [...]}, ...] (plan의 순서 그대로)"""
+    names = plan["거래처"]
+    if not len(names):
+        return []
+    columns = [plan[column].tolist() for column in ITEM_COLUMNS]
+    records = [dict(zip(ITEM_COLUMNS, values)) for values in zip(*columns)]
+
+    # 정렬되어 있으므로 거래처가 바뀌는 위치에서 나눔
+    starts = np.flatnonzero(np.r_[True, names[1:] != names[:-1]])
+    ends = np.r_[starts[1:], len(names)]
+    packs = np.add.reduceat(plan["주문 통 수"], starts)
+    return [
+        {"거래처": names[start], "품목 수": end - start, "주문 통 수": total, "items": records[start:end]}
+        for start, end, total in zip(starts.tolist(), ends.tolist(), packs.tolist())
+    ]
+
+
+def to_csv(plan: dict) -> bytes:
+    """거래처에 보낼 주문 목록 CSV (엑셀에서 한글이 깨지지 않도록 utf-8-sig)"""
+    return pd.DataFrame({column: plan[column] for column in CSV_COLUMNS}).to_csv(index=False).encode("utf-8-sig")
+
+
+# (user_id, type)별 OrderColumns (재고 스냅샷이 바뀌면 다음 조회 때 다시 생성)
+order_columns = SnapshotDerivedCache(build_columns)
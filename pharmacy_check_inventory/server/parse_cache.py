@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow가 없으면 캐시 없이 매번 파싱 (결과는 같고 느림)
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# 파싱 결과 캐시 설정 (환경 변수로 조정 가능)
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", str(Path(__file__).resolve().parent / ".parse_cache"))
+PARSE_CACHE_MAX_MB = float(os.getenv("PARSE_CACHE_MAX_MB", "256"))  # 디스크 사용량 상한, 0이면 사용 안 함
+
+# 파서나 저장 형식이 바뀌면 이전 캐시를 쓰지 않도록 키에 넣음
+CACHE_VERSION = f"2:{pd.__version__}"
+SUFFIX = ".arrow"
+# 열 데이터 해시를 넣어 두는 스키마 메타데이터 키 (읽을 때 비교해서 손상된 파일은 버림)
+DIGEST_KEY = b"parse_cache_digest"
+DIGEST_CHUNK_BYTES = 1024 * 1024
+
+
+def file_digest(fileobj) -> bytes:
+    """업로드 파일 내용 해시 (1MB씩 읽어 계산한 뒤 처음 위치로 되돌림)"""
+    position = fileobj.tell()
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: fileobj.read(DIGEST_CHUNK_BYTES), b""):
+        digest.update(chunk)
+    fileobj.seek(position)
+    return digest.digest()
+
+
+def _table_digest(table) -> bytes:
+    # 스키마(열 이름/타입, pandas 메타데이터)와 열 버퍼를 그대로 해시 (DataFrame으로 바꾸지 않으므로 읽기가 거의 느려지지 않음)
+    metadata = {key: value for key, value in (table.schema.metadata or {}).items() if key != DIGEST_KEY}
+    digest = hashlib.blake2b(table.schema.with_metadata(metadata).serialize(), digest_size=16)
+    for column in table.columns:
+        for chunk in column.chunks:
+            for buffer in chunk.buffers():
+                digest.update(b"\x00" if buffer is None else buffer)
+    return digest.hexdigest().encode()
+
+
+def _with_digest(table):
+    # Arrow IPC로 한 번 써서 다시 읽은 모양(청크/버퍼 배치)으로 해시해야 get에서 계산한 값과 같음
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    digest = _table_digest(pa.ipc.open_file(sink.getvalue()).read_all())
+    return table.replace_schema_metadata({**(table.schema.metadata or {}), DIGEST_KEY: digest})
+
+
+class ParseCache:
+    """
+    엑셀/HTML 표 파싱 결과(DataFrame)를 파일 내용 해시로 디스크에 보관하는 캐시
+    - 압축하지 않은 Arrow IPC 파일 → 다시 읽을 때는 memory map으로 열어 디코딩 없이 바로 사용
+    - 쓰다 만 파일이나 손상된 파일(구조 검사 또는 열 데이터 해시가 맞지 않음)은 지우고 없는 것으로 처리
+    - 전체 크기가 max_bytes를 넘으면 가장 오래 안 쓴 파일(수정 시각 기준)부터 지움, 읽을 때마다 수정 시각 갱신
+    - 여러 워커 프로세스가 같은 폴더를 써도 되도록 임시 파일에 쓴 뒤 이름 바꾸기로 저장
+    - Arrow로 바꿀 수 없는 표(한 열에 숫자/문자 섞임 등)는 저장하지 않고 넘어감
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.skipped = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return pa is not None and self.max_bytes > 0
+
+    def key(self, digest: bytes, variant: str) -> str:
+        # 같은 파일이라도 읽는 방식(형식, 인코딩)이 다르면 다른 항목
+        return hashlib.blake2b(digest + f"\x1f{variant}\x1f{CACHE_VERSION}".encode(), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{SUFFIX}"
+
+    def get(self, key: str):
+        """캐시된 DataFrame, 없으면 None"""
+        path = self._path(key)
+        try:
+            with pa.memory_map(str(path)) as source:
+                table = pa.ipc.open_file(source).read_all()
+            table.validate(full=True)
+            if (table.schema.metadata or {}).get(DIGEST_KEY) != _table_digest(table):
+                raise ValueError("열 데이터 해시가 맞지 않음")
+            df = table.to_pandas()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (pa.ArrowException, OSError, ValueError) as e:
+            # 쓰다 만 파일, 손상된 파일은 지우고 다시 파싱
+            logger.warning(f"⚠️ 파싱 캐시 읽기 실패, 삭제: {path.name} ({e})")
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return df
+
+    def put(self, key: str, df: pd.DataFrame):
+        try:
+            table = _with_digest(pa.Table.from_pandas(df, preserve_index=False))
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            logger.info(f"ℹ️ 파싱 캐시에 저장하지 않음: {e}")
+            with self._lock:
+                self.skipped += 1
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, self._path(key))
+        except OSError as e:
+            logger.warning(f"⚠️ 파싱 캐시 저장 실패: {e}")
+            Path(tmp).unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            self.stores += 1
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # 다른 프로세스가 먼저 지움
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:  # Windows에서 다른 프로세스가 아직 열어 둔 파일
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        entries = self._entries() if self.enabled and self.directory.exists() else []
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "skipped": self.skipped,
+                "evictions": self.evictions,
+            }
+
+
+parse_cache = ParseCache(PARSE_CACHE_DIR, int(PARSE_CACHE_MAX_MB * 1024 * 1024))
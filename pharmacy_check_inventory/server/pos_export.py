@@ -0,0 +1,300 @@
+import datetime
+import hashlib
+import io
+import re
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from file_format import sniff_file
+from inventory_upload import UploadParseError, read_whole
+from stock_reconcile import INVALID_COLUMNS, clean_names, normalize_codes, parse_numbers
+
+# POS 내보내기 파일 종류별 열
+# - name/code/quantity: 약 이름, 약 코드(None이면 이름으로만 구분), 수량
+# - date: 거래일 (None이면 날짜 없는 재고현황 또는 기간 합계 보고서 → 기간은 파일 이름이나 요청으로 지정)
+# - identity: 같은 거래 줄인지 판단할 열 (번호(no), 나중에 바뀌는 구입단가/제조사 등은 제외)
+# - supplier: 거래처 열 (주문 계획의 거래처별 묶음에 사용, 없으면 None)
+ExportSpec = namedtuple("ExportSpec", ["name", "code", "quantity", "date", "identity", "supplier"], defaults=(None,))
+
+EXPORT_SPECS = {
+    # 일반약 재고현황 / 입고상세내역 / 판매상세내역
+    ("general", "snapshot"): ExportSpec("상품명", None, "재고수량", None, None),
+    ("general", "purchase"): ExportSpec(
+        "상품명", None, "수량", "입고일자",
+        ["입고일자", "구분", "거래처", "메모", "상품명", "포장단위", "포장수량", "수량", "합계", "유효기간"],
+        "거래처",
+    ),
+    ("general", "sales"): ExportSpec(
+        "상품명", None, "수량", "판매일자",
+        ["판매일자", "시간", "대표바코드", "바코드", "상품명", "단위", "포장수량", "판매단가", "수량", "할인",
+         "판매금액", "거래구분", "고객명"],
+    ),
+    # 전문약 재고현황 / 약품 매입 현황 / 약품별조제판매현황 (기간 합계)
+    ("professional", "snapshot"): ExportSpec("약품명", "약품코드", "개수", None, None),
+    ("professional", "purchase"): ExportSpec(
+        "약 품 명", None, "수량", "일 자",
+        ["일 자", "약 품 명", "거래처명", "단 가", "수량", "금액"],
+        "거래처명",
+    ),
+    ("professional", "sales"): ExportSpec("약품명", "약품코드", "조제수량", None, None, "거래처"),
+}
+KINDS = ("snapshot", "purchase", "sales")
+MED_TYPES = sorted({med_type for med_type, _ in EXPORT_SPECS})
+KIND_LABELS = {"snapshot": "재고현황", "purchase": "입고", "sales": "판매"}
+
+# 지난 날짜에는 줄이 더 생기지 않는 거래 내역 (판매 시각에 기록되는 판매상세내역)
+# 입고일자는 나중에 지난 날짜로 입력할 수 있으므로 날짜로 건너뛰지 않고 line_hash로만 거름
+DATE_COMPLETE_KINDS = ("sales",)
+
+# 파일 이름의 기간 "_20250421-20250510", 기준일 "_20250415"
+PERIOD_RE = re.compile(r"(\d{8})\s*[-~]\s*(\d{8})")
+DATE_RE = re.compile(r"(?<!\d)(\d{8})(?!\d)")
+
+# lines: drug_name, drug_code, quantity (+ 거래 내역이면 line_hash, line_date, 거래처 열이 있으면 supplier)
+# invalid: 숫자/날짜로 읽을 수 없는 칸 (stock_reconcile.INVALID_COLUMNS)
+# period: (시작일, 종료일) datetime.date, 알 수 없으면 None
+# skipped: 이미 반영한 날짜라서 뺀 줄 수 (parse_export의 complete_ranges)
+ParsedExport = namedtuple("ParsedExport", ["lines", "invalid", "period", "skipped"])
+
+
+def content_hash(data: bytes) -> bytes:
+    # 같은 파일을 다시 올렸는지 판단하는 내용 해시
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def read_export(fileobj) -> pd.DataFrame:
+    """POS 내보내기 파일(xls/xlsx/HTML 표/CSV)을 형식 판별 후 원문 문자열 그대로 한 번에 읽음"""
+    fmt = sniff_file(fileobj)
+    if fmt is None:
+        raise UploadParseError("파일 형식을 판별할 수 없습니다. (엑셀, HTML 표, CSV가 아님)")
+    if fmt.kind != "csv":
+        return read_whole(fileobj, fmt)
+
+    text_stream = io.TextIOWrapper(fileobj, encoding=fmt.encoding, errors="replace", newline="")
+    try:
+        return pd.read_csv(text_stream, sep=fmt.delimiter, dtype=str)
+    except Exception as e:
+        raise UploadParseError(f"csv 파일 파싱 실패: {e}") from e
+    finally:
+        text_stream.detach()
+
+
+def _to_date(value: str):
+    # 8자리 숫자라도 날짜가 아니면(20251399 등) None
+    try:
+        return datetime.datetime.strptime(value, "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def parse_period(text):
+    """
+    '20250421-20250510' 같은 기간 또는 '20250415' 기준일 → (시작일, 종료일), 없으면 None
+    - 날짜로 읽을 수 없는 8자리 숫자는 기간이 아닌 것으로 보고 건너뜀 (파일 이름의 다른 숫자 등)
+    """
+    if not text:
+        return None
+    for match in PERIOD_RE.finditer(text):
+        start, end = (_to_date(value) for value in match.groups())
+        if start is not None and end is not None:
+            return (start, end) if start <= end else (end, start)
+    for match in DATE_RE.finditer(text):
+        date = _to_date(match.group(1))
+        if date is not None:
+            return date, date
+    return None
+
+
+def _map_unique(values: pd.Series, fn) -> np.ndarray:
+    # 반복되는 값이 많은 열은 고유값에만 fn을 적용하고 정수 코드로 되돌림
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return np.asarray(fn(pd.Series(np.asarray(uniques, dtype=object))))[codes]
+
+
+def _identity_values(uniques: pd.Series) -> pd.Series:
+    # 파일 형식(CSV 문자열, 엑셀/HTML 숫자)에 따라 달라지는 표기를 맞춤: "1,000" / "1000.0" → "1000"
+    text = uniques.fillna("").astype(str).str.strip().str.replace(",", "", regex=False)
+    return text.str.replace(r"^(-?\d+)\.0+$", r"\1", regex=True)
+
+
+def _date_values(uniques: pd.Series) -> pd.Series:
+    # "2025-05-03", "20250502", "2025-05-03 00:00:00", 20250502.0 → 날짜
+    digits = uniques.fillna("").astype(str).str.replace(r"\D", "", regex=True).str[:8]
+    return pd.to_datetime(digits, format="%Y%m%d", errors="coerce").dt.date
+
+
+def _line_hashes(kind: str, identity: pd.Series) -> list:
+    # 같은 파일 안의 똑같은 줄(같은 시각 같은 상품 두 번 등)은 순번으로 구분
+    ordinal = identity.groupby(identity, sort=False).cumcount()
+    return [
+        hashlib.blake2b(f"{kind}\x1e{text}\x1e{n}".encode(), digest_size=16).digest()
+        for text, n in zip(identity, ordinal)
+    ]
+
+
+def in_ranges(dates: pd.Series, ranges) -> np.ndarray:
+    """dates 중 [시작일, 종료일) 범위들 안에 있는 것 (날짜 종류가 적으므로 고유값만 비교, 빈 날짜는 False)"""
+    def check(uniques):
+        return [pd.notna(date) and any(start <= date < end for start, end in ranges) for date in uniques]
+    return _map_unique(dates, check).astype(bool)
+
+
+def parse_export(df: pd.DataFrame, med_type: str, kind: str, period=None, complete_ranges=None) -> ParsedExport:
+    """
+    POS 내보내기 DataFrame → 약별 수량 줄
+    - 빈 약 이름, 숫자만 있는 약 이름(합계/번호 행)은 제외
+    - 수량/날짜를 읽을 수 없는 칸은 invalid로 모음 (수량은 0으로, 날짜가 없는 거래 줄은 제외)
+    - 입고/판매 줄에는 같은 거래를 알아보기 위한 line_hash를 붙임
+      (기간 합계 보고서는 기간 + 약으로, 거래 내역은 identity 열 + 같은 줄 순번으로)
+    - period: 날짜 없는 파일의 기간 (거래 내역은 줄의 날짜 범위로 채움)
+    - complete_ranges: 이미 전부 반영한 날짜 범위 [(시작일, 종료일 다음날), ...],
+      이 날짜의 거래 줄은 다른 열을 읽기 전에 뺌 (같은 날 똑같은 줄은 같은 날짜이므로 순번은 그대로)
+    """
+    spec = EXPORT_SPECS.get((med_type, kind))
+    if spec is None:
+        raise UploadParseError(f"지원하지 않는 파일 종류입니다: {med_type}/{kind}")
+    required = [column for column in (spec.name, spec.code, spec.quantity, spec.date) if column]
+    missing = [column for column in required if column not in df.columns]
+    if missing:
+        raise UploadParseError(f"{KIND_LABELS[kind]} 파일에 필수 열이 없습니다: {', '.join(missing)}")
+
+    skipped = 0
+    if spec.date:
+        dates = pd.Series(_map_unique(df[spec.date], _date_values), index=df.index)
+        known = dates.dropna()
+        if len(known):
+            period = (known.min(), known.max())
+        if complete_ranges:
+            done = in_ranges(dates, complete_ranges)
+            skipped = int(done.sum())
+            df, dates = df[~done], dates[~done]
+
+    names = clean_names(df[spec.name])
+    keep = np.asarray(names != "") & ~np.asarray(names.categories.str.isdigit(), dtype=bool)[names.codes]
+    df = df[keep]
+    names = names[keep]
+
+    invalid = []
+    lines = pd.DataFrame({
+        "drug_name": np.asarray(names, dtype=object),
+        "drug_code": np.asarray(normalize_codes(df[spec.code]), dtype=object) if spec.code else "",
+        "quantity": parse_numbers(df[spec.quantity], KIND_LABELS[kind], spec.quantity, invalid),
+    }, index=df.index)
+
+    if spec.supplier and spec.supplier in df.columns:
+        lines["supplier"] = np.asarray(clean_names(df[spec.supplier]), dtype=object)
+
+    if spec.date:
+        dates = dates[keep]
+        bad = dates.isna()
+        if bad.any():
+            invalid.append(pd.DataFrame({
+                "파일": KIND_LABELS[kind],
+                "열": spec.date,
+                "행": df.index[bad],
+                "값": df.loc[bad, spec.date].astype(str).to_numpy(),
+            }))
+            df, lines, dates = df[~bad], lines[~bad], dates[~bad]
+        lines["line_date"] = dates
+
+        columns = [column for column in spec.identity if column in df.columns]
+        identity = pd.Series(_map_unique(df[columns[0]], _identity_values), index=df.index)
+        for column in columns[1:]:
+            identity = identity.str.cat(pd.Series(_map_unique(df[column], _identity_values), index=df.index), sep="\x1f")
+        lines["line_hash"] = _line_hashes(kind, identity)
+    elif kind != "snapshot" and period is not None:
+        # 기간 합계 보고서: 같은 기간의 같은 약은 한 줄
+        lines["line_date"] = period[1]
+        identity = f"{period[0]:%Y%m%d}~{period[1]:%Y%m%d}\x1f" + lines["drug_name"] + "\x1f" + lines["drug_code"]
+        lines["line_hash"] = _line_hashes(kind, identity)
+
+    report = pd.concat(invalid, ignore_index=True) if invalid else pd.DataFrame(columns=INVALID_COLUMNS)
+    return ParsedExport(lines.reset_index(drop=True), report, period, skipped)
+
+
+def parse_export_file(data: bytes, med_type: str, kind: str, file_name: str = None, period=None,
+                      complete_ranges=None) -> ParsedExport:
+    """파일 내용 → ParsedExport, period를 안 주면 파일 이름의 기간/기준일 사용"""
+    return parse_export(read_export(io.BytesIO(data)), med_type, kind, period or parse_period(file_name),
+                        complete_ranges)
+
+
+# 파일 이름 → (약종, 파일 종류): POS에서 내보낸 기본 이름 기준
+EXPORT_NAME_PATTERNS = [
+    (re.compile(r"일반약\s*재고현황"), ("general", "snapshot")),
+    (re.compile(r"입고상세내역"), ("general", "purchase")),
+    (re.compile(r"판매상세내역"), ("general", "sales")),
+    (re.compile(r"전문약\s*재고현황"), ("professional", "snapshot")),
+    (re.compile(r"약품\s*매입\s*현황"), ("professional", "purchase")),
+    (re.compile(r"약품별\s*조제\s*판매\s*현황"), ("professional", "sales")),
+]
+
+
+def guess_export(file_name: str):
+    """파일 이름으로 (약종, 파일 종류) 추정, 모르는 이름이면 None"""
+    for pattern, spec in EXPORT_NAME_PATTERNS:
+        if pattern.search(file_name):
+            return spec
+    return None
+
+
+def pack_parsed(parsed: ParsedExport) -> dict:
+    """
+    ParsedExport → 프로세스 간에 보내기 쉬운 열 단위 배열
+    (약 이름/코드/거래처는 정수 코드 + 고유값, 날짜는 datetime64[D], line_hash는 16바이트씩 이어 붙인 bytes)
+    문자열/bytes 객체를 줄마다 pickle하지 않으므로 보내는 양과 시간이 줄어듦
+    """
+    lines = parsed.lines
+    packed = {"rows": len(lines), "quantity": lines["quantity"].to_numpy(dtype="float64")}
+    for column in ("drug_name", "drug_code", "supplier"):
+        if column not in lines:
+            continue
+        codes, uniques = pd.factorize(lines[column])
+        packed[column] = (codes.astype(np.int32), np.asarray(uniques, dtype=object).tolist())
+    if "line_date" in lines:
+        packed["line_date"] = pd.to_datetime(lines["line_date"]).to_numpy().astype("datetime64[D]")
+    if "line_hash" in lines:
+        packed["line_hash"] = b"".join(lines["line_hash"])
+    return {
+        "lines": packed,
+        "invalid": parsed.invalid.to_dict(orient="list"),
+        "period": parsed.period,
+        "skipped": parsed.skipped,
+    }
+
+
+def unpack_parsed(packed: dict) -> ParsedExport:
+    """pack_parsed의 반대"""
+    lines, rows = packed["lines"], packed["lines"]["rows"]
+    def strings(column):
+        codes, uniques = lines[column]
+        return np.asarray(uniques, dtype=object)[codes] if rows else np.array([], dtype=object)
+
+    frame = {"drug_name": strings("drug_name"), "drug_code": strings("drug_code"), "quantity": lines["quantity"]}
+    if "supplier" in lines:
+        frame["supplier"] = strings("supplier")
+    if "line_date" in lines:
+        frame["line_date"] = lines["line_date"].astype(object)
+    if "line_hash" in lines:
+        # 'S16'은 끝의 0 바이트를 잘라내므로 'V16'으로 16바이트씩 나눔
+        frame["line_hash"] = np.frombuffer(lines["line_hash"], dtype="V16").tolist()
+    return ParsedExport(pd.DataFrame(frame), pd.DataFrame(packed["invalid"], columns=INVALID_COLUMNS),
+                        packed["period"], packed["skipped"])
+
+
+def parse_export_packed(data: bytes, med_type: str, kind: str, file_name: str = None, period=None,
+                        complete_ranges=None):
+    """
+    프로세스 풀 작업용 parse_export_file: (pack_parsed 결과, {"read": 초, "parse": 초, "pack": 초})
+    (이 모듈만 불러오므로 작업 프로세스는 DB 설정 없이 시작됨)
+    """
+    start = time.perf_counter()
+    df = read_export(io.BytesIO(data))
+    read_s = time.perf_counter() - start
+    parsed = parse_export(df, med_type, kind, period or parse_period(file_name), complete_ranges)
+    parse_s = time.perf_counter() - start - read_s
+    packed = pack_parsed(parsed)
+    return packed, {"read": read_s, "parse": parse_s, "pack": time.perf_counter() - start - read_s - parse_s}
@@ -0,0 +1,182 @@
+"""
+최근 검색어 쓰기 지연 버퍼 (POST /add-search, GET /recent-searches)
+
+검색할 때마다 DB에 커밋하지 않고
+- (user_id, type)별 최근 검색어(MRU, RECENT_SEARCH_LIMIT개)를 메모리에 두고 /recent-searches는 여기서 바로 응답
+- 저장할 검색어는 모아 두었다가 RECENT_SEARCH_FLUSH_SECONDS초마다(또는 RECENT_SEARCH_FLUSH_MAX개가 쌓이면)
+  recent_searches에 INSERT ... ON CONFLICT 한 번으로 저장, 서버 종료 때도 남은 것을 저장
+- created_at은 저장한 시각이 아니라 검색한 시각 (같은 검색어는 더 최근 시각이 이김)
+- 메모리의 목록은 RECENT_SEARCH_TTL초가 지나면 DB에서 다시 읽어 합침 (다른 워커 프로세스에서 한 검색 반영)
+- 저장에 실패하면 다음 주기에 다시 시도 (프로세스가 비정상 종료되면 아직 저장하지 않은 검색어는 잃을 수 있음)
+"""
+import asyncio
+import datetime
+import logging
+import os
+import time
+from collections import OrderedDict
+from operator import itemgetter
+
+from database import pool
+
+logger = logging.getLogger(__name__)
+
+# 최근 검색어 설정 (환경 변수로 조정 가능)
+RECENT_SEARCH_LIMIT = int(os.getenv("RECENT_SEARCH_LIMIT", "10"))                  # /recent-searches 개수
+RECENT_SEARCH_FLUSH_SECONDS = float(os.getenv("RECENT_SEARCH_FLUSH_SECONDS", "2"))  # 모아서 저장하는 주기(초)
+RECENT_SEARCH_FLUSH_MAX = int(os.getenv("RECENT_SEARCH_FLUSH_MAX", "500"))          # 이만큼 쌓이면 주기 전에 저장
+RECENT_SEARCH_TTL = float(os.getenv("RECENT_SEARCH_TTL", "60"))                     # 메모리 목록을 DB와 다시 맞추는 간격(초)
+MAX_USERS = 4096      # 메모리에 유지할 (user_id, type) 목록 수
+
+LOAD_SQL = """
+    SELECT keyword, created_at FROM recent_searches
+    WHERE user_id = %s AND type = %s
+    ORDER BY created_at DESC
+    LIMIT %s
+"""
+
+# 모아 둔 검색어를 한 문장으로 저장 (같은 검색어는 더 최근 시각만 남김)
+FLUSH_SQL = """
+    INSERT INTO recent_searches AS r (user_id, type, keyword, created_at)
+    SELECT * FROM unnest(%s::text[], %s::text[], %s::text[], %s::timestamptz[])
+    ON CONFLICT (user_id, type, keyword)
+    DO UPDATE SET created_at = GREATEST(r.created_at, EXCLUDED.created_at)
+"""
+
+
+class _Recent:
+    # 한 (user_id, type)의 최근 검색어 {keyword: 검색 시각}, 뒤쪽이 가장 최근
+    __slots__ = ("keywords", "loaded_at")
+
+    def __init__(self):
+        self.keywords = OrderedDict()
+        self.loaded_at = None   # DB에서 읽어 합친 시각 (None이면 아직 읽지 않음)
+
+    def touch(self, keyword: str, searched_at: datetime.datetime):
+        previous = self.keywords.pop(keyword, None)
+        if previous is not None and previous >= searched_at:
+            searched_at = previous
+        in_order = not self.keywords or searched_at >= next(reversed(self.keywords.values()))
+        self.keywords[keyword] = searched_at
+        if not in_order:
+            # DB에서 읽은 더 오래된 검색어는 시각 순서 자리로 (목록이 짧으므로 다시 정렬)
+            self.keywords = OrderedDict(sorted(self.keywords.items(), key=itemgetter(1)))
+        while len(self.keywords) > RECENT_SEARCH_LIMIT:
+            self.keywords.popitem(last=False)
+
+
+class RecentSearchBuffer:
+    """
+    최근 검색어 MRU + 쓰기 지연 버퍼
+    - 이벤트 루프 안에서만 사용 (add/recent/flush 모두 async 핸들러에서 호출)
+    - start()로 주기 저장 작업 시작, close()로 멈추고 남은 검색어 저장
+    """
+
+    def __init__(self):
+        self._recent = OrderedDict()   # (user_id, type) -> _Recent
+        self._pending = {}             # (user_id, type, keyword) -> 검색 시각
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+
+        self.added = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.flush_failures = 0
+
+    def _entry(self, key) -> _Recent:
+        entry = self._recent.get(key)
+        if entry is None:
+            entry = self._recent[key] = _Recent()
+            while len(self._recent) > MAX_USERS:
+                self._recent.popitem(last=False)
+        self._recent.move_to_end(key)
+        return entry
+
+    def add(self, user_id: str, med_type: str, keyword: str):
+        """검색어를 메모리 목록에 반영하고 저장 대기열에 넣음 (DB 작업 없음)"""
+        searched_at = datetime.datetime.now(datetime.timezone.utc)
+        self._entry((user_id, med_type)).touch(keyword, searched_at)
+        self._pending[(user_id, med_type, keyword)] = searched_at
+        self.added += 1
+        if len(self._pending) >= RECENT_SEARCH_FLUSH_MAX:
+            self._wakeup.set()
+
+    async def recent(self, user_id: str, med_type: str) -> list:
+        """최근 검색어 (최근 순), 처음이거나 RECENT_SEARCH_TTL이 지났으면 DB에서 읽어 합침"""
+        entry = self._entry((user_id, med_type))
+        if entry.loaded_at is None or time.monotonic() - entry.loaded_at > RECENT_SEARCH_TTL:
+            loaded_at = time.monotonic()
+            async with pool.connection() as conn:
+                cur = await conn.execute(LOAD_SQL, (user_id, med_type, RECENT_SEARCH_LIMIT))
+                rows = await cur.fetchall()
+            for row in reversed(rows):
+                entry.touch(row["keyword"], row["created_at"])
+            entry.loaded_at = loaded_at
+        return list(reversed(entry.keywords))
+
+    async def flush(self) -> int:
+        """대기 중인 검색어를 한 번에 저장 (실패하면 대기열에 되돌리고 예외를 다시 던짐)"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            try:
+                async with pool.connection() as conn:
+                    await conn.execute(FLUSH_SQL, (
+                        [key[0] for key in batch], [key[1] for key in batch], [key[2] for key in batch],
+                        list(batch.values()),
+                    ))
+                    await conn.commit()
+            except BaseException:
+                # 종료 중 취소되어도 되돌려 둠, 저장하는 사이에 같은 검색어가 다시 들어왔으면 그쪽이 더 최근
+                for key, searched_at in batch.items():
+                    self._pending.setdefault(key, searched_at)
+                self.flush_failures += 1
+                raise
+            self.flushes += 1
+            self.flushed += len(batch)
+            return len(batch)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=RECENT_SEARCH_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"⚠️ 최근 검색어 저장 실패 (다음 주기에 다시 시도): {e}")
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            count = await self.flush()
+            if count:
+                logger.info(f"🕘 종료 전 최근 검색어 {count}개 저장")
+        except Exception as e:
+            logger.error(f"❌ 종료 전 최근 검색어 저장 실패, {len(self._pending)}개 유실: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._recent),
+            "pending": len(self._pending),
+            "added": self.added,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+        }
+
+
+recent_searches = RecentSearchBuffer()
@@ -0,0 +1,553 @@
+"""
+입고/판매 내역 재고 원장 (migrations/006_stock_ledger.sql)
+
+POS에서 내보낸 입고/판매 파일은 기간이 겹치는 경우가 많다 (예: 입고상세내역_20250421-20250503 → _20250421-20250510).
+매번 재고현황 + 전체 기간 내역으로 다시 계산하지 않고, 파일마다 처음 보는 줄만 원장에 넣고
+그 줄의 수량만큼 약별 누적 재고(stock_balances)를 갱신한다.
+
+- 같은 파일(내용 해시)은 다시 반영하지 않음
+- 거래 내역(날짜가 있는 줄)은 line_hash로 이미 반영한 줄을 건너뜀
+- 기간 합계 보고서(전문약 약품별조제판매현황)는 기간으로 판단:
+  이미 반영한 기간 안이면 건너뛰고, 이전 보고서들을 모두 포함하는 더 긴 기간이면 이전 합계를 빼고 새 합계로 교체
+- 재고현황(snapshot)을 반영하면 그 기준일 이후 원장 줄만 다시 더해 누적 재고를 새로 만듦
+
+사용법 (server 폴더에서):
+    DATABASE_URL=... python stock_ledger.py ingest <user_id> <general|professional> <snapshot|purchase|sales> <파일> [시작일 [종료일]]
+    DATABASE_URL=... python stock_ledger.py balances <user_id> <general|professional>
+"""
+import asyncio
+import datetime
+import logging
+import sys
+from collections import namedtuple
+
+from starlette.concurrency import run_in_threadpool
+
+from database import pool
+from inventory_upload import UploadParseError
+from pos_export import DATE_COMPLETE_KINDS, EXPORT_SPECS, KIND_LABELS, content_hash, parse_export_file
+
+logger = logging.getLogger(__name__)
+
+
+class LedgerError(ValueError):
+    """원장에 반영할 수 없는 파일 (기간이 일부만 겹치는 합계 보고서 등, HTTP 409로 응답)"""
+
+
+# 원장 줄(delta) → 약별 누적 재고에 더함
+# - 코드 없는 줄(일반약, 전문약 매입)은 같은 이름의 기존 약(코드가 있는 행 우선)에 붙임
+# - 반환: 바뀐 약마다 이번에 더한 입고/판매 수량과 갱신된 재고
+APPLY_DELTA_SQL = """
+    WITH delta AS ({source}),
+    resolved AS (
+        SELECT d.kind, d.drug_name, d.quantity,
+               CASE WHEN d.drug_code = '' THEN COALESCE(b.drug_code, '') ELSE d.drug_code END AS drug_code
+        FROM delta d
+        LEFT JOIN LATERAL (
+            SELECT drug_code FROM stock_balances
+            WHERE user_id = %(user_id)s AND type = %(type)s AND drug_name = d.drug_name
+            ORDER BY drug_code = '', drug_code
+            LIMIT 1
+        ) b ON d.drug_code = ''
+    ), summed AS (
+        SELECT drug_name, drug_code,
+               COALESCE(sum(quantity) FILTER (WHERE kind = 'purchase'), 0) AS purchased,
+               COALESCE(sum(quantity) FILTER (WHERE kind = 'sales'), 0) AS sold
+        FROM resolved
+        GROUP BY drug_name, drug_code
+    ), upserted AS (
+        INSERT INTO stock_balances AS s (user_id, type, drug_name, drug_code, purchased, sold)
+        SELECT %(user_id)s, %(type)s, drug_name, drug_code, purchased, sold FROM summed
+        ON CONFLICT (user_id, type, drug_name, drug_code) DO UPDATE SET
+            purchased = s.purchased + EXCLUDED.purchased,
+            sold = s.sold + EXCLUDED.sold,
+            updated_at = now()
+        RETURNING drug_name, drug_code, balance
+    )
+    SELECT u.drug_name, u.drug_code, m.purchased, m.sold, u.balance
+    FROM upserted u JOIN summed m USING (drug_name, drug_code)
+    ORDER BY u.drug_name, u.drug_code
+"""
+
+# 파일 하나에서 새로 들어간 줄 (재고현황 기준일 이후만)
+FILE_LINES_SQL = """
+    SELECT kind, drug_name, drug_code, quantity FROM stock_ledger_lines
+    WHERE file_id = %(file_id)s AND (%(base_date)s::date IS NULL OR line_date > %(base_date)s::date)
+"""
+
+# 교체되는 합계 보고서의 줄 (빼기)
+SUPERSEDED_LINES_SQL = """
+    SELECT kind, drug_name, drug_code, -quantity AS quantity FROM stock_ledger_lines
+    WHERE file_id = ANY(%(file_ids)s::bigint[]) AND (%(base_date)s::date IS NULL OR line_date > %(base_date)s::date)
+"""
+
+# 재고현황 기준일 이후의 모든 줄 (재고현황을 새로 반영할 때, 같은 묶음에서 교체된 보고서의 줄은 제외)
+REPLAY_LINES_SQL = """
+    SELECT kind, drug_name, drug_code, quantity FROM stock_ledger_lines
+    WHERE user_id = %(user_id)s AND type = %(type)s AND line_date > %(base_date)s::date
+      AND file_id <> ALL(%(superseded)s::bigint[])
+"""
+
+# 이번에 새로 들어간 줄(+)과 교체된 합계 보고서의 줄(-)을 needs.present_count에 한 번에 반영
+# - 약 이름이 같은 needs 행 중 코드가 같은 행, 없으면 코드가 가장 작은 행에 붙임 (일반약/전문약 매입은 코드 없음)
+# - 반환: 바뀐 약마다 더한 입고/판매 수량과 반영 전/후 현재 재고, needs에 없는 약은 matched=false
+NEEDS_DELTA_SQL = """
+    WITH delta AS (
+        SELECT kind, drug_name, drug_code, quantity FROM stock_ledger_lines
+        WHERE file_id = ANY(%(file_ids)s::bigint[]) AND (%(base_date)s::date IS NULL OR line_date > %(base_date)s::date)
+        UNION ALL
+        SELECT kind, drug_name, drug_code, -quantity FROM stock_ledger_lines
+        WHERE file_id = ANY(%(superseded)s::bigint[]) AND (%(base_date)s::date IS NULL OR line_date > %(base_date)s::date)
+    ), summed AS (
+        SELECT drug_name, drug_code,
+               COALESCE(sum(quantity) FILTER (WHERE kind = 'purchase'), 0) AS purchased,
+               COALESCE(sum(quantity) FILTER (WHERE kind = 'sales'), 0) AS sold
+        FROM delta
+        GROUP BY drug_name, drug_code
+    ), resolved AS (
+        SELECT s.drug_name, s.drug_code AS line_code, n.drug_code, s.purchased, s.sold
+        FROM summed s
+        LEFT JOIN LATERAL (
+            SELECT drug_code FROM needs
+            WHERE user_id = %(user_id)s AND type = %(type)s AND drug_name = s.drug_name
+            ORDER BY drug_code = s.drug_code DESC, drug_code
+            LIMIT 1
+        ) n ON true
+    ), grouped AS (
+        SELECT drug_name, drug_code, sum(purchased) AS purchased, sum(sold) AS sold
+        FROM resolved
+        WHERE drug_code IS NOT NULL
+        GROUP BY drug_name, drug_code
+    ), updated AS (
+        UPDATE needs n SET present_count = COALESCE(n.present_count, 0) + g.purchased - g.sold
+        FROM grouped g
+        WHERE n.user_id = %(user_id)s AND n.type = %(type)s AND n.drug_name = g.drug_name AND n.drug_code = g.drug_code
+        RETURNING n.drug_name, n.drug_code, g.purchased, g.sold, n.present_count
+    )
+    SELECT true AS matched, drug_name, drug_code, purchased, sold,
+           present_count - purchased + sold AS before, present_count AS after
+    FROM updated
+    UNION ALL
+    SELECT false, drug_name, line_code, purchased, sold, NULL, NULL
+    FROM resolved
+    WHERE drug_code IS NULL
+    ORDER BY drug_name, drug_code
+"""
+
+# 내보내기의 거래처 → needs.supplier (주문 계획의 거래처별 묶음, migrations/007)
+# - 코드가 있는 줄은 이름과 코드가 같은 행, 코드 없는 줄(일반약, 전문약 매입)은 이름이 같은 모든 행
+# - 반환 rowcount: 거래처가 바뀐 needs 행 수
+SUPPLIERS_SQL = """
+    UPDATE needs n SET supplier = u.supplier
+    FROM unnest(%(names)s::text[], %(codes)s::text[], %(suppliers)s::text[]) AS u(drug_name, drug_code, supplier)
+    WHERE n.user_id = %(user_id)s AND n.type = %(type)s AND n.drug_name = u.drug_name
+      AND (u.drug_code = '' OR n.drug_code = u.drug_code)
+      AND n.supplier IS DISTINCT FROM u.supplier
+"""
+
+
+async def _lock_tenant(cur, user_id: str, med_type: str):
+    # 같은 약국/약종의 원장 반영은 한 번에 하나씩 (트랜잭션이 끝나면 풀림)
+    await cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"stock_ledger:{user_id}:{med_type}",))
+
+
+async def _base_date(cur, user_id: str, med_type: str):
+    # 가장 최근 재고현황 기준일 (없으면 None → 모든 줄을 더함)
+    await cur.execute("""
+        SELECT max(period_end) AS base_date FROM stock_ledger_files
+        WHERE user_id = %s AND type = %s AND kind = 'snapshot'
+    """, (user_id, med_type))
+    return (await cur.fetchone())["base_date"]
+
+
+async def _record_file(cur, user_id, med_type, kind, file_hash, file_name, period, line_count):
+    # 처음 보는 파일이면 id, 이미 반영한 파일이면 None
+    await cur.execute("""
+        INSERT INTO stock_ledger_files (user_id, type, kind, file_hash, file_name, period_start, period_end, line_count)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (user_id, type, kind, file_hash) DO NOTHING
+        RETURNING id
+    """, (user_id, med_type, kind, file_hash, file_name, *(period or (None, None)), line_count))
+    row = await cur.fetchone()
+    return row["id"] if row else None
+
+
+# 코드 없이 먼저 들어온 약(예: 재고현황에 없던 약의 매입)에 같은 이름의 코드 있는 행이 생기면 그 행으로 합침
+# - 반환: 합쳐진 약 이름과 합친 뒤의 (코드, 재고)
+FOLD_UNCODED_SQL = """
+    WITH target AS (
+        SELECT DISTINCT ON (drug_name) drug_name, drug_code FROM stock_balances
+        WHERE user_id = %(user_id)s AND type = %(type)s AND drug_name = ANY(%(names)s) AND drug_code <> ''
+        ORDER BY drug_name, drug_code
+    ), orphan AS (
+        DELETE FROM stock_balances o
+        USING target t
+        WHERE o.user_id = %(user_id)s AND o.type = %(type)s AND o.drug_name = t.drug_name AND o.drug_code = ''
+        RETURNING o.drug_name, o.base_count, o.purchased, o.sold
+    )
+    UPDATE stock_balances c SET
+        base_count = c.base_count + o.base_count,
+        purchased = c.purchased + o.purchased,
+        sold = c.sold + o.sold,
+        updated_at = now()
+    FROM orphan o JOIN target t USING (drug_name)
+    WHERE c.user_id = %(user_id)s AND c.type = %(type)s AND c.drug_name = t.drug_name AND c.drug_code = t.drug_code
+    RETURNING c.drug_name, c.drug_code, c.balance
+"""
+
+
+async def _apply_delta(cur, source: str, params: dict) -> list:
+    await cur.execute(APPLY_DELTA_SQL.format(source=source), params)
+    rows = await cur.fetchall()
+    if not rows:
+        return rows
+
+    await cur.execute(FOLD_UNCODED_SQL, {**params, "names": list({row["drug_name"] for row in rows})})
+    folded = {row["drug_name"]: row for row in await cur.fetchall()}
+    if not folded:
+        return rows
+
+    # 합쳐진 약은 코드 있는 행 기준으로 이번 변화량을 다시 묶음
+    changes = {}
+    for row in rows:
+        target = folded.get(row["drug_name"])
+        code = target["drug_code"] if target else row["drug_code"]
+        change = changes.setdefault((row["drug_name"], code), {
+            "drug_name": row["drug_name"], "drug_code": code, "purchased": 0.0, "sold": 0.0,
+            "balance": target["balance"] if target else row["balance"],
+        })
+        change["purchased"] += row["purchased"]
+        change["sold"] += row["sold"]
+    return list(changes.values())
+
+
+async def _stage_lines(cur, lines, with_hash: bool):
+    await cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS ledger_upload (
+            line_hash bytea,
+            line_date date,
+            drug_name text,
+            drug_code text,
+            quantity double precision
+        ) ON COMMIT DROP
+    """)
+    await cur.execute("TRUNCATE ledger_upload")  # 한 트랜잭션에서 여러 파일을 반영할 때
+    columns = ["line_hash", "line_date", "drug_name", "drug_code", "quantity"] if with_hash \
+        else ["drug_name", "drug_code", "quantity"]
+    async with cur.copy(f"COPY ledger_upload ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in lines[columns].itertuples(index=False, name=None):
+            await copy.write_row(row)
+
+
+async def _insert_lines(cur, params: dict) -> int:
+    # 이미 있는 줄(line_hash)은 건너뛰고 새로 들어간 줄 수를 반환
+    await cur.execute("""
+        INSERT INTO stock_ledger_lines (user_id, type, line_hash, file_id, kind, line_date, drug_name, drug_code, quantity)
+        SELECT %(user_id)s, %(type)s, line_hash, %(file_id)s, %(kind)s, line_date, drug_name, drug_code, quantity
+        FROM ledger_upload
+        ON CONFLICT (user_id, type, line_hash) DO NOTHING
+    """, params)
+    return cur.rowcount
+
+
+async def _record_suppliers(cur, user_id: str, med_type: str, lines) -> int:
+    # 약마다 가장 최근 줄의 거래처 (같은 날짜면 파일의 뒤쪽 줄), 빈 거래처는 무시
+    lines = lines[lines["supplier"] != ""]
+    if "line_date" in lines:
+        lines = lines.sort_values("line_date", kind="stable")
+    latest = lines.drop_duplicates(["drug_name", "drug_code"], keep="last")
+    if latest.empty:
+        return 0
+    await cur.execute(SUPPLIERS_SQL, {
+        "user_id": user_id, "type": med_type, "names": latest["drug_name"].tolist(),
+        "codes": latest["drug_code"].tolist(), "suppliers": latest["supplier"].tolist(),
+    })
+    return cur.rowcount
+
+
+async def _ingest_snapshot(cur, params: dict, lines) -> list:
+    # 누적 재고를 재고현황으로 다시 만들고, 기준일 이후 원장 줄을 더함
+    await _stage_lines(cur, lines, with_hash=False)
+    await cur.execute("DELETE FROM stock_balances WHERE user_id = %(user_id)s AND type = %(type)s", params)
+    await cur.execute("""
+        INSERT INTO stock_balances (user_id, type, drug_name, drug_code, base_count)
+        SELECT %(user_id)s, %(type)s, drug_name, drug_code, sum(quantity)
+        FROM ledger_upload
+        GROUP BY drug_name, drug_code
+    """, params)
+    return await _apply_delta(cur, REPLAY_LINES_SQL, params)
+
+
+async def _supersede_reports(cur, params: dict, period) -> tuple:
+    """
+    기간 합계 보고서의 기간 확인
+    - 이미 반영한 보고서 기간 안이면 (covered_by id, [])
+    - 새 기간이 이전 보고서들을 모두 포함하면 그 보고서들의 합계를 빼고 (None, [교체된 id])
+      (교체된 보고서의 줄은 needs 반영이 끝난 뒤 ingest_exports에서 지움)
+    - 일부만 겹치면 합계를 나눌 수 없으므로 LedgerError
+    """
+    await cur.execute("""
+        SELECT id, period_start, period_end FROM stock_ledger_files
+        WHERE user_id = %(user_id)s AND type = %(type)s AND kind = %(kind)s AND superseded_by IS NULL
+          AND period_start <= %(period_end)s AND period_end >= %(period_start)s
+          AND id <> %(file_id)s
+    """, params)
+    overlapping = await cur.fetchall()
+    start, end = period
+    for row in overlapping:
+        if row["period_start"] <= start and end <= row["period_end"]:
+            return row["id"], []
+    for row in overlapping:
+        if not (start <= row["period_start"] and row["period_end"] <= end):
+            raise LedgerError(
+                f"이미 반영한 {KIND_LABELS[params['kind']]} 합계({row['period_start']}~{row['period_end']})와 "
+                f"기간이 일부만 겹칩니다: {start}~{end}"
+            )
+
+    file_ids = [row["id"] for row in overlapping]
+    if file_ids:
+        await _apply_delta(cur, SUPERSEDED_LINES_SQL, {**params, "file_ids": file_ids})
+        await cur.execute("UPDATE stock_ledger_files SET superseded_by = %s WHERE id = ANY(%s)",
+                          (params["file_id"], file_ids))
+    return None, file_ids
+
+
+async def _prefetch(conn, user_id: str, med_type: str, kind: str, file_hash: bytes, dated: bool):
+    """
+    파싱 전에 확인 (잠금 없이 읽기만, 늦게 반영된 다른 업로드는 line_hash로 걸러짐)
+    - 이미 반영한 파일인지
+    - 판매 내역(DATE_COMPLETE_KINDS)이면 이미 전부 반영한 날짜 범위: 이전 파일마다 [시작일, 종료일)
+      (POS 기간 내보내기는 종료일 전날까지는 완결, 종료일 당일은 내보낸 시각 이후 거래가 빠졌을 수 있음)
+    """
+    async with conn.cursor() as cur:
+        await cur.execute("""
+            SELECT 1 FROM stock_ledger_files
+            WHERE user_id = %s AND type = %s AND kind = %s AND file_hash = %s
+        """, (user_id, med_type, kind, file_hash))
+        duplicate = await cur.fetchone() is not None
+        ranges = []
+        if dated and not duplicate:
+            await cur.execute("""
+                SELECT period_start, period_end FROM stock_ledger_files
+                WHERE user_id = %s AND type = %s AND kind = %s AND period_start < period_end
+                ORDER BY period_start
+            """, (user_id, med_type, kind))
+            ranges = [(row["period_start"], row["period_end"]) for row in await cur.fetchall()]
+    await conn.rollback()
+    return duplicate, ranges
+
+
+# 파싱까지 끝난 파일 (file_hash가 None이면 이미 반영한 파일이라 result만 있음)
+PreparedFile = namedtuple("PreparedFile", ["kind", "file_hash", "file_name", "lines", "period", "result"])
+
+
+def _empty_result(kind: str, status: str) -> dict:
+    return {"status": status, "kind": kind, "file_id": None, "period": None, "lines": 0, "new_lines": 0,
+            "skipped_by_date": 0, "superseded": [], "suppliers": 0, "invalid": [], "changes": []}
+
+
+async def check_file(conn, user_id: str, med_type: str, kind: str, data: bytes):
+    """파싱 전 확인 → (내용 해시, 이미 반영한 파일인지, 파싱 중에 뺄 날짜 범위)"""
+    spec = EXPORT_SPECS.get((med_type, kind))
+    if spec is None:
+        raise LedgerError(f"지원하지 않는 파일 종류입니다: {med_type}/{kind}")
+    file_hash = content_hash(data)
+    duplicate, ranges = await _prefetch(conn, user_id, med_type, kind, file_hash,
+                                        spec.date is not None and kind in DATE_COMPLETE_KINDS)
+    return file_hash, duplicate, ranges
+
+
+def prepare_parsed(med_type: str, kind: str, file_hash: bytes, file_name, parsed) -> PreparedFile:
+    """파싱 결과(ParsedExport) → 원장에 넣을 PreparedFile (기간 확인)"""
+    period = parsed.period
+    if kind == "snapshot" and period is None:
+        today = datetime.date.today()
+        period = (today, today)
+    if kind != "snapshot" and EXPORT_SPECS[(med_type, kind)].date is None and period is None:
+        raise LedgerError(
+            f"{KIND_LABELS[kind]} 합계 보고서는 기간이 필요합니다 (파일 이름의 _YYYYMMDD-YYYYMMDD 또는 시작일/종료일 지정)"
+        )
+
+    result = {
+        **_empty_result(kind, "ingested"),
+        "period": [period[0].isoformat(), period[1].isoformat()] if period else None,
+        "lines": len(parsed.lines) + parsed.skipped,
+        "skipped_by_date": parsed.skipped,
+        "invalid": parsed.invalid.to_dict(orient="records"),
+    }
+    return PreparedFile(kind, file_hash, file_name, parsed.lines, period, result)
+
+
+def duplicate_file(kind: str, file_name=None) -> PreparedFile:
+    # 이미 반영한 파일 (파싱하지 않음)
+    return PreparedFile(kind, None, file_name, None, None, _empty_result(kind, "duplicate_file"))
+
+
+async def _prepare_file(conn, user_id: str, med_type: str, kind: str, data: bytes, file_name=None,
+                        period=None) -> PreparedFile:
+    # 중복 파일 확인 → 파싱 (워커 스레드, 이미 반영한 날짜의 줄은 파싱 중에 뺌)
+    file_hash, duplicate, ranges = await check_file(conn, user_id, med_type, kind, data)
+    if duplicate:
+        return duplicate_file(kind, file_name)
+    parsed = await run_in_threadpool(parse_export_file, data, med_type, kind, file_name, period, ranges)
+    return prepare_parsed(med_type, kind, file_hash, file_name, parsed)
+
+
+async def _ingest_one(cur, user_id: str, med_type: str, prepared: PreparedFile, base_date,
+                      superseded: list) -> dict:
+    # 잠금을 잡은 트랜잭션 안에서 파일 하나를 원장에 반영 (커밋은 호출한 쪽에서)
+    kind, lines, period, result = prepared.kind, prepared.lines, prepared.period, dict(prepared.result)
+    if kind == "snapshot" and base_date is not None and period[1] < base_date:
+        raise LedgerError(f"더 최근 재고현황({base_date})이 이미 반영되어 있습니다: {period[1]}")
+
+    file_id = await _record_file(cur, user_id, med_type, kind, prepared.file_hash, prepared.file_name, period,
+                                 result["lines"])
+    if file_id is None:
+        return {**result, "status": "duplicate_file"}
+
+    params = {"user_id": user_id, "type": med_type, "kind": kind, "file_id": file_id, "base_date": base_date,
+              "period_start": period and period[0], "period_end": period and period[1], "superseded": superseded}
+    result["file_id"] = file_id
+
+    if kind == "snapshot":
+        result["new_lines"] = len(lines)
+        result["changes"] = await _ingest_snapshot(cur, {**params, "base_date": period[1]}, lines)
+    else:
+        if EXPORT_SPECS[(med_type, kind)].date is None:
+            covered_by, result["superseded"] = await _supersede_reports(cur, params, period)
+            if covered_by is not None:
+                await cur.execute("UPDATE stock_ledger_files SET superseded_by = %s WHERE id = %s",
+                                  (covered_by, file_id))
+                return {**result, "status": "covered"}
+        if len(lines):
+            await _stage_lines(cur, lines, with_hash=True)
+            result["new_lines"] = await _insert_lines(cur, params)
+        if result["new_lines"] or result["superseded"]:
+            result["changes"] = await _apply_delta(cur, FILE_LINES_SQL, params)
+
+    await cur.execute("UPDATE stock_ledger_files SET new_line_count = %s WHERE id = %s",
+                      (result["new_lines"], file_id))
+    return result
+
+
+async def ingest_prepared(conn, user_id: str, med_type: str, prepared, sync_needs: bool = False) -> dict:
+    """
+    파싱까지 끝난 파일들(PreparedFile)을 순서대로 원장에 반영 (전체가 한 트랜잭션)
+    - 거래처 열이 있는 파일은 약별 최근 거래처를 needs.supplier에 기록 (이미 반영한 줄이어도, 결과의 suppliers)
+    - sync_needs=True면 이번에 새로 들어간 줄만큼 needs.present_count도 같은 트랜잭션에서 SQL 한 번으로 갱신
+      (같은 파일/이미 반영한 줄은 다시 더하지 않음, 재고현황 파일은 함께 올릴 수 없음)
+    - 반환: {"files": 파일별 결과, "needs": 약별 반영 내역 (sync_needs일 때만, NEEDS_DELTA_SQL)}
+    """
+    if sync_needs and any(item.kind == "snapshot" for item in prepared):
+        raise LedgerError("재고현황은 재고 업로드(/upload-inventory)로 반영해주세요.")
+
+    results, superseded, needs = [], [], None
+    try:
+        async with conn.cursor() as cur:
+            await _lock_tenant(cur, user_id, med_type)
+            base_date = await _base_date(cur, user_id, med_type)
+            for item in prepared:
+                if item.file_hash is None:
+                    results.append(item.result)
+                    continue
+                result = await _ingest_one(cur, user_id, med_type, item, base_date, superseded)
+                if result["status"] != "duplicate_file" and "supplier" in item.lines:
+                    result["suppliers"] = await _record_suppliers(cur, user_id, med_type, item.lines)
+                if item.kind == "snapshot" and result["status"] == "ingested":
+                    base_date = item.period[1]
+                superseded.extend(result["superseded"])
+                results.append(result)
+
+            if sync_needs:
+                file_ids = [result["file_id"] for result in results if result["new_lines"]]
+                if file_ids or superseded:
+                    await cur.execute(NEEDS_DELTA_SQL, {"user_id": user_id, "type": med_type, "file_ids": file_ids,
+                                                        "superseded": superseded, "base_date": base_date})
+                    needs = await cur.fetchall()
+                else:
+                    needs = []
+            if superseded:
+                await cur.execute("DELETE FROM stock_ledger_lines WHERE file_id = ANY(%s)", (superseded,))
+        await conn.commit()
+    except Exception:
+        await conn.rollback()
+        raise
+
+    for result in results:
+        logger.info(f"📒 원장 반영: {user_id}/{med_type}/{result['kind']} 새 줄 {result['new_lines']}/{result['lines']}, "
+                    f"바뀐 약 {len(result['changes'])}")
+    return {"files": results, "needs": needs}
+
+
+async def ingest_exports(conn, user_id: str, med_type: str, files, sync_needs: bool = False) -> dict:
+    """
+    POS 내보내기 파일 여러 개를 순서대로 원장에 반영 (전체가 한 트랜잭션, ingest_prepared 참고)
+    - files: [(kind, data, file_name, period), ...], 각 값은 ingest_export와 같음
+    """
+    if sync_needs and any(kind == "snapshot" for kind, *_ in files):
+        raise LedgerError("재고현황은 재고 업로드(/upload-inventory)로 반영해주세요.")
+
+    # 파싱은 모두 잠금 밖에서 먼저 (같은 약국의 다른 반영을 기다리게 하지 않음)
+    prepared = [await _prepare_file(conn, user_id, med_type, *file) for file in files]
+    return await ingest_prepared(conn, user_id, med_type, prepared, sync_needs)
+
+
+async def ingest_export(conn, user_id: str, med_type: str, kind: str, data: bytes,
+                        file_name: str = None, period=None) -> dict:
+    """
+    POS 내보내기 파일 하나를 원장에 반영 (전체가 한 트랜잭션)
+    - kind: snapshot(재고현황) / purchase(입고·매입) / sales(판매·조제)
+    - period: (시작일, 종료일), 날짜 없는 파일에만 필요 (생략 시 파일 이름에서, 재고현황은 없으면 오늘)
+    - 파싱은 워커 스레드에서, DB 작업은 파일에서 새로 나온 줄 수에 비례
+      (이미 반영한 날짜의 줄은 파싱 중에 빼고, 나머지는 line_hash로 걸러냄)
+    - 반환 changes: 이번에 재고가 바뀐 약마다 더한 입고/판매 수량과 갱신된 재고
+    """
+    result = await ingest_exports(conn, user_id, med_type, [(kind, data, file_name, period)])
+    return result["files"][0]
+
+
+async def get_balances(conn, user_id: str, med_type: str) -> list:
+    """약별 누적 재고 (재고현황 개수, 이후 입고/판매 합계, 현재 재고)"""
+    async with conn.cursor() as cur:
+        await cur.execute("""
+            SELECT drug_name, drug_code, base_count, purchased, sold, balance, updated_at
+            FROM stock_balances
+            WHERE user_id = %s AND type = %s
+            ORDER BY drug_name COLLATE "C", drug_code COLLATE "C"
+        """, (user_id, med_type))
+        return await cur.fetchall()
+
+
+async def _main(argv):
+    command, user_id, med_type, *rest = argv
+    await pool.open()
+    try:
+        async with pool.connection() as conn:
+            if command == "ingest":
+                kind, path, *dates = rest
+                dates = [datetime.date.fromisoformat(d) for d in dates]
+                period = (dates[0], dates[-1]) if dates else None
+                with open(path, "rb") as f:
+                    data = f.read()
+                result = await ingest_export(conn, user_id, med_type, kind, data, path.rsplit("/", 1)[-1], period)
+                changes = result.pop("changes")
+                print(result)
+                for row in changes[:20]:
+                    print(f"  {row['drug_name']} ({row['drug_code']}): +{row['purchased']:g} -{row['sold']:g} → {row['balance']:g}")
+                if len(changes) > 20:
+                    print(f"  ... 외 {len(changes) - 20}개")
+            else:
+                for row in await get_balances(conn, user_id, med_type):
+                    print(f"{row['drug_name']},{row['drug_code']},{row['base_count']:g},{row['purchased']:g},"
+                          f"{row['sold']:g},{row['balance']:g}")
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] not in ("ingest", "balances"):
+        sys.exit(__doc__)
+    try:
+        asyncio.run(_main(sys.argv[1:]))
+    except (LedgerError, UploadParseError) as e:
+        sys.exit(f"❌ {e}")
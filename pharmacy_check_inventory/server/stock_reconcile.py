@@ -0,0 +1,140 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# 전문약 POS 내보내기 파일의 열 이름 → 계산용 열 이름
+PURCHASE_COLUMNS = {"약 품 명": "약품명", "수량": "구매수량"}                      # 약품 매입 현황
+SALES_COLUMNS = {"약품명": "약품명", "약품코드": "약품코드", "조제수량": "판매수량"}  # 약품별조제판매현황
+STOCK_COLUMNS = {"약품명": "약품명", "약품코드": "약품코드", "개수": "개수"}        # 전문약 재고현황
+
+KEYS = ["약품명", "약품코드"]
+RESULT_COLUMNS = ["약품명", "약품코드", "개수", "구매수량", "판매수량", "최종재고"]
+INVALID_COLUMNS = ["파일", "열", "행", "값"]
+
+# table: 약별 최종 재고 (RESULT_COLUMNS)
+# invalid: 숫자로 읽을 수 없어 0으로 계산한 칸 목록 (INVALID_COLUMNS, 행 = 원본 DataFrame 인덱스)
+ReconcileResult = namedtuple("ReconcileResult", ["table", "invalid"])
+
+
+def _factorize(values: pd.Series):
+    # 같은 문자열이 수없이 반복되는 내보내기 파일이므로 고유값만 한 번씩 처리하고 정수 코드로 되돌림
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return codes, pd.Series(np.asarray(uniques, dtype=object))
+
+
+def _to_categorical(codes: np.ndarray, labels: pd.Series) -> pd.Categorical:
+    # 정리 후 같아진 고유값(" A"와 "A" 등)을 합치고, categories는 문자열 순으로 정렬
+    label_codes, categories = pd.factorize(labels.to_numpy(dtype=object), sort=True)
+    return pd.Categorical.from_codes(label_codes[codes], categories=categories)
+
+
+def clean_names(values: pd.Series) -> pd.Categorical:
+    # 빈 값 → "", 앞뒤 공백 제거
+    codes, uniques = _factorize(values)
+    return _to_categorical(codes, uniques.fillna("").astype(str).str.strip())
+
+
+def normalize_codes(values: pd.Series) -> pd.Categorical:
+    """
+    약품코드 정규화: "644,309,090" / 644309090.0 → "644309090"
+    숫자로 읽을 수 없는 코드는 공백만 제거한 원문, 빈 값은 ""
+    """
+    codes, uniques = _factorize(values)
+    text = uniques.fillna("").astype(str).str.strip()
+    numbers = pd.to_numeric(text.str.replace(",", "", regex=False), errors="coerce").astype("float64")
+    finite = np.isfinite(numbers.to_numpy())
+    text[finite] = numbers[finite].astype("int64").astype(str)
+    return _to_categorical(codes, text)
+
+
+def parse_numbers(values: pd.Series, source: str, column: str, invalid: list) -> np.ndarray:
+    """
+    천 단위 쉼표가 들어간 수량 열을 숫자로 변환
+    - 빈 값은 0
+    - 숫자로 읽을 수 없는 값도 0으로 계산하고 (파일, 열, 행, 값)을 invalid에 모아 둠
+    """
+    codes, uniques = _factorize(values)
+    text = uniques.astype("string").str.replace(",", "", regex=False).str.strip()
+    numbers = pd.to_numeric(text, errors="coerce").astype("float64")
+    bad = (numbers.isna() & text.notna() & (text != "")).to_numpy()[codes]
+    if bad.any():
+        invalid.append(pd.DataFrame({
+            "파일": source,
+            "열": column,
+            "행": values.index[bad],
+            "값": values[bad].astype(str).to_numpy(),
+        }))
+    return numbers.fillna(0.0).to_numpy()[codes]
+
+
+def _prepare(df: pd.DataFrame, columns: dict, source: str, invalid: list) -> pd.DataFrame:
+    # 필요한 열만 이름을 바꿔 꺼내고, 숫자만 있는 약품명(합계/번호 행)은 제외
+    frame = pd.DataFrame(index=df.index)
+    for original, column in columns.items():
+        if column == "약품명":
+            frame[column] = clean_names(df[original])
+        elif column == "약품코드":
+            frame[column] = normalize_codes(df[original])
+        else:
+            frame[column] = parse_numbers(df[original], source, original, invalid)
+    digits = np.asarray(frame["약품명"].cat.categories.str.isdigit(), dtype=bool)
+    return frame[~digits[frame["약품명"].cat.codes]]
+
+
+def _share_categories(frames: list, column: str) -> None:
+    # 세 파일의 키를 같은 categorical dtype으로 맞춰 groupby/merge가 정수 코드로 동작하도록 함
+    # (categories는 정렬해 두어 sort=True 집계가 문자열 순서와 같게)
+    present = [frame for frame in frames if column in frame]
+    categories = np.sort(pd.unique(np.concatenate([f[column].cat.categories.to_numpy(dtype=object) for f in present])))
+    for frame in present:
+        frame[column] = frame[column].cat.set_categories(categories)
+
+
+def reconcile_professional(stock_df: pd.DataFrame, purchase_df: pd.DataFrame,
+                           sales_df: pd.DataFrame) -> ReconcileResult:
+    """
+    전문약 재고 계산: 최종재고 = 재고현황 개수 + 매입 수량 - 조제 수량
+    - 재고/조제는 (약품명, 약품코드), 매입은 약품명 기준으로 먼저 집계한 뒤 한 번만 merge
+    - 결과 순서: 재고현황 순서 → 재고현황에 없는 조제 약 (약품명, 약품코드 순)
+    - 재고현황에 같은 약이 여러 줄이면 개수를 합쳐 한 줄로
+    """
+    invalid = []
+    stock = _prepare(stock_df, STOCK_COLUMNS, "재고", invalid)
+    purchase = _prepare(purchase_df, PURCHASE_COLUMNS, "매입", invalid)
+    sales = _prepare(sales_df, SALES_COLUMNS, "조제판매", invalid)
+    _share_categories([stock, purchase, sales], "약품명")
+    _share_categories([stock, sales], "약품코드")
+
+    stock_sum = stock.groupby(KEYS, sort=False, observed=True)["개수"].sum().reset_index()
+    sales_sum = sales.groupby(KEYS, observed=True)["판매수량"].sum().reset_index()
+    purchase_sum = purchase.groupby("약품명", observed=True)["구매수량"].sum().reset_index()
+
+    # 재고 키 + 신규 조제 키 (처음 나온 순서 유지, 빠진 수량은 0)
+    balances = (
+        pd.concat([stock_sum, sales_sum], ignore_index=True)
+        .groupby(KEYS, sort=False, observed=True)[["개수", "판매수량"]]
+        .sum()
+        .reset_index()
+    )
+    merged = balances.merge(purchase_sum, on="약품명", how="left")
+    merged["구매수량"] = merged["구매수량"].fillna(0.0)
+    merged["최종재고"] = merged["개수"] + merged["구매수량"] - merged["판매수량"]
+
+    table = merged[RESULT_COLUMNS]
+    table = table.assign(약품명=table["약품명"].astype(str), 약품코드=table["약품코드"].astype(str))
+    table = table[table["약품명"] != ""].reset_index(drop=True)
+
+    report = pd.concat(invalid, ignore_index=True) if invalid else pd.DataFrame(columns=INVALID_COLUMNS)
+    return ReconcileResult(table, report)
+
+
+def read_professional_files(purchase_path, sales_path, stock_path):
+    """POS 내보내기 CSV 세 개를 계산에 필요한 열만, 원문 문자열 그대로 읽음"""
+    def read(path, columns):
+        return pd.read_csv(path, dtype=str, usecols=lambda column: column in columns)
+    return read(stock_path, STOCK_COLUMNS), read(purchase_path, PURCHASE_COLUMNS), read(sales_path, SALES_COLUMNS)
+
+
+def reconcile_professional_files(purchase_path, sales_path, stock_path) -> ReconcileResult:
+    return reconcile_professional(*read_professional_files(purchase_path, sales_path, stock_path))
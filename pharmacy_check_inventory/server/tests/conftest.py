@@ -0,0 +1,34 @@
+"""
+server 모듈 단위 테스트 공통 설정
+
+- server 폴더의 모듈은 평평하게(import main) 불러오므로 server 폴더를 sys.path에 추가
+- database.py는 DATABASE_URL이 없으면 바로 실패하므로 더미 값을 넣어 둠 (풀은 열지 않으므로 DB에 연결하지 않음)
+- 여러 테스트에서 쓰는 행 생성 함수(make_rows)는 from conftest import make_rows로 사용
+"""
+import os
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/unit-tests")
+
+
+def make_rows(n, seed=0):
+    """
+    needs 테이블 조회 결과(dict_row)와 같은 모양의 무작위 행 n개
+    - 이름 중복과 빈 값(None)을 섞어 정렬/통 수 계산/재고 부족 분류의 경계를 함께 확인
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i + 1, "user_id": "test", "type": "professional",
+            "drug_name": rng.choice([f"약품{rng.randrange(n // 4 + 1):04d}정"] * 4 + [None]),
+            "drug_code": rng.choice([str(rng.randrange(10**8, 10**9))] * 4 + [None]),
+            "present_count": rng.choice([float(rng.randrange(0, 60)), float(rng.randrange(0, 500)), None]),
+            "need_count": rng.choice([float(rng.randrange(0, 50))] * 3 + [None]),
+            "location": rng.choice(["미지정", "A-1", None]),
+            "unit_count": rng.choice([1.0, 10.0, 30.0, 100.0, None]),
+        }
+        for i in range(n)
+    ]
@@ -0,0 +1,51 @@
+from autocomplete_index import NameIndex, build_name_index, to_chosung
+
+NAMES = ["가스티인정", "타이레놀정500mg", "게보린정", "가스활명수", "스티렌정", "어린이타이레놀"]
+
+
+def test_to_chosung_keeps_non_hangul():
+    assert to_chosung("가스티인") == "ㄱㅅㅌㅇ"
+    assert to_chosung("타이레놀500mg") == "ㅌㅇㄹㄴ500mg"
+
+
+def test_search_ranks_prefix_matches_first():
+    index = NameIndex(NAMES)
+    assert index.search("타이레놀", 10) == ["타이레놀정500mg", "어린이타이레놀"]
+
+
+def test_search_is_case_insensitive_and_respects_limit():
+    index = NameIndex(NAMES + ["ABC연고"])
+    assert index.search("abc", 10) == ["ABC연고"]
+    # 일치 위치가 앞선 순 → 이름 순
+    assert index.search("정", 2) == ["게보린정", "스티렌정"]
+
+
+def test_search_by_chosung():
+    index = NameIndex(NAMES)
+    assert index.search("ㄱㅅ", 10) == ["가스티인정", "가스활명수"]
+    assert index.search("ㅅㅌ", 10) == ["스티렌정", "가스티인정"]
+
+
+def test_search_mixed_chosung_requires_syllables_to_match():
+    index = NameIndex(NAMES)
+    # 완성형 글자(가)는 그대로 일치해야 하므로 게보린정(ㄱㅂ)과 달리 가스*만
+    assert index.search("가ㅅ", 10) == ["가스티인정", "가스활명수"]
+    assert index.search("ㄱ스ㅌ", 10) == ["가스티인정"]
+    assert index.search("게ㅅ", 10) == []
+
+
+def test_search_matches_plain_scan():
+    index = NameIndex(NAMES)
+    for query in ["정", "스", "레놀", "없는약", "500"]:
+        expected = sorted((name.find(query), name) for name in NAMES if query in name)
+        assert index.search(query, 10) == [name for _, name in expected]
+
+
+def test_empty_query_and_names():
+    assert NameIndex(NAMES).search("  ", 10) == []
+    assert NameIndex([]).search("가", 10) == []
+
+
+def test_build_name_index_dedupes_and_skips_empty_names():
+    index = build_name_index([{"drug_name": "게보린정"}, {"drug_name": None}, {"drug_name": "게보린정"}])
+    assert index.names == ["게보린정"]
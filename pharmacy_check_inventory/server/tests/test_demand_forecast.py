@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from demand_forecast import (ALPHA, DEMAND_LEAD_DAYS, DEMAND_REVIEW_DAYS, DEMAND_SAFETY_Z, daily_matrix,
+                             reorder_points, smooth)
+
+FIRST_DAY = np.datetime64("2025-05-01")
+
+
+def days(*offsets):
+    return FIRST_DAY + np.array(offsets, dtype="timedelta64[D]")
+
+
+def test_daily_matrix_sums_lines_per_day():
+    daily = daily_matrix(np.array([0, 0, 1]), days(0, 0, 2), days(0, 0, 2), np.array([2.0, 3.0, 4.0]),
+                         FIRST_DAY, 3, 2)
+    assert daily.tolist() == [[5.0, 0.0, 0.0], [0.0, 0.0, 4.0]]
+
+
+def test_daily_matrix_spreads_period_and_clips_window():
+    # 4일 기간 합계 8개 → 하루 2개, 창(1~3일째) 밖의 날은 버림
+    daily = daily_matrix(np.array([0, 1]), days(-1, 5), days(2, 6), np.array([8.0, 1.0]), FIRST_DAY + 1, 3, 2)
+    np.testing.assert_allclose(daily, [[2.0, 2.0, 0.0], [0.0, 0.0, 0.0]])
+
+
+def scalar_smooth(series, alpha=ALPHA):
+    m = v = 0.0
+    for x in series:
+        diff = x - m
+        m += alpha * diff
+        v = (1 - alpha) * (v + alpha * diff * diff)
+    return m, v
+
+
+def test_smooth_matches_scalar_recurrence_and_is_incremental():
+    rng = np.random.default_rng(0)
+    daily = rng.integers(0, 10, size=(5, 40)).astype(float)
+    mean, var = smooth(np.zeros(5), np.zeros(5), daily)
+    expected = np.array([scalar_smooth(series) for series in daily])
+    np.testing.assert_allclose(mean, expected[:, 0])
+    np.testing.assert_allclose(var, expected[:, 1])
+
+    # 새 날짜만 이어서 계산해도 처음부터 다시 계산한 것과 같음
+    split_mean, split_var = smooth(*smooth(np.zeros(5), np.zeros(5), daily[:, :25]), daily[:, 25:])
+    np.testing.assert_allclose(split_mean, mean)
+    np.testing.assert_allclose(split_var, var)
+
+
+def test_reorder_points_bias_correction():
+    horizon = DEMAND_LEAD_DAYS + DEMAND_REVIEW_DAYS
+    # 0에서 시작한 평활 평균은 작게 나오지만, 매일 3개씩 팔린 약은 며칠만 반영했어도 하루 3개로 보정
+    for n in (1, 5, 100):
+        mean, _ = smooth(np.zeros(1), np.zeros(1), np.full((1, n), 3.0))
+        assert mean[0] < 3.0
+        assert reorder_points(mean, np.zeros(1), n).tolist() == [np.ceil(3.0 * horizon)]
+
+
+def test_reorder_points_adds_safety_stock():
+    horizon = DEMAND_LEAD_DAYS + DEMAND_REVIEW_DAYS
+    mean, var = np.array([2.0, 2.0, 0.0]), np.array([0.0, 4.0, 0.0])
+    points = reorder_points(mean, var, 0)
+    assert points[0] == np.ceil(2.0 * horizon)
+    assert points[1] == np.ceil(2.0 * horizon + DEMAND_SAFETY_Z * np.sqrt(4.0 * horizon))
+    assert points[2] == 0
+
+
+@pytest.mark.parametrize("n", [1, 10])
+def test_reorder_points_never_negative(n):
+    assert reorder_points(np.array([-1.0]), np.array([-0.5]), n).tolist() == [0.0]
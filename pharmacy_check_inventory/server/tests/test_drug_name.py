@@ -0,0 +1,46 @@
+import pytest
+
+from drug_name import DrugNameParts, normalize_ingredient, parse_drug_name, parse_strength
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("15mg", (15.0, "mg")),
+    ("0.1g", (100.0, "mg")),
+    ("500mcg", (0.5, "mg")),
+    ("2.5 ㎎", (2.5, "mg")),
+    ("5%", (5.0, "%")),
+    ("20mL", (20.0, "mL")),
+    ("1000IU", (1000.0, "IU")),
+    ("2MG", (2.0, "mg")),
+    ("1정", (None, None)),
+    ("", (None, None)),
+    (None, (None, None)),
+])
+def test_parse_strength(text, expected):
+    assert parse_strength(text) == expected
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("인데놀정10mg(프로프라놀롤염산염)_(10mg/1정)", ("인데놀정", "프로프라놀롤염산염", 10.0, "mg")),
+    ("레바진정(레바미피드)_(0.1g/1정)", ("레바진정", "레바미피드", 100.0, "mg")),
+    ("겐트리손크림_(20g)", ("겐트리손크림", None, None, None)),
+    ("타이레놀정500mg", ("타이레놀정", None, 500.0, "mg")),
+    # 복합제 성분은 공백을 없애고 소문자로
+    ("세비카정(Amlodipine - Olmesartan)", ("세비카정", "amlodipine-olmesartan", None, None)),
+    # 수출명/1회용 괄호는 성분이 아님
+    ("티어린프리점안액(1회용)(히알루론산나트륨)", ("티어린프리점안액", "히알루론산나트륨", None, None)),
+    # 규격이 한 단위당 함량이 아니면 함량으로 쓰지 않음
+    ("훼스탈플러스정(판크레아틴)_(30정)", ("훼스탈플러스정", "판크레아틴", None, None)),
+])
+def test_parse_drug_name(name, expected):
+    assert parse_drug_name(name) == DrugNameParts(*expected)
+
+
+@pytest.mark.parametrize("name", [None, "", "   ", float("nan")])
+def test_parse_drug_name_empty(name):
+    assert parse_drug_name(name) == DrugNameParts(None, None, None, None)
+
+
+def test_normalize_ingredient():
+    assert normalize_ingredient(" Metformin  HCl ") == "metforminhcl"
+    assert normalize_ingredient(None) == ""
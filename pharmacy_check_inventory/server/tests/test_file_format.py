@@ -0,0 +1,52 @@
+import codecs
+import io
+
+from file_format import FileFormat, OLE2_MAGIC, SNIFF_BYTES, ZIP_MAGIC, detect_encoding, sniff_file, sniff_format
+
+CSV_TEXT = "약품코드,약품명,수량\n641900010,타이레놀정500mg,10\n643300170,게보린정,3\n"
+
+
+def test_binary_signatures():
+    assert sniff_format(OLE2_MAGIC + b"\x00" * 100) == FileFormat("xls", None, None)
+    assert sniff_format(ZIP_MAGIC + b"\x00" * 100) == FileFormat("xlsx", None, None)
+
+
+def test_html_table_saved_as_xls():
+    head = "  <html><body><table><tr><td>약품명</td></tr></table>".encode("cp949")
+    assert sniff_format(head) == FileFormat("html", "cp949", None)
+
+
+def test_csv_encodings():
+    assert sniff_format(codecs.BOM_UTF8 + CSV_TEXT.encode("utf-8")) == FileFormat("csv", "utf-8-sig", ",")
+    assert sniff_format(CSV_TEXT.encode("utf-8")) == FileFormat("csv", "utf-8", ",")
+    assert sniff_format(CSV_TEXT.encode("cp949")) == FileFormat("csv", "cp949", ",")
+
+
+def test_csv_delimiters():
+    for delimiter in "\t;|":
+        head = CSV_TEXT.replace(",", delimiter).encode("utf-8")
+        assert sniff_format(head).delimiter == delimiter
+
+
+def test_ragged_csv_falls_back_to_header_line():
+    # 요약 행 때문에 열 개수가 맞지 않아도 헤더 줄의 구분자로 판단
+    head = "약품코드\t약품명\t수량\t금액\n1\t가\t2\t3\n합계\t\t\n\n총계 5건\n".encode("utf-8")
+    assert sniff_format(head).delimiter == "\t"
+
+
+def test_truncated_multibyte_character_keeps_encoding():
+    # 앞부분만 잘라 왔을 때 마지막 한글이 잘려 있어도 UTF-8로 판별
+    head = (CSV_TEXT * 10).encode("utf-8")
+    head = head[:head.rfind("게".encode("utf-8")) + 1]
+    assert detect_encoding(head) == "utf-8"
+
+
+def test_unrecognized_content():
+    assert sniff_format(b"") is None
+    assert sniff_format(b"just some words without separators") is None
+
+
+def test_sniff_file_rewinds():
+    fileobj = io.BytesIO(CSV_TEXT.encode("utf-8") * (SNIFF_BYTES // len(CSV_TEXT)))
+    assert sniff_file(fileobj).kind == "csv"
+    assert fileobj.tell() == 0
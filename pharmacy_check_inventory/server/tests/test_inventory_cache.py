@@ -0,0 +1,222 @@
+import asyncio
+
+import pytest
+
+import inventory_cache as cache_module
+from inventory_cache import InventoryCache, SnapshotDerivedCache, _estimate_size, fetch_inventory
+
+
+def make_snapshot(n, name="가"):
+    return [{"drug_name": f"{name}{i}", "drug_code": str(i), "need_count": i} for i in range(n)]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+class FakePool:
+    """inventory_cache.pool 대신: (user_id, type)별 needs 행을 dict로, 조회할 때마다 새 리스트 반환"""
+
+    def __init__(self, table):
+        self.table = table
+        self.loads = 0
+        self.during_load = None  # 조회 도중(커밋 전 다른 요청의 쓰기 등)에 실행할 함수
+
+    def connection(self):
+        pool = self
+
+        class Cursor:
+            def __init__(self, rows):
+                self.rows = rows
+
+            async def fetchall(self):
+                return self.rows
+
+        class Connection:
+            async def execute(self, sql, params):
+                pool.loads += 1
+                if pool.during_load is not None:
+                    pool.during_load()
+                return Cursor([dict(row) for row in pool.table[params]])
+
+        class Context:
+            async def __aenter__(self):
+                return Connection()
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Context()
+
+
+@pytest.fixture
+def shared(monkeypatch, clock):
+    """모듈 전역 inventory_cache/pool을 테스트 전용으로 교체 (SnapshotDerivedCache는 생성 시 여기에 등록)"""
+    cache = InventoryCache(max_bytes=10 * 1024 * 1024, ttl=60)
+    pool = FakePool({("u1", "professional"): make_snapshot(5), ("u2", "professional"): make_snapshot(3, "나")})
+    monkeypatch.setattr(cache_module, "inventory_cache", cache)
+    monkeypatch.setattr(cache_module, "pool", pool)
+    return cache, pool
+
+
+def test_ttl_expiry(clock):
+    cache = InventoryCache(max_bytes=1024 * 1024, ttl=60)
+    key = ("u1", "professional")
+    rows = make_snapshot(5)
+    cache.put(key, rows, cache.generation(key))
+
+    clock.now += 60
+    assert cache.get(key) is rows      # ttl까지는 그대로 사용
+    clock.now += 0.001
+    assert cache.get(key) is None      # 지나면 지우고 DB에서 다시 읽도록
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_put_refreshes_loaded_at(clock):
+    cache = InventoryCache(max_bytes=1024 * 1024, ttl=60)
+    key = ("u1", "professional")
+    cache.put(key, make_snapshot(5), 0)
+    clock.now += 50
+    rows = make_snapshot(6)
+    cache.put(key, rows, 0)
+    clock.now += 50
+    assert cache.get(key) is rows
+    assert cache.stats()["bytes"] == _estimate_size(rows)
+
+
+def test_lru_eviction(clock):
+    snapshots = {user: make_snapshot(20, user) for user in ["a", "b", "c"]}
+    size = max(_estimate_size(rows) for rows in snapshots.values())
+    cache = InventoryCache(max_bytes=size * 2 + size // 2, ttl=60)
+    for user in ["a", "b"]:
+        cache.put((user, "professional"), snapshots[user], 0)
+
+    assert cache.get(("a", "professional")) is snapshots["a"]  # a를 최근에 사용 → b가 가장 오래됨
+    cache.put(("c", "professional"), snapshots["c"], 0)
+
+    assert cache.get(("b", "professional")) is None
+    assert cache.get(("a", "professional")) is snapshots["a"]
+    assert cache.get(("c", "professional")) is snapshots["c"]
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 2 and stats["bytes"] <= cache.max_bytes
+
+
+def test_snapshot_larger_than_limit_is_not_stored(clock):
+    rows = make_snapshot(20)
+    cache = InventoryCache(max_bytes=_estimate_size(rows) - 1, ttl=60)
+    cache.put(("u1", "professional"), rows, 0)
+    assert cache.get(("u1", "professional")) is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_invalidate_bumps_generation_and_drops_stale_put(clock):
+    cache = InventoryCache(max_bytes=1024 * 1024, ttl=60)
+    key = ("u1", "professional")
+    cache.put(key, make_snapshot(5), cache.generation(key))
+
+    generation = cache.generation(key)         # 읽기 시작
+    cache.invalidate("u1", "professional")     # 읽는 동안 다른 요청이 쓰기 후 무효화
+    assert cache.generation(key) == generation + 1
+    assert cache.get(key) is None
+
+    cache.put(key, make_snapshot(5), generation)  # 무효화 전에 읽은 스냅샷은 버림
+    assert cache.get(key) is None
+    rows = make_snapshot(6)
+    cache.put(key, rows, cache.generation(key))
+    assert cache.get(key) is rows
+    assert cache.generation(("u2", "professional")) == 0  # 다른 약국은 그대로
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_on_invalidate_fans_out_to_every_listener(clock):
+    cache = InventoryCache(max_bytes=1024 * 1024, ttl=60)
+    calls = []
+    cache.on_invalidate(lambda user_id, med_type: calls.append(("first", user_id, med_type)))
+    # 리스너는 락을 놓은 뒤에 불리므로 캐시를 다시 써도 교착되지 않음
+    cache.on_invalidate(lambda user_id, med_type: calls.append(("second", user_id, med_type, cache.stats()["invalidations"])))
+
+    cache.invalidate("u1", "professional")
+    cache.invalidate("u2", "general")
+    assert calls == [
+        ("first", "u1", "professional"), ("second", "u1", "professional", 1),
+        ("first", "u2", "general"), ("second", "u2", "general", 2),
+    ]
+
+
+def test_fetch_inventory_reads_once_until_invalidated(shared, clock):
+    cache, pool = shared
+    rows = asyncio.run(fetch_inventory("u1", "professional"))
+    assert asyncio.run(fetch_inventory("u1", "professional")) is rows
+    assert pool.loads == 1
+
+    cache.invalidate("u1", "professional")
+    assert asyncio.run(fetch_inventory("u1", "professional")) is not rows
+    assert pool.loads == 2
+
+    clock.now += 61
+    asyncio.run(fetch_inventory("u1", "professional"))
+    assert pool.loads == 3
+
+
+def test_fetch_inventory_does_not_store_snapshot_invalidated_while_reading(shared, clock):
+    cache, pool = shared
+    pool.during_load = lambda: cache.invalidate("u1", "professional")
+    asyncio.run(fetch_inventory("u1", "professional"))
+    assert cache.get(("u1", "professional")) is None
+
+    pool.during_load = None
+    rows = asyncio.run(fetch_inventory("u1", "professional"))
+    assert cache.get(("u1", "professional")) is rows
+
+
+def test_derived_cache_builds_once_per_snapshot(shared, clock):
+    cache, pool = shared
+    built = []
+
+    def build(rows):
+        built.append(rows)
+        return [row["drug_name"] for row in rows]
+
+    derived = SnapshotDerivedCache(build)
+    first = asyncio.run(derived.get("u1", "professional"))
+    assert first == [f"가{i}" for i in range(5)]
+    assert asyncio.run(derived.get("u1", "professional")) is first
+    assert derived.stats() == {"entries": 1, "builds": 1}
+
+    # 업로드 후 무효화 → 파생 구조도 함께 정리되고 새 스냅샷으로 다시 생성
+    pool.table[("u1", "professional")] = make_snapshot(2, "다")
+    cache.invalidate("u1", "professional")
+    assert derived.stats()["entries"] == 0
+    assert asyncio.run(derived.get("u1", "professional")) == ["다0", "다1"]
+
+    # TTL이 지나 스냅샷을 다시 읽으면(리스트가 바뀜) 무효화가 없어도 다시 생성
+    clock.now += 61
+    asyncio.run(derived.get("u1", "professional"))
+    assert derived.stats()["builds"] == 3 and pool.loads == 3
+    assert built[1] is not built[2]
+
+
+def test_derived_cache_evicts_least_recent_tenant(shared, clock):
+    _, pool = shared
+    pool.table[("u3", "professional")] = make_snapshot(1, "라")
+    derived = SnapshotDerivedCache(len, max_tenants=2)
+    for user_id in ["u1", "u2", "u1", "u3"]:
+        asyncio.run(derived.get(user_id, "professional"))
+
+    assert derived.stats() == {"entries": 2, "builds": 3}
+    asyncio.run(derived.get("u1", "professional"))  # 남아 있음
+    assert derived.stats()["builds"] == 3
+    asyncio.run(derived.get("u2", "professional"))  # 밀려났으므로 다시 생성
+    assert derived.stats()["builds"] == 4
@@ -0,0 +1,90 @@
+import base64
+import json
+import re
+
+import pytest
+
+from inventory_query import (DEFAULT_FIELDS, QueryError, SEARCH_FIELDS, build_fuzzy_search_query, build_search_query,
+                             decode_cursor, encode_cursor, parse_fields)
+
+
+def placeholders(sql):
+    return len(re.findall(r"%s", sql.replace("%%", "")))
+
+
+@pytest.mark.parametrize("name, code", [
+    ("타이레놀정500mg", "641900010"),
+    ("약 \"이름\" / +=", "nan"),
+    ("", None),
+    ("😀 emoji", "A_1%"),
+])
+def test_cursor_round_trip(name, code):
+    cursor = encode_cursor(name, code)
+    assert re.fullmatch(r"[A-Za-z0-9_-]+", cursor)   # URL에 그대로 넣을 수 있음 (패딩 없음)
+    assert decode_cursor(cursor) == (name, code)
+
+
+def _encode(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!!",
+    encode_cursor("가", "1")[:-3],                 # 잘린 cursor
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),  # UTF-8이 아님
+    _encode({"name": "가", "code": "1"}),          # 키 두 개짜리 dict도 풀면 두 값이 되지만 모양이 다름
+    _encode(["가", "1", "2"]),
+    _encode([1, 2]),
+    _encode("가"),
+])
+def test_tampered_cursor(cursor):
+    with pytest.raises(QueryError):
+        decode_cursor(cursor)
+
+
+def test_search_query_parameter_order():
+    sql, params = build_search_query(
+        "u", "professional", "타이", "", DEFAULT_FIELDS, after=("가", "1"), limit=20,
+        ingredient="Acet 50%", strength=(500.0, "mg"),
+    )
+    assert params == ["u", "professional", "%타이%", "%acet50\\%%", "mg", 500.0, "가", "1", 20]
+    assert placeholders(sql) == len(params)
+    # 키셋 비교와 정렬은 같은 바이트 순서
+    assert '(drug_name COLLATE "C", drug_code COLLATE "C") > (%s, %s)' in sql
+    assert sql.index("drug_strength_unit = %s") < sql.index('(drug_name COLLATE "C"') < sql.index("LIMIT %s")
+    assert 'ORDER BY drug_name COLLATE "C" ASC, drug_code COLLATE "C" ASC' in sql
+
+
+def test_search_query_descending_and_minimal():
+    sql, params = build_search_query("u", "general", "all", "", ["약 이름"], descending=True, after=("나", None))
+    assert params == ["u", "general", "나", None]
+    assert placeholders(sql) == len(params)
+    assert ") < (%s, %s)" in sql and 'drug_code COLLATE "C" DESC' in sql and "LIMIT" not in sql
+    # 키셋 비교용 열은 fields에 없어도 항상 조회
+    assert 'drug_name AS "_name"' in sql and 'drug_code AS "_code"' in sql
+
+
+def test_search_query_code_filter_escapes_like():
+    sql, params = build_search_query("u", "general", "", "88_0%", ["약 코드"])
+    assert "drug_code ILIKE %s" in sql and params == ["u", "general", "%88\\_0\\%%"]
+
+
+def test_fuzzy_query_parameter_order():
+    sql, params = build_fuzzy_search_query("u", "general", "타이레", "", ["약 이름"], 50)
+    assert params == ["u", "general", "%타이레%", "타이레", "%타이레%", "타이레", 50]
+    assert placeholders(sql) == len(params)
+    sql, params = build_fuzzy_search_query("u", "general", "", "8806", ["약 이름"], 10)
+    assert params == ["u", "general", "8806%", 10] and placeholders(sql) == len(params)
+
+
+def test_pack_counts_use_float_division():
+    for field in ("필요 통 수", "현재 통 수", "주문 통 수"):
+        divisions = re.findall(r"(\w+(?:::\w+)?) / NULLIF", SEARCH_FIELDS[field])
+        assert divisions and all(d.endswith("::float8") for d in divisions)
+
+
+def test_parse_fields():
+    assert parse_fields(None) == DEFAULT_FIELDS
+    assert parse_fields(" 약 이름, 성분,약 이름") == ["약 이름", "성분"]
+    with pytest.raises(QueryError):
+        parse_fields("약 이름,없는 열")
@@ -0,0 +1,58 @@
+import json
+
+import pandas as pd
+
+from conftest import make_rows
+from inventory_rows import dumps, sort_output_rows, to_output_rows
+
+
+def pandas_output(rows, ascending=True):
+    # 이전 /search 응답 생성 방식 (DataFrame → 열 이름 변경/통 수 계산/정렬 → fillna("NaN"))
+    df = pd.DataFrame(rows).rename(columns={
+        "drug_name": "약 이름", "drug_code": "약 코드", "present_count": "현재 재고",
+        "need_count": "필요 재고", "location": "위치", "unit_count": "통당 수량",
+    })
+    df["필요 통 수"] = df["필요 재고"] / df["통당 수량"]
+    df["현재 통 수"] = df["현재 재고"] / df["통당 수량"]
+    df["주문 통 수"] = df["필요 통 수"] - df["현재 통 수"]
+    df = df.sort_values(by=["약 이름", "약 코드"], ascending=ascending)
+    return json.loads(json.dumps(df.astype(object).fillna("NaN").to_dict(orient="records")))
+
+
+def test_matches_previous_dataframe_output():
+    rows = make_rows(300)
+    assert json.loads(dumps(sort_output_rows(to_output_rows(rows)))) == pandas_output(rows)
+
+
+def test_descending_matches_previous_dataframe_output():
+    rows = make_rows(300, seed=1)
+    items = sort_output_rows(to_output_rows(rows), descending=True)
+    assert json.loads(dumps(items)) == pandas_output(rows, ascending=False)
+
+
+def test_pack_counts_and_missing_values():
+    row = {"drug_name": "가", "drug_code": "1", "present_count": 15.0, "need_count": 60.0,
+           "location": None, "unit_count": 30.0}
+    [item] = to_output_rows([row])
+    assert item["필요 통 수"] == 2.0
+    assert item["현재 통 수"] == 0.5
+    assert item["주문 통 수"] == 1.5
+    assert item["위치"] == "NaN"
+
+
+def test_zero_unit_count_is_nan_not_inf():
+    [item] = to_output_rows([{"drug_name": "가", "present_count": 1.0, "need_count": 2.0, "unit_count": 0.0}])
+    assert item["필요 통 수"] == item["현재 통 수"] == item["주문 통 수"] == "NaN"
+    dumps(item)
+
+
+def test_statuses_and_optional_columns():
+    row = {"drug_name": "가", "unit_count": None, "drug_brand": "가", "drug_strength": 10.0,
+           "supplier": "도매A", "order_multiple": 4}
+    [plain] = to_output_rows([row], statuses=["심각"])
+    assert plain["부족상태"] == "심각"
+    assert "제품명" not in plain and "함량" not in plain and "거래처" not in plain
+
+    [full] = to_output_rows([row], parsed=True, order=True)
+    assert full["제품명"] == "가" and full["함량"] == 10.0
+    assert full["거래처"] == "도매A" and full["주문 배수"] == 4
@@ -0,0 +1,181 @@
+import asyncio
+import io
+
+import pandas as pd
+
+from inventory_upload import _select_changed, ingest_upload, normalize_upload_codes, row_fingerprints
+
+
+class FakeCursor:
+    """
+    ingest_upload가 쓰는 만큼만 흉내 낸 커서
+    - needs 조회, 임시 테이블 COPY, 병합(INSERT ... ON CONFLICT)을 conn.table({(약 이름, 약 코드): 현재 재고})로 처리
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        if "CREATE TEMP TABLE" in sql:
+            self.conn.staged = []
+        elif "INSERT INTO needs" in sql:
+            self.result = self.conn.merge()
+        elif "FROM needs" in sql:
+            self.result = [{"drug_name": name, "drug_code": code, "present_count": count}
+                           for (name, code), count in self.conn.table.items()]
+
+    async def fetchall(self):
+        return self.result
+
+    async def fetchone(self):
+        return self.result
+
+    def copy(self, sql):
+        conn = self.conn
+
+        class Copy:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def write_row(self, row):
+                conn.staged.append(row)
+                conn.writes += 1
+
+        return Copy()
+
+
+class FakeConnection:
+    def __init__(self, table=None):
+        self.table = dict(table or {})
+        self.staged = []
+        self.writes = 0       # 임시 테이블에 올린 행 수
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def merge(self):
+        # merge_staged와 같이: 같은 약은 마지막 행, 값이 같으면 갱신하지 않음
+        latest = {}
+        for ord_, name, code, count, *_ in sorted(self.staged):
+            latest[(name, code)] = count
+        inserted = updated = 0
+        for key, count in latest.items():
+            if key not in self.table:
+                inserted += 1
+            elif self.table[key] != count:
+                updated += 1
+            else:
+                continue
+            self.table[key] = count
+        return {"total": len(latest), "inserted": inserted, "updated": updated}
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+
+def csv_file(rows):
+    text = "약품명,약품코드,재고합계\n" + "".join(f"{name},{code},\"{count}\"\n" for name, code, count in rows)
+    return io.BytesIO(text.encode("utf-8"))
+
+
+def upload(conn, rows, remove_missing=False):
+    return asyncio.run(ingest_upload(conn, "t", "professional", csv_file(rows), "csv", remove_missing=remove_missing))
+
+
+STORED = {("가정", "644309090"): 10.0, ("나정", "111"): 5.0, ("다정", "222"): 0.0}
+FILE = [("가정", "644309090", 10), ("나정", "111", 5), ("다정", "222", 0)]
+
+
+def test_unchanged_reupload_writes_nothing():
+    conn = FakeConnection(STORED)
+    result = upload(conn, FILE)
+    assert conn.writes == 0
+    assert result == {"inserted": 0, "updated": 0, "unchanged": 3, "missing": 0, "zeroed": 0}
+    assert conn.table == STORED
+
+
+def test_changed_count_writes_only_that_row():
+    conn = FakeConnection(STORED)
+    result = upload(conn, [("가정", "644309090", 10), ("나정", "111", "1,200"), ("다정", "222", 0)])
+    assert [row[1:4] for row in conn.staged] == [("나정", "111", 1200.0)]
+    assert result["inserted"] == 0 and result["updated"] == 1 and result["unchanged"] == 2
+    assert conn.table[("나정", "111")] == 1200.0
+
+
+def test_new_code_is_inserted():
+    conn = FakeConnection(STORED)
+    result = upload(conn, FILE + [("가정", "999", 3)])
+    assert conn.writes == 1
+    assert result["inserted"] == 1 and result["updated"] == 0 and result["unchanged"] == 3
+    assert conn.table[("가정", "999")] == 3.0
+
+
+def test_duplicate_rows_in_file_last_one_wins():
+    conn = FakeConnection(STORED)
+    upload(conn, FILE + [("나정", "111", 7)])
+    assert conn.table[("나정", "111")] == 7.0
+
+
+def test_remove_missing_zeroes_absent_rows():
+    conn = FakeConnection({**STORED, ("라정", "333"): 4.0})
+    result = upload(conn, FILE, remove_missing=True)
+    # 파일에 없는 약 중 재고가 이미 0인 약(다정은 파일에 있음)은 다시 쓰지 않음
+    assert [row[1:4] for row in conn.staged] == [("라정", "333", 0.0)]
+    assert result == {"inserted": 0, "updated": 0, "unchanged": 3, "missing": 1, "zeroed": 1}
+    assert conn.table[("라정", "333")] == 0.0
+
+
+def test_remove_missing_skips_rows_already_zero():
+    conn = FakeConnection({**STORED, ("라정", "333"): 0.0})
+    result = upload(conn, FILE, remove_missing=True)
+    assert conn.writes == 0 and result["missing"] == 1 and result["zeroed"] == 0
+
+
+def test_without_remove_missing_absent_rows_are_left_alone():
+    conn = FakeConnection({**STORED, ("라정", "333"): 4.0})
+    result = upload(conn, FILE)
+    assert conn.writes == 0
+    assert result["missing"] == 1 and result["zeroed"] == 0
+    assert conn.table[("라정", "333")] == 4.0
+
+
+def test_select_changed_compares_fingerprints():
+    names, codes, counts = ["가정", "나정"], ["1", "2"], [1.0, None]
+    snapshot = {key: (fp, count) for key, fp, count in
+                zip(zip(names, codes), row_fingerprints(names, codes, counts), counts)}
+    chunk = pd.DataFrame({"약 이름": ["가정", "나정", "  ", "가정"], "약 코드": ["1", "2", "3", "1"],
+                          "현재 재고": [1.0, 0.0, 9.0, 1.0]})
+    staged, seen = set(), set()
+    changed = _select_changed(chunk, snapshot, staged, seen)
+    # 빈 재고(None → NaN)에서 0으로 바뀐 약만, 빈 약 이름 행은 제외
+    assert changed["drug_name"].tolist() == ["나정"]
+    assert seen == {("가정", "1"), ("나정", "2")} and staged == {("나정", "2")}
+
+
+def test_normalize_upload_codes():
+    codes = pd.Series(["8806123456789.0", 8806123456789.0, 644309090, "0644309090", "644,309,090", float("nan"),
+                       " A-12 ", "12.5"])
+    assert normalize_upload_codes(codes).tolist() == [
+        "8806123456789", "8806123456789", "644309090", "644309090", "644309090", "nan", "A-12", "12.5",
+    ]
+
+
+def test_codes_match_regardless_of_inferred_dtype():
+    # 빈 코드가 섞인 열은 예전 방식(타입 추론)에서 float → "….0"이 되었지만 지금은 같은 약으로 비교됨
+    conn = FakeConnection({("가정", "644309090"): 10.0, ("나정", "nan"): 1.0})
+    result = upload(conn, [("가정", "644309090.0", 10), ("나정", "", 1)])
+    assert conn.writes == 0 and result["unchanged"] == 2
@@ -0,0 +1,42 @@
+
+import numpy as np
+import pytest
+
+from conftest import make_rows
+from inventory_rows import sort_output_rows, to_output_rows
+from low_stock import build_projection, low_stock_rows
+
+
+def classify(rows, margin):
+    # 이전 /low-stock: 요청마다 전체 약을 심각/주의/충분으로 분류
+    present = np.array([row["present_count"] for row in rows], dtype=float)
+    need = np.array([row["need_count"] for row in rows], dtype=float)
+    status = np.select([present < need, present < need + margin], ["심각", "주의"], default="충분")
+    short = np.flatnonzero(status != "충분")
+    return sort_output_rows(to_output_rows([rows[i] for i in short], statuses=status[short].tolist()))
+
+
+@pytest.mark.parametrize("margin", [0.0, 0.5, 3.0, 10.0])   # /low-stock의 margin은 0 이상
+def test_matches_per_request_classification(margin):
+    rows = make_rows(500)
+    assert low_stock_rows(build_projection(rows), margin) == classify(rows, margin)
+
+
+def test_statuses_and_boundaries():
+    rows = [
+        {"drug_name": "가", "drug_code": "1", "present_count": 4.0, "need_count": 5.0, "unit_count": None},
+        {"drug_name": "나", "drug_code": "2", "present_count": 5.0, "need_count": 5.0, "unit_count": None},
+        {"drug_name": "다", "drug_code": "3", "present_count": 7.9, "need_count": 5.0, "unit_count": None},
+        {"drug_name": "라", "drug_code": "4", "present_count": 8.0, "need_count": 5.0, "unit_count": None},
+        {"drug_name": "마", "drug_code": "5", "present_count": None, "need_count": 5.0, "unit_count": None},
+    ]
+    items = low_stock_rows(build_projection(rows), 3.0)
+    # 여유분 < 0 → 심각, 0 ≤ 여유분 < margin → 주의, 재고 값이 없으면 제외
+    assert [(item["약 이름"], item["부족상태"]) for item in items] == [("가", "심각"), ("나", "주의"), ("다", "주의")]
+
+
+def test_projection_reused_across_margins():
+    projection = build_projection(make_rows(200))
+    assert np.all(np.diff(projection.gaps) >= 0)
+    assert len(low_stock_rows(projection, 1.0)) <= len(low_stock_rows(projection, 5.0))
+    assert low_stock_rows(build_projection([]), 3.0) == []
@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+import low_stock_events
+from low_stock import build_projection
+from low_stock_events import PUSH_QUEUE_SIZE, LowStockHub, _Subscriber, diff_rows
+
+
+def item(name, code, status, present):
+    return {"약 이름": name, "약 코드": code, "부족상태": status, "현재 재고": present}
+
+
+def test_diff_rows():
+    before = {("가", "1"): item("가", "1", "주의", 5.0), ("나", "2"): item("나", "2", "심각", 1.0),
+              ("다", "3"): item("다", "3", "주의", 4.0)}
+    items = [item("가", "1", "심각", 2.0), item("다", "3", "주의", 4.0), item("라", "4", "심각", 0.0)]
+    entered, changed, left, after = diff_rows(before, items)
+    assert entered == [item("라", "4", "심각", 0.0)]
+    assert changed == [item("가", "1", "심각", 2.0)]
+    assert left == [{"약 이름": "나", "약 코드": "2"}]
+    assert after == {("가", "1"): items[0], ("다", "3"): items[1], ("라", "4"): items[2]}
+
+
+def test_diff_rows_no_change():
+    items = [item("가", "1", "주의", 5.0)]
+    _, _, _, sent = diff_rows({}, items)
+    assert diff_rows(sent, [dict(row) for row in items])[:3] == ([], [], [])
+
+
+def test_full_queue_is_replaced_by_snapshot():
+    subscriber = _Subscriber(3.0)
+    subscriber.sent = {("가", "1"): item("가", "1", "심각", 0.0)}
+    for _ in range(PUSH_QUEUE_SIZE + 1):
+        subscriber.push("diff", {"entered": [], "changed": [], "left": []})
+    assert subscriber.queue.qsize() == 1
+    assert subscriber.queue.get_nowait() == ("snapshot", {"items": [item("가", "1", "심각", 0.0)]})
+
+
+def need(name, present, need_count):
+    return {"drug_name": name, "drug_code": name, "present_count": present, "need_count": need_count,
+            "unit_count": None}
+
+
+def test_publish_sends_diff_per_margin():
+    hub = LowStockHub()
+    narrow, wide = _Subscriber(0.0), _Subscriber(5.0)
+    hub._subscribers[("t", "general")] = {narrow, wide}
+    hub._publish(("t", "general"), build_projection([need("가", 1.0, 2.0), need("나", 3.0, 2.0)]))
+
+    # margin에 따라 부족 목록이 다름 (margin 0이면 현재 재고 < 필요 재고인 약만)
+    event, payload = narrow.queue.get_nowait()
+    assert event == "diff" and [row["약 이름"] for row in payload["entered"]] == ["가"]
+    event, payload = wide.queue.get_nowait()
+    assert event == "diff" and [row["약 이름"] for row in payload["entered"]] == ["가", "나"]
+
+    # 다시 같은 투영을 보내면 바뀐 것이 없으므로 이벤트 없음
+    hub._publish(("t", "general"), build_projection([need("가", 1.0, 2.0), need("나", 3.0, 2.0)]))
+    assert wide.queue.empty() and narrow.queue.empty()
+
+    hub._publish(("t", "general"), build_projection([need("가", 9.0, 2.0), need("나", 3.0, 2.0)]))
+    for subscriber in (narrow, wide):
+        event, payload = subscriber.queue.get_nowait()
+        assert payload["left"] == [{"약 이름": "가", "약 코드": "가"}] and payload["entered"] == []
+
+
+class FakeProjectionCache:
+    """low_stock_cache 대신: 첫 get(구독자의 스냅샷) 도중에 재고가 바뀌고 무효화 알림이 옴"""
+
+    def __init__(self, hub, before, after, delay):
+        self.hub, self.projection, self.after, self.delay = hub, before, after, delay
+        self.calls = 0
+
+    async def get(self, user_id, med_type):
+        self.calls += 1
+        projection = self.projection
+        if self.calls == 1:
+            self.projection = self.after
+            self.hub.notify(user_id, med_type)
+            # delay > 0이면 감시 작업이 구독자 등록 전에 알림을 먼저 처리
+            await asyncio.sleep(self.delay)
+        return projection
+
+
+@pytest.mark.parametrize("delay", [0, 0.05])
+def test_invalidation_while_subscribing_is_not_missed(monkeypatch, delay):
+    monkeypatch.setattr(low_stock_events, "PUSH_DEBOUNCE", 0)
+    before = build_projection([need("가", 1.0, 2.0)])
+    after = build_projection([need("가", 1.0, 2.0), need("나", 0.0, 2.0)])
+
+    async def scenario():
+        hub = LowStockHub()
+        cache = FakeProjectionCache(hub, before, after, delay)
+        monkeypatch.setattr(low_stock_events, "low_stock_cache", cache)
+        subscriber = await hub.subscribe("t", "general", 0.0)
+        try:
+            event, payload = subscriber.queue.get_nowait()
+            assert event == "snapshot" and [row["약 이름"] for row in payload["items"]] == ["가"]
+            # PUSH_RECHECK(30초)를 기다리지 않고 바로 diff
+            event, payload = await asyncio.wait_for(subscriber.queue.get(), timeout=1)
+            assert event == "diff" and [row["약 이름"] for row in payload["entered"]] == ["나"]
+        finally:
+            hub.unsubscribe("t", "general", subscriber)
+        assert hub.stats()["tenants"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_subscribe_without_changes_sends_only_snapshot(monkeypatch):
+    monkeypatch.setattr(low_stock_events, "PUSH_DEBOUNCE", 0)
+    projection = build_projection([need("가", 1.0, 2.0)])
+
+    class StaticCache:
+        async def get(self, user_id, med_type):
+            return projection
+
+    async def scenario():
+        monkeypatch.setattr(low_stock_events, "low_stock_cache", StaticCache())
+        hub = LowStockHub()
+        subscriber = await hub.subscribe("t", "general", 0.0)
+        assert subscriber.queue.get_nowait()[0] == "snapshot"
+        # 같은 투영으로 무효화 알림이 와도 보낼 것이 없음
+        hub.notify("t", "general")
+        await asyncio.sleep(0.05)
+        assert subscriber.queue.empty()
+        hub.unsubscribe("t", "general", subscriber)
+
+    asyncio.run(scenario())
+
+
+def test_failed_subscribe_stops_watch(monkeypatch):
+    class FailingCache:
+        async def get(self, user_id, med_type):
+            raise RuntimeError("db down")
+
+    async def scenario():
+        monkeypatch.setattr(low_stock_events, "low_stock_cache", FailingCache())
+        hub = LowStockHub()
+        with pytest.raises(RuntimeError):
+            await hub.subscribe("t", "general", 0.0)
+        assert not hub._tasks and not hub._changed
+
+    asyncio.run(scenario())
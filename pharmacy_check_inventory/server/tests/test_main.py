@@ -0,0 +1,30 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client():
+    # 입력 검증은 DB에 닿기 전에 끝나야 하므로 연결 대신 None (lifespan도 실행하지 않아 풀을 열지 않음)
+    async def no_conn():
+        yield None
+
+    main.app.dependency_overrides[main.get_conn] = no_conn
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+def test_reconcile_stock_rejects_unsupported_type(client):
+    response = client.post("/reconcile-stock", params={"type": "veterinary"},
+                           files={"sales": ("판매.csv", b"a,b\n1,2\n")})
+    assert response.status_code == 400
+    assert "general" in response.json()["detail"] and "professional" in response.json()["detail"]
+
+
+def test_reconcile_stock_requires_a_file(client):
+    assert client.post("/reconcile-stock", params={"type": "general"}).status_code == 400
+
+
+def test_forecast_needs_rejects_unsupported_type(client):
+    assert client.post("/forecast-needs", params={"type": "veterinary"}).status_code == 400
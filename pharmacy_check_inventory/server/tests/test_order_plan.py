@@ -0,0 +1,112 @@
+import math
+
+import numpy as np
+import pytest
+
+from order_plan import NO_SUPPLIER, build_columns, group_orders, parse_order_multiple, plan_orders, to_csv
+
+
+def row(name, present, need, unit=None, multiple=None, supplier=None, code=None):
+    return {"drug_name": name, "drug_code": code, "location": None, "present_count": present, "need_count": need,
+            "unit_count": unit, "order_multiple": multiple, "supplier": supplier}
+
+
+def expected_packs(present, need, unit, multiple):
+    # 모듈 docstring의 정의를 약마다 그대로 계산
+    unit = unit if unit and unit > 0 else 1
+    multiple = multiple if multiple and multiple > 0 else 1
+    packs = math.ceil((need - present) / unit - 1e-9)
+    return math.ceil(packs / multiple - 1e-9) * multiple
+
+
+def test_pack_counts_and_quantities():
+    rows = [
+        row("가", 0.0, 60.0, unit=30.0),                 # 딱 2통
+        row("나", 10.0, 70.0, unit=30.0),                # 2통
+        row("다", 0.0, 61.0, unit=30.0),                 # 2.03통 → 3통
+        row("라", 0.0, 5.0, unit=30.0, multiple=4),      # 1통 → 배수 4
+        row("마", 0.0, 7.0, unit=0.0),                   # 통당 수량 0 → 낱개
+        row("바", 0.0, 0.3, unit=0.1),                   # 2.9999999999999996통 → 3통
+        row("사", 50.0, 10.0, unit=10.0),                # 충분 → 주문 안 함
+        row("아", None, 10.0),                           # 현재 재고 없음 → 주문 안 함
+    ]
+    plan = plan_orders(build_columns(rows))
+    assert plan["약 이름"].tolist() == ["가", "나", "다", "라", "마", "바"]
+    assert plan["주문 통 수"].tolist() == [2, 2, 3, 4, 7, 3]
+    assert plan["주문 통 수"].dtype == np.int64
+    assert plan["주문 수량"].tolist() == [60.0, 60.0, 90.0, 120.0, 7.0, 0.3]
+    assert plan["부족 수량"].tolist() == [60.0, 60.0, 61.0, 5.0, 7.0, 0.3]
+
+
+def test_quantity_is_pack_count_times_unit():
+    rng = np.random.default_rng(0)
+    rows = [
+        row(f"약{i:03d}", float(rng.integers(0, 100)), float(rng.integers(0, 200)),
+            unit=float(rng.choice([0.5, 1.0, 10.0, 30.0, 0.0])), multiple=int(rng.choice([1, 2, 3, 6])))
+        for i in range(300)
+    ]
+    plan = plan_orders(build_columns(rows))
+    by_name = {r["drug_name"]: r for r in rows}
+    for name, count, quantity, unit in zip(plan["약 이름"], plan["주문 통 수"], plan["주문 수량"], plan["통당 수량"]):
+        r = by_name[name]
+        assert count == expected_packs(r["present_count"], r["need_count"], r["unit_count"], r["order_multiple"])
+        assert count % r["order_multiple"] == 0
+        assert quantity == pytest.approx(count * unit)
+    assert len(plan["약 이름"]) == sum(
+        expected_packs(r["present_count"], r["need_count"], r["unit_count"], r["order_multiple"]) > 0 for r in rows
+    )
+
+
+def test_order_and_supplier_filter():
+    rows = [
+        row("나", 0.0, 1.0, supplier="도매B"),
+        row("가", 0.0, 1.0, supplier=None),
+        row("가", 0.0, 1.0, supplier=" 도매B ", code="2"),
+        row("가", 0.0, 1.0, supplier="도매B", code="1"),
+        row("다", 0.0, 1.0, supplier="도매A"),
+    ]
+    columns = build_columns(rows)
+    plan = plan_orders(columns)
+    # 거래처(미지정은 맨 뒤) → 약 이름 → 약 코드
+    assert list(zip(plan["거래처"], plan["약 이름"], plan["약 코드"])) == [
+        ("도매A", "다", None), ("도매B", "가", "1"), ("도매B", "가", "2"), ("도매B", "나", None),
+        (NO_SUPPLIER, "가", None),
+    ]
+    assert plan_orders(columns, supplier=NO_SUPPLIER)["약 이름"].tolist() == ["가"]
+    assert plan_orders(columns, supplier="없는 거래처")["약 이름"].tolist() == []
+
+
+def test_group_orders():
+    rows = [
+        row("가", 0.0, 3.0, supplier="도매A"),
+        row("나", 0.0, 2.0, supplier="도매A"),
+        row("다", 0.0, 5.0),
+    ]
+    groups = group_orders(plan_orders(build_columns(rows)))
+    assert [(g["거래처"], g["품목 수"], g["주문 통 수"]) for g in groups] == [("도매A", 2, 5), (NO_SUPPLIER, 1, 5)]
+    assert [item["약 이름"] for item in groups[0]["items"]] == ["가", "나"]
+    assert "거래처" not in groups[0]["items"][0]
+    assert group_orders(plan_orders(build_columns([]))) == []
+
+
+def test_string_counts_from_old_uploads():
+    plan = plan_orders(build_columns([row("가", "1,000", "1,060", unit="30")]))
+    assert plan["주문 통 수"].tolist() == [2]
+
+
+def test_to_csv():
+    data = to_csv(plan_orders(build_columns([row("가", 0.0, 60.0, unit=30.0, supplier="도매A")])))
+    assert data.startswith(b"\xef\xbb\xbf")
+    assert data.decode("utf-8-sig").splitlines() == ["거래처,약 이름,약 코드,주문 통 수,통당 수량,주문 수량",
+                                                     "도매A,가,,2,30.0,60.0"]
+
+
+@pytest.mark.parametrize("value, expected", [(2, 2), (2.0, 2), ("3", 3), (1, 1)])
+def test_parse_order_multiple(value, expected):
+    assert parse_order_multiple(value) == expected
+
+
+@pytest.mark.parametrize("value", [2.5, 0, -2, "abc", None, "1.5"])
+def test_parse_order_multiple_rejects(value):
+    with pytest.raises(ValueError):
+        parse_order_multiple(value)
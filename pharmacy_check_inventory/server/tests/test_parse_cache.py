@@ -0,0 +1,96 @@
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import parse_cache  # noqa: E402
+from parse_cache import ParseCache, file_digest  # noqa: E402
+
+
+def frame(n=500, tag="가"):
+    return pd.DataFrame({
+        "약품명": [f"{tag}{i}" if i % 7 else None for i in range(n)],
+        "약품코드": [str(600000000 + i) for i in range(n)],
+        "재고": np.arange(n) / 4,
+    })
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParseCache(str(tmp_path), 10 * 1024 * 1024)
+
+
+def test_put_get_round_trip(cache):
+    df = frame()
+    key = cache.key(b"digest", "html:cp949")
+    assert cache.get(key) is None
+    cache.put(key, df)
+    pd.testing.assert_frame_equal(cache.get(key), df, check_dtype=False)
+    assert cache.get(key).equals(df)
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1 and cache.stats()["stores"] == 1
+
+
+def test_key_depends_on_variant(cache):
+    assert cache.key(b"digest", "html:cp949") != cache.key(b"digest", "html:utf-8")
+    assert cache.key(b"digest", "xls:None") == cache.key(b"digest", "xls:None")
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: data[:len(data) // 2],                                          # 쓰다 만 파일
+    lambda data: b"",
+    lambda data: data[:len(data) // 2] + bytes(b ^ 0x5A for b in data[len(data) // 2:][:64])
+    + data[len(data) // 2 + 64:],                                                # 열 데이터 손상 (구조는 정상)
+    lambda data: b"not an arrow file at all" * 100,
+])
+def test_damaged_file_is_a_miss(cache, damage):
+    key = cache.key(b"digest", "html:cp949")
+    cache.put(key, frame())
+    path = cache._path(key)
+    path.write_bytes(damage(path.read_bytes()))
+
+    assert cache.get(key) is None
+    assert not path.exists()          # 지우고 다음 업로드 때 다시 파싱해서 저장
+    cache.put(key, frame())
+    assert cache.get(key).equals(frame())
+
+
+def test_eviction_keeps_total_under_limit(tmp_path):
+    probe = ParseCache(str(tmp_path / "probe"), 10 * 1024 * 1024)
+    probe.put("probe", frame())
+    size = probe._path("probe").stat().st_size
+
+    cache = ParseCache(str(tmp_path / "cache"), int(size * 2.5))
+    for i, key in enumerate(["a", "b"]):
+        cache.put(key, frame(tag=key))
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    # a를 최근에 읽었으므로 다음 저장에서는 b가 먼저 지워짐
+    assert cache.get("a") is not None
+    cache.put("c", frame(tag="c"))
+
+    stats = cache.stats()
+    assert stats["bytes"] <= cache.max_bytes and stats["entries"] == 2 and stats["evictions"] == 1
+    assert cache.get("b") is None
+    assert cache.get("a").equals(frame(tag="a")) and cache.get("c").equals(frame(tag="c"))
+
+
+def test_disabled_cache(tmp_path):
+    assert not ParseCache(str(tmp_path), 0).enabled
+
+
+def test_mixed_column_is_skipped(cache):
+    cache.put("mixed", pd.DataFrame({"a": [1, "x"]}))
+    assert cache.get("mixed") is None and cache.stats()["skipped"] == 1
+
+
+def test_file_digest_reads_in_chunks_and_restores_position(monkeypatch):
+    monkeypatch.setattr(parse_cache, "DIGEST_CHUNK_BYTES", 7)
+    data = "약품명,약품코드\n".encode("utf-8") * 100
+    fileobj = io.BytesIO(data)
+    fileobj.seek(0)
+    assert file_digest(fileobj) == hashlib.blake2b(data, digest_size=16).digest()
+    assert fileobj.tell() == 0
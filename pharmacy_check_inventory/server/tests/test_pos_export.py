@@ -0,0 +1,161 @@
+import datetime
+import pickle
+
+import pandas as pd
+import pytest
+
+from inventory_upload import UploadParseError
+from pos_export import in_ranges, pack_parsed, parse_export, parse_period, unpack_parsed
+
+D = datetime.date
+
+
+def general_sales(rows):
+    columns = ["판매일자", "시간", "상품명", "수량", "판매금액"]
+    return pd.DataFrame(rows, columns=columns, dtype=object)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("판매상세내역_20250421-20250503 일반약.csv", (D(2025, 4, 21), D(2025, 5, 3))),
+    ("판매_20250503~20250421.csv", (D(2025, 4, 21), D(2025, 5, 3))),
+    ("전문약 재고현황_20250415.csv", (D(2025, 4, 15), D(2025, 4, 15))),
+    ("재고현황.csv", None),
+    (None, None),
+    # 날짜가 아닌 8자리 숫자는 건너뜀
+    ("판매_20251399.csv", None),
+    ("판매_20251399-20251401_20250415.csv", (D(2025, 4, 15), D(2025, 4, 15))),
+    ("판매_123456789.csv", None),
+])
+def test_parse_period(text, expected):
+    assert parse_period(text) == expected
+
+
+def test_sales_lines_dates_and_hashes():
+    df = general_sales([
+        ["2025-05-02", "10:00", "게보린정", "2", "3,000"],
+        ["2025-05-02", "10:00", "게보린정", "2", "3,000"],   # 같은 줄 두 번 → 순번으로 구분
+        ["2025-05-03", "11:00", " 타이레놀정 ", "1,000", "500"],
+        ["2025-05-03", "11:00", "", "1", "0"],                 # 빈 약 이름
+        ["합계", None, "12345", "1003", "3500"],               # 숫자만 있는 약 이름 (합계 행)
+    ])
+    parsed = parse_export(df, "general", "sales")
+    assert parsed.lines["drug_name"].tolist() == ["게보린정", "게보린정", "타이레놀정"]
+    assert parsed.lines["quantity"].tolist() == [2.0, 2.0, 1000.0]
+    assert parsed.lines["line_date"].tolist() == [D(2025, 5, 2), D(2025, 5, 2), D(2025, 5, 3)]
+    assert parsed.period == (D(2025, 5, 2), D(2025, 5, 3))
+    assert parsed.invalid.empty
+    hashes = parsed.lines["line_hash"].tolist()
+    assert len(set(hashes)) == 3 and all(len(h) == 16 for h in hashes)
+
+
+def test_line_hash_is_stable_across_number_formats():
+    # CSV("3,000")와 엑셀(3000.0)에서 읽은 같은 줄은 같은 line_hash
+    csv = parse_export(general_sales([["2025-05-02", "10:00", "게보린정", "2", "3,000"]]), "general", "sales")
+    xls = parse_export(general_sales([["2025-05-02", "10:00", "게보린정", "2.0", "3000.0"]]),
+                       "general", "sales")
+    assert csv.lines["line_hash"].tolist() == xls.lines["line_hash"].tolist()
+
+
+def test_invalid_quantities_and_dates_are_reported():
+    df = general_sales([
+        ["2025-05-02", "10:00", "게보린정", "두개", "0"],
+        ["날짜없음", "10:00", "타이레놀정", "1", "0"],
+    ])
+    parsed = parse_export(df, "general", "sales")
+    # 수량을 읽을 수 없으면 0, 날짜를 읽을 수 없는 거래 줄은 제외
+    assert parsed.lines["drug_name"].tolist() == ["게보린정"]
+    assert parsed.lines["quantity"].tolist() == [0.0]
+    assert parsed.invalid[["열", "행", "값"]].values.tolist() == [["수량", 0, "두개"], ["판매일자", 1, "날짜없음"]]
+
+
+def test_complete_ranges_skip_covered_dates():
+    df = general_sales([
+        ["2025-05-01", "10:00", "게보린정", "1", "0"],
+        ["2025-05-02", "10:00", "게보린정", "1", "0"],
+        ["2025-05-03", "10:00", "게보린정", "1", "0"],
+    ])
+    full = parse_export(df, "general", "sales")
+    parsed = parse_export(df, "general", "sales", complete_ranges=[(D(2025, 5, 1), D(2025, 5, 3))])
+    assert parsed.skipped == 2
+    assert parsed.lines["line_date"].tolist() == [D(2025, 5, 3)]
+    # 남은 줄의 line_hash는 건너뛰지 않았을 때와 같음, 기간은 파일 전체 기준
+    assert parsed.lines["line_hash"].tolist() == full.lines["line_hash"].tolist()[2:]
+    assert parsed.period == full.period
+
+
+def test_period_report_lines_use_period():
+    df = pd.DataFrame({"약품명": ["가정", "나정"], "약품코드": ["644,309,090", "111"], "조제수량": ["3", "4"]})
+    period = (D(2025, 4, 1), D(2025, 4, 30))
+    parsed = parse_export(df, "professional", "sales", period=period)
+    assert parsed.lines["drug_code"].tolist() == ["644309090", "111"]
+    assert parsed.lines["line_date"].tolist() == [D(2025, 4, 30)] * 2
+    # 같은 기간 같은 약은 같은 line_hash, 기간이 다르면 다른 줄
+    again = parse_export(df, "professional", "sales", period=period)
+    other = parse_export(df, "professional", "sales", period=(D(2025, 5, 1), D(2025, 5, 31)))
+    assert again.lines["line_hash"].tolist() == parsed.lines["line_hash"].tolist()
+    assert set(other.lines["line_hash"]).isdisjoint(parsed.lines["line_hash"])
+
+
+def test_snapshot_has_no_line_hash():
+    df = pd.DataFrame({"상품명": ["게보린정"], "재고수량": ["5"]})
+    parsed = parse_export(df, "general", "snapshot")
+    assert "line_hash" not in parsed.lines and parsed.period is None
+    assert parsed.lines["drug_code"].tolist() == [""]
+
+
+def test_missing_columns_and_unknown_kind():
+    with pytest.raises(UploadParseError, match="필수 열"):
+        parse_export(pd.DataFrame({"상품명": ["가"]}), "general", "sales")
+    with pytest.raises(UploadParseError, match="지원하지 않는"):
+        parse_export(pd.DataFrame(), "general", "returns")
+
+
+def test_in_ranges():
+    dates = pd.Series([D(2025, 5, 1), D(2025, 5, 2), None, D(2025, 5, 9)])
+    assert in_ranges(dates, [(D(2025, 5, 1), D(2025, 5, 2)), (D(2025, 5, 9), D(2025, 5, 10))]).tolist() == [
+        True, False, False, True,
+    ]
+
+
+def assert_round_trip(parsed):
+    unpacked = unpack_parsed(pickle.loads(pickle.dumps(pack_parsed(parsed))))
+    pd.testing.assert_frame_equal(unpacked.lines, parsed.lines, check_dtype=False)
+    assert unpacked.lines.to_dict(orient="list") == parsed.lines.to_dict(orient="list")
+    pd.testing.assert_frame_equal(unpacked.invalid, parsed.invalid, check_dtype=False)
+    assert (unpacked.period, unpacked.skipped) == (parsed.period, parsed.skipped)
+
+
+def test_pack_round_trip_sales():
+    df = general_sales([
+        ["2025-05-02", "10:00", "게보린정", "2", "0"],
+        ["2025-05-02", "10:00", "게보린정", "2", "0"],
+        ["2025-05-03", "11:00", "타이레놀정", "두개", "0"],
+        ["날짜없음", "11:00", "타이레놀정", "1", "0"],
+    ])
+    assert_round_trip(parse_export(df, "general", "sales", complete_ranges=[(D(2025, 4, 1), D(2025, 4, 2))]))
+
+
+def test_pack_round_trip_with_supplier_and_period_report():
+    purchase = pd.DataFrame({
+        "일 자": ["2025-05-01", "2025-05-02"], "약 품 명": ["가정", "나정"], "거래처명": ["도매A", None],
+        "단 가": ["100", "200"], "수량": ["3", "4"], "금액": ["300", "800"],
+    })
+    parsed = parse_export(purchase, "professional", "purchase")
+    assert parsed.lines["supplier"].tolist() == ["도매A", ""]
+    assert_round_trip(parsed)
+
+    report = pd.DataFrame({"약품명": ["가정"], "약품코드": ["1"], "조제수량": ["3"]})
+    assert_round_trip(parse_export(report, "professional", "sales", period=(D(2025, 4, 1), D(2025, 4, 30))))
+
+
+def test_pack_keeps_line_hash_trailing_zero_bytes():
+    parsed = parse_export(pd.DataFrame({"약품명": ["가정"], "약품코드": ["1"], "조제수량": ["3"]}),
+                          "professional", "sales", period=(D(2025, 4, 1), D(2025, 4, 30)))
+    parsed.lines["line_hash"] = [b"\x01" * 15 + b"\x00"]
+    assert unpack_parsed(pack_parsed(parsed)).lines["line_hash"].tolist() == [b"\x01" * 15 + b"\x00"]
+
+
+def test_pack_round_trip_empty():
+    df = pd.DataFrame({"상품명": pd.Series([], dtype=object), "재고수량": pd.Series([], dtype=object)})
+    unpacked = unpack_parsed(pack_parsed(parse_export(df, "general", "snapshot")))
+    assert unpacked.lines.empty and list(unpacked.lines.columns) == ["drug_name", "drug_code", "quantity"]
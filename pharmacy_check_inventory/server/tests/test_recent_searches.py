@@ -0,0 +1,175 @@
+import asyncio
+import datetime
+
+import pytest
+
+import recent_searches
+from recent_searches import RecentSearchBuffer, _Recent
+
+
+def at(minute):
+    return datetime.datetime(2025, 5, 1, 9, minute, tzinfo=datetime.timezone.utc)
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def execute(self, sql, params=None):
+        pool = self.pool
+        if "INSERT INTO recent_searches" in sql:
+            pool.flush_started.set()
+            await pool.release.wait()
+            if pool.fail:
+                raise OSError("connection lost")
+            # FLUSH_SQL과 같이 같은 검색어는 더 최근 시각만
+            for user_id, med_type, keyword, created_at in zip(*params):
+                key = (user_id, med_type, keyword)
+                pool.table[key] = max(created_at, pool.table.get(key, created_at))
+            return None
+        user_id, med_type, limit = params
+        rows = sorted(((keyword, created_at) for (u, t, keyword), created_at in pool.table.items()
+                       if (u, t) == (user_id, med_type)), key=lambda row: row[1], reverse=True)[:limit]
+
+        class Cursor:
+            async def fetchall(self):
+                return [{"keyword": keyword, "created_at": created_at} for keyword, created_at in rows]
+
+        pool.loads += 1
+        return Cursor()
+
+    async def commit(self):
+        pass
+
+
+class FakePool:
+    """recent_searches.pool 대신: recent_searches 테이블을 dict로"""
+
+    def __init__(self, table=None):
+        self.table = dict(table or {})
+        self.fail = False
+        self.loads = 0
+        self.flush_started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.release.set()
+
+    def connection(self):
+        pool = self
+
+        class Context:
+            async def __aenter__(self):
+                return FakeConnection(pool)
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Context()
+
+
+@pytest.fixture
+def limit(monkeypatch):
+    monkeypatch.setattr(recent_searches, "RECENT_SEARCH_LIMIT", 3)
+    return 3
+
+
+def test_touch_merges_repeated_keywords(limit):
+    recent = _Recent()
+    recent.touch("타이레놀", at(1))
+    recent.touch("게보린", at(2))
+    recent.touch("타이레놀", at(3))
+    assert list(recent.keywords.items()) == [("게보린", at(2)), ("타이레놀", at(3))]
+    # 더 오래된 시각(DB에서 읽은 값 등)으로 다시 와도 최근 시각과 순서 유지
+    recent.touch("타이레놀", at(0))
+    assert list(recent.keywords.items()) == [("게보린", at(2)), ("타이레놀", at(3))]
+
+
+def test_touch_places_older_keywords_in_time_order(limit):
+    recent = _Recent()
+    recent.touch("가", at(5))
+    recent.touch("나", at(1))
+    assert list(recent.keywords) == ["나", "가"]
+
+
+def test_per_user_limit_evicts_oldest(limit):
+    recent = _Recent()
+    for minute, keyword in enumerate(["가", "나", "다", "라"]):
+        recent.touch(keyword, at(minute))
+    assert list(recent.keywords) == ["나", "다", "라"]
+    # 제한을 넘은 오래된 검색어는 다시 들어와도 가장 오래된 자리라 바로 밀려남
+    recent.touch("가", at(0))
+    assert list(recent.keywords) == ["나", "다", "라"]
+
+
+def test_buffer_keeps_most_recent_users(monkeypatch, limit):
+    monkeypatch.setattr(recent_searches, "MAX_USERS", 2)
+    buffer = RecentSearchBuffer()
+    for user in ("u1", "u2", "u1", "u3"):
+        buffer.add(user, "general", "가")
+    assert list(buffer._recent) == [("u1", "general"), ("u3", "general")]
+    # 메모리 목록에서 밀려나도 저장 대기열에는 남아 있음
+    assert len(buffer._pending) == 3
+
+
+def test_recent_reads_db_once_and_merges(monkeypatch, limit):
+    pool = FakePool({("u", "general", "옛검색"): at(0), ("u", "general", "다른워커"): at(2)})
+    monkeypatch.setattr(recent_searches, "pool", pool)
+    buffer = RecentSearchBuffer()
+
+    async def scenario():
+        buffer.add("u", "general", "새검색")
+        assert await buffer.recent("u", "general") == ["새검색", "다른워커", "옛검색"]
+        buffer.add("u", "general", "옛검색")
+        assert await buffer.recent("u", "general") == ["옛검색", "새검색", "다른워커"]
+        assert pool.loads == 1
+
+    asyncio.run(scenario())
+
+
+def test_flush_writes_pending_with_latest_time(monkeypatch, limit):
+    pool = FakePool({("u", "general", "가"): at(0)})
+    monkeypatch.setattr(recent_searches, "pool", pool)
+    buffer = RecentSearchBuffer()
+
+    async def scenario():
+        buffer.add("u", "general", "가")
+        buffer.add("u", "general", "가")
+        buffer.add("u", "general", "나")
+        assert await buffer.flush() == 2
+        assert await buffer.flush() == 0
+
+    asyncio.run(scenario())
+    assert pool.table[("u", "general", "가")] > at(0)
+    assert set(pool.table) == {("u", "general", "가"), ("u", "general", "나")}
+    assert buffer.stats()["pending"] == 0 and buffer.stats()["flushed"] == 2
+
+
+def test_failed_flush_requeues_without_losing_newer_touches(monkeypatch, limit):
+    pool = FakePool()
+    monkeypatch.setattr(recent_searches, "pool", pool)
+    buffer = RecentSearchBuffer()
+
+    async def scenario():
+        buffer.add("u", "general", "가")
+        buffer.add("u", "general", "나")
+        first = dict(buffer._pending)
+
+        pool.fail = True
+        pool.release.clear()
+        flush = asyncio.create_task(buffer.flush())
+        await pool.flush_started.wait()
+        # 저장하는 사이에 같은 검색어를 다시 검색
+        buffer.add("u", "general", "가")
+        newer = buffer._pending[("u", "general", "가")]
+        pool.release.set()
+        with pytest.raises(OSError):
+            await flush
+
+        assert buffer._pending == {("u", "general", "가"): newer, ("u", "general", "나"): first[("u", "general", "나")]}
+        assert newer >= first[("u", "general", "가")]
+        assert buffer.stats()["flush_failures"] == 1
+
+        pool.fail = False
+        assert await buffer.flush() == 2
+        assert pool.table[("u", "general", "가")] == newer
+
+    asyncio.run(scenario())
@@ -0,0 +1,51 @@
+import pandas as pd
+
+from stock_reconcile import INVALID_COLUMNS, RESULT_COLUMNS, normalize_codes, reconcile_professional
+
+
+def frames():
+    stock = pd.DataFrame({
+        "약품명": ["나정", " 가정 ", "다정", "나정", "123"],
+        "약품코드": ["644,309,090", "111", "333", "644309090", None],
+        "개수": ["1,000", "10", "x", "5", "99"],
+    })
+    purchase = pd.DataFrame({
+        "약 품 명": ["가정", "가정", "다정", None],
+        "수량": ["3", "2", "", "7"],
+    })
+    sales = pd.DataFrame({
+        "약품명": ["가정", "라정", "나정", "라정", "마정"],
+        "약품코드": ["111", "444", "644309090.0", "444", "555"],
+        "조제수량": ["4", "1", "5", "2", ""],
+    })
+    return stock, purchase, sales
+
+
+def test_final_stock_and_row_order():
+    table, _ = reconcile_professional(*frames())
+    assert list(table.columns) == RESULT_COLUMNS
+    # 재고현황 순서(같은 약은 한 줄로 합침) → 재고현황에 없는 조제 약 (약품명, 약품코드 순), 숫자만 있는 약품명 제외
+    assert table.to_dict(orient="records") == [
+        {"약품명": "나정", "약품코드": "644309090", "개수": 1005.0, "구매수량": 0.0, "판매수량": 5.0, "최종재고": 1000.0},
+        {"약품명": "가정", "약품코드": "111", "개수": 10.0, "구매수량": 5.0, "판매수량": 4.0, "최종재고": 11.0},
+        {"약품명": "다정", "약품코드": "333", "개수": 0.0, "구매수량": 0.0, "판매수량": 0.0, "최종재고": 0.0},
+        {"약품명": "라정", "약품코드": "444", "개수": 0.0, "구매수량": 0.0, "판매수량": 3.0, "최종재고": -3.0},
+        {"약품명": "마정", "약품코드": "555", "개수": 0.0, "구매수량": 0.0, "판매수량": 0.0, "최종재고": 0.0},
+    ]
+
+
+def test_unparseable_numbers_are_reported():
+    _, invalid = reconcile_professional(*frames())
+    assert list(invalid.columns) == INVALID_COLUMNS
+    assert invalid.to_dict(orient="records") == [{"파일": "재고", "열": "개수", "행": 2, "값": "x"}]
+
+
+def test_empty_report_when_all_numbers_parse():
+    stock, purchase, sales = frames()
+    stock.loc[2, "개수"] = "0"
+    assert reconcile_professional(stock, purchase, sales).invalid.empty
+
+
+def test_normalize_codes():
+    codes = normalize_codes(pd.Series(["644,309,090", 644309090.0, " A-1 ", None]))
+    assert list(codes) == ["644309090", "644309090", "A-1", ""]